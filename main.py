@@ -4,16 +4,26 @@ import deepdiff
 
 from wf.enum import CharPosition, Element
 from wf.wf import WorldFlipperData
-from wf.character import WorldFlipperCharacter
 from wf.enemy import Enemy
 from wf.status_effect import StatusEffectKind, StatusEffect
 from wf.game_state import GameState
-from wf.dmg_formula import DamageFormulaContext
+from wf.ability import WorldFlipperAbility, evaluate_party
+from wf.ability.index import INDEXED_FIELDS
+from wf.effect.main_mapping import main_effect_mapping
+from wf.effect.continuous_mapping import continuous_effect_mapping
 
 EffectEnum = Literal[
     "main_effect", "main_condition", "continuous_effect", "continuous_condition"
 ]
 
+# Ability field that holds each kind of index, along with the effect type it belongs to.
+_EFFECT_FIELDS: dict[EffectEnum, tuple[str, str]] = {
+    "main_effect": ("main_effect_index", "0"),
+    "main_condition": ("main_condition_index", "0"),
+    "continuous_effect": ("continuous_effect_index", "1"),
+    "continuous_condition": ("continuous_condition_index", "1"),
+}
+
 
 # TODO: Figure out if continuous effect 45 always has 2 as the direct hits count.
 # See: brown_fighter_3 (Sonia)
@@ -26,22 +36,8 @@ EffectEnum = Literal[
 # difference in the ability data.
 def diff_effect(effect_type: EffectEnum, effect_index: str, base=None):
     wf_json = WorldFlipperData("wf_data_json")
-    effects = []
-    for char in wf_json.characters.values():
-        for ab_effects in char.abilities:
-            for ab in ab_effects:
-                if effect_type == "main_effect":
-                    if ab.main_effect_index == effect_index:
-                        effects.append(ab)
-                elif effect_type == "main_condition":
-                    if ab.main_condition_index == effect_index:
-                        effects.append(ab)
-                elif effect_type == "continuous_effect":
-                    if ab.continuous_effect_index == effect_index:
-                        effects.append(ab)
-                elif effect_type == "continuous_condition":
-                    if ab.continuous_condition_index == effect_index:
-                        effects.append(ab)
+    field, _ = _EFFECT_FIELDS[effect_type]
+    effects = [ab for _, ab in wf_json.abilities_where(field, effect_index)]
 
     if len(effects) < 2:
         return
@@ -54,49 +50,39 @@ def diff_effect(effect_type: EffectEnum, effect_index: str, base=None):
     else:
         base = effects[0]
     for other in effects[1:]:
-        dd = deepdiff.diff.DeepDiff(base, other, exclude_types=[WorldFlipperCharacter])
+        dd = deepdiff.diff.DeepDiff(base.to_dict(), other.to_dict())
         if "values_changed" not in dd:
             continue
         dd = dd["values_changed"]
         for ignore in [
-            "root.ability_statue_group",
-            "root.main_effect_min",
-            "root.main_effect_max",
-            "root.continuous_effect_min",
-            "root.continuous_effect_max",
-            "root.is_main",
+            "root['ability_statue_group']",
+            "root['main_effect_min']",
+            "root['main_effect_max']",
+            "root['continuous_effect_min']",
+            "root['continuous_effect_max']",
+            "root['is_main']",
         ]:
             if ignore in dd:
                 del dd[ignore]
         if len(dd) == 0:
             continue
-        char_old = wf_json.find(dd["root.name"]["old_value"])
-        char_new = wf_json.find(dd["root.name"]["new_value"])
-        dd["root.name"]["old_value"] = (dd["root.name"]["old_value"], char_old.name)
-        dd["root.name"]["new_value"] = (dd["root.name"]["new_value"], char_new.name)
+        char_old = wf_json.find(dd["root['name']"]["old_value"])
+        char_new = wf_json.find(dd["root['name']"]["new_value"])
+        dd["root['name']"]["old_value"] = (
+            dd["root['name']"]["old_value"],
+            char_old.name,
+        )
+        dd["root['name']"]["new_value"] = (
+            dd["root['name']"]["new_value"],
+            char_new.name,
+        )
         pprint.pprint(dd)
 
 
 def list_effect_indices(effect_type: EffectEnum):
     wf_json = WorldFlipperData("wf_data_json")
-    indices = set()
-    for char in wf_json.characters.values():
-        for ab_effects in char.abilities:
-            for ab in ab_effects:
-                if effect_type in ("main_effect", "main_condition"):
-                    if ab.effect_type != "0":
-                        continue
-                    if effect_type == "main_effect":
-                        indices.add(ab.main_effect_index)
-                    else:
-                        indices.add(ab.main_condition_index)
-                elif effect_type in ("continuous_effect", "continuous_condition"):
-                    if ab.effect_type != "1":
-                        continue
-                    if effect_type == "continuous_effect":
-                        indices.add(ab.continuous_effect_index)
-                    else:
-                        indices.add(ab.continuous_condition_index)
+    field, ab_type = _EFFECT_FIELDS[effect_type]
+    indices = wf_json.ability_index.values(field, ab_type)
     print(f"Total Main Effect indices: {len(indices)}")
     idx_l = list(indices)
     idx_l.sort()
@@ -108,38 +94,40 @@ def list_effect_indices(effect_type: EffectEnum):
 
 def find_effect(effect_type: EffectEnum, idx: str):
     wf_json = WorldFlipperData("wf_data_json")
+    field, ab_type = _EFFECT_FIELDS[effect_type]
     abilities = set()
-    for char in wf_json.characters.values():
-        for ab_effects in char.abilities:
-            for ab in ab_effects:
-                if effect_type == "main_condition":
-                    if ab.effect_type == "0" and ab.main_condition_index == idx:
-                        abilities.add((ab.name, char.name))
-                elif effect_type == "main_effect":
-                    if ab.effect_type == "0" and ab.main_effect_index == idx:
-                        abilities.add((ab.name, char.name))
-                elif effect_type == "continuous_condition":
-                    if ab.effect_type == "1" and ab.continuous_condition_index == idx:
-                        abilities.add((ab.name, char.name))
-                elif effect_type == "continuous_effect":
-                    if ab.effect_type == "1" and ab.continuous_effect_index == idx:
-                        abilities.add((ab.name, char.name))
+    for char, ab in wf_json.abilities_where(field, idx, ab_type):
+        abilities.add((ab.name, char.name))
     pprint.pprint(sorted(list(abilities), key=lambda t: t[0]))
 
 
-# noinspection PyBroadException
 def debug_unknown_effect_indices():
     wf_json = WorldFlipperData("wf_data_json")
+    table = wf_json.ability_table
+    effect_type_col = table.columns[INDEXED_FIELDS["effect_type"]]
+    main_code = table.code("0")
+    unknown_rows = []
+    for field, mapping, is_main in (
+        ("main_effect_index", main_effect_mapping, True),
+        ("continuous_effect_index", continuous_effect_mapping, False),
+    ):
+        known = {table.code(idx) for idx in mapping}
+        column = table.columns[INDEXED_FIELDS[field]]
+        for row in range(len(table)):
+            is_main_row = effect_type_col[row] == main_code
+            if is_main_row == is_main and column[row] not in known:
+                unknown_rows.append(row)
+
     unknown_idxs = set()
     unknowns = set()
-    for char in wf_json.characters.values():
-        for ab_effects in char.abilities:
-            for ab in ab_effects:
-                try:
-                    ab.effect_ui()
-                except:
-                    unknown_idxs.add(ab.main_effect_index)
-                    unknowns.add((char.name, ab.name, ab.main_effect_index))
+    for row in unknown_rows:
+        ab = WorldFlipperAbility(table, row, None)
+        # Main effect index is reported even for continuous abilities, same as it always has been.
+        idx = ab.main_effect_index
+        unknown_idxs.add(idx)
+        for owner in wf_json.ability_index.owners_of(row):
+            char = wf_json.characters[owner.char_id]
+            unknowns.add((char.name, ab.name, idx))
     unknown_l = list(unknowns)
     unknown_l.sort(key=lambda l: l[2])
     print(f"Not yet handled main effects: {len(unknown_idxs)}")
@@ -151,21 +139,13 @@ def test_abilities():
     wf = WorldFlipperData("wf_data_json")
     state = GameState()
     vagner = wf.find("Vagner")
-    state.set_member(vagner, CharPosition.LEADER, 0, level=80)
-    state.ability_lvs[0][:] = [6] * 6
-    state.ability_lvs[0][4] = 6
-    state.ability_lvs[0][5] = 1
+    state.party.set_member(vagner, CharPosition.LEADER, 0, level=80)
+    state.party.ability_lvs[0][:] = [6] * 6
+    state.party.ability_lvs[0][4] = 6
+    state.party.ability_lvs[0][5] = 1
     state.set_powerflips(3, 50)
 
-    dfs = []
-    for abs in vagner.abilities:
-        for ab in abs:
-            df = ab.eval_effect(vagner, state)
-            if df is not None:
-                dfs.append(df)
-    df = DamageFormulaContext(vagner)
-    for df2 in dfs:
-        df.combine(df2)
+    df = evaluate_party(state)[0]
     df.created_by_pf_action = True
     df.charge_level = 3
     print(df.calculate(state))
@@ -177,10 +157,10 @@ def test_abilities2():
     wf = WorldFlipperData("wf_data_json")
     state = GameState()
     ahanabi = wf.find("kunoichi_1anv")
-    state.set_member(ahanabi, CharPosition.LEADER, level=80)
-    state.ability_lvs[0][:] = [6] * 6
-    # state.ability_lvs[0][4] = 6
-    # state.ability_lvs[0][5] = 1
+    state.party.set_member(ahanabi, CharPosition.LEADER, level=80)
+    state.party.ability_lvs[0][:] = [6] * 6
+    # state.party.ability_lvs[0][4] = 6
+    # state.party.ability_lvs[0][5] = 1
     # state.set_powerflips(2, 50)
     state.enemy = Enemy()
     state.enemy.debuffs.append(
@@ -189,15 +169,7 @@ def test_abilities2():
         )
     )
 
-    dfs = []
-    for abs in ahanabi.abilities:
-        for ab in abs:
-            df = ab.eval_effect(ahanabi, state)
-            if df is not None:
-                dfs.append(df)
-    df = DamageFormulaContext(ahanabi)
-    for df2 in dfs:
-        df.combine(df2)
+    df = evaluate_party(state)[0]
     df.created_by_da = True
     print(df.calculate(state))
     print()
@@ -0,0 +1,97 @@
+from unittest import TestCase
+import random
+
+from wf import WorldFlipperData
+from wf.ability.index import INDEXED_FIELDS, AbilityIndex
+from wf.ability.table import ABILITY_ROW_LEN, AbilityTable
+
+
+class TestAbilityIndex(TestCase):
+    """
+    Index lookups over a table of made up rows, against scanning the whole table.
+    """
+
+    def setUp(self) -> None:
+        rng = random.Random(11)
+        values = ["", "(None)", "0", "1", "2", "3", "15", "54", "-1"]
+        self.table = AbilityTable()
+        for i in range(60):
+            rows = []
+            for _ in range(rng.randint(1, 3)):
+                row = [rng.choice(values) for _ in range(ABILITY_ROW_LEN)]
+                row[INDEXED_FIELDS["effect_type"]] = rng.choice(("0", "1"))
+                rows.append(row)
+            self.table.add(f"ability_{i}", rows)
+        self.index = AbilityIndex(self.table)
+        self.index.build()
+        self.values = values + ["not in the table"]
+
+    def _scan(self, col: int, value: str, effect_type=None) -> list[int]:
+        type_col = INDEXED_FIELDS["effect_type"]
+        return [
+            row
+            for row in range(len(self.table))
+            if self.table.value(col, row) == value
+            and (effect_type is None or self.table.value(type_col, row) == effect_type)
+        ]
+
+    def test_rows(self):
+        for field, col in INDEXED_FIELDS.items():
+            for value in self.values:
+                for effect_type in (None, "0", "1"):
+                    self.assertEqual(
+                        self._scan(col, value, effect_type),
+                        self.index.rows(field, value, effect_type),
+                        (field, value, effect_type),
+                    )
+
+    def test_values(self):
+        for field, col in INDEXED_FIELDS.items():
+            for effect_type in (None, "0", "1"):
+                expected = {
+                    value
+                    for value in self.values
+                    if self._scan(col, value, effect_type)
+                }
+                self.assertEqual(
+                    expected, self.index.values(field, effect_type), field
+                )
+
+
+class TestAbilitiesWhere(TestCase):
+    """
+    `WorldFlipperData.abilities_where` against walking every ability of every character.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def _every_ability(self):
+        for char in self.wf_data.characters.values():
+            for effects in char.abilities:
+                for ab in effects:
+                    yield char, ab
+
+    def test_matches_scan(self):
+        for field in INDEXED_FIELDS:
+            for effect_type in (None, "0", "1"):
+                expected = {}
+                for char, ab in self._every_ability():
+                    if effect_type is None or ab.effect_type == effect_type:
+                        expected.setdefault(getattr(ab, field), []).append((char, ab))
+                self.assertEqual(
+                    set(expected), self.wf_data.ability_index.values(field, effect_type)
+                )
+                for value, matches in expected.items():
+                    found = self.wf_data.abilities_where(field, value, effect_type)
+                    self.assertEqual(
+                        [(char.id, ab) for char, ab in matches],
+                        [(char.id, ab) for char, ab in found],
+                        (field, value, effect_type),
+                    )
+                    for (_, ab), (_, other) in zip(matches, found):
+                        self.assertIs(ab, other)
+                self.assertEqual(
+                    [], self.wf_data.abilities_where(field, "not a value", effect_type)
+                )
@@ -0,0 +1,104 @@
+from unittest import TestCase
+import pickle
+import random
+
+from wf.ability import WorldFlipperAbility
+from wf.ability.ability import _FIELD_COLUMNS, _FIELD_NAMES
+from wf.ability.table import ABILITY_ROW_LEN, MISSING, NUMERIC_COLUMNS, AbilityTable
+
+# Raw values that show up in numeric fields of ability.json but aren't numbers.
+_NOT_NUMBERS = ("", "(None)")
+
+
+def _rows(rng: random.Random, count: int) -> list[list[str]]:
+    values = ["", "(None)", "true", "false", "0", "1", "-5", "250000", "name", "いろは"]
+    rows = []
+    for _ in range(count):
+        row = [rng.choice(values) for _ in range(ABILITY_ROW_LEN)]
+        # Numeric columns are a mix of numbers and values that aren't.
+        for col in NUMERIC_COLUMNS:
+            row[col] = rng.choice(
+                _NOT_NUMBERS + (str(rng.randint(-(10**9), 10**9)), "0")
+            )
+        rows.append(row)
+    return rows
+
+
+class TestAbilityTable(TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(7)
+        self.rows_by_id = {
+            f"ability_{i}": _rows(rng, rng.randint(1, 4)) for i in range(40)
+        }
+        self.table = AbilityTable()
+        for ability_id, rows in self.rows_by_id.items():
+            self.table.add(ability_id, rows)
+
+    def _views(self, table: AbilityTable):
+        for ability_id, rows in self.rows_by_id.items():
+            start, end = table.rows_by_id[ability_id]
+            self.assertEqual(len(rows), end - start)
+            for row, raw in zip(range(start, end), rows):
+                self.assertEqual(ability_id, table.ability_id(row))
+                yield WorldFlipperAbility(table, row, None), raw
+
+    def assertRoundTrip(self, table: AbilityTable):
+        for ab, raw in self._views(table):
+            for col, name in enumerate(_FIELD_NAMES):
+                if name == "requires_main":
+                    self.assertEqual(raw[col] == "false", ab.requires_main)
+                else:
+                    self.assertEqual(raw[col], getattr(ab, name), name)
+
+    def test_fields(self):
+        self.assertNotIn("", _FIELD_NAMES)
+        self.assertRoundTrip(self.table)
+
+    def test_int_field(self):
+        checked_missing = 0
+        for ab, raw in self._views(self.table):
+            for col in NUMERIC_COLUMNS:
+                name = _FIELD_NAMES[col]
+                if raw[col] in _NOT_NUMBERS:
+                    self.assertEqual(MISSING, self.table.numbers[col][ab._row])
+                    with self.assertRaises(ValueError) as expected:
+                        int(getattr(ab, name))
+                    with self.assertRaises(ValueError) as actual:
+                        ab.int_field(name)
+                    self.assertEqual(str(expected.exception), str(actual.exception))
+                    checked_missing += 1
+                else:
+                    self.assertEqual(int(getattr(ab, name)), ab.int_field(name))
+        self.assertGreater(checked_missing, 0)
+
+    def test_pickle(self):
+        self.table.plans[0] = object()
+        table = pickle.loads(pickle.dumps(self.table))
+        self.assertEqual({}, table.plans)
+        self.assertEqual(self.table.strings, table.strings)
+        self.assertEqual(len(self.table), len(table))
+        self.assertRoundTrip(table)
+
+        ab = WorldFlipperAbility(self.table, 3, None)
+        other = pickle.loads(pickle.dumps(ab))
+        self.assertEqual(ab.to_dict(), other.to_dict())
+        self.assertEqual(ab, other)
+
+    def test_add(self):
+        ability_id = next(iter(self.rows_by_id))
+        rows = len(self.table)
+        self.assertEqual(
+            self.table.rows_by_id[ability_id], self.table.add(ability_id, [])
+        )
+        self.assertEqual(rows, len(self.table))
+        with self.assertRaises(RuntimeError):
+            self.table.add("too_short", [["1"] * (ABILITY_ROW_LEN - 1)])
+
+    def test_interned(self):
+        """
+        Every distinct string is only stored once.
+        """
+        self.assertEqual(len(set(self.table.strings)), len(self.table.strings))
+        for col in _FIELD_COLUMNS.values():
+            for value in self.table.distinct(col):
+                self.assertEqual(value, self.table.strings[self.table.code(value)])
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+import numpy as np
+
+from wf import WorldFlipperData
+from wf.dmg_distribution import HitDistribution, hit_distribution
+from wf.dmg_formula import DamageFormulaContext
+from wf.enum import CharPosition
+from wf.game_state import GameState
+
+
+class TestDamageDistribution(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_hit(self):
+        """
+        A hit ranges over the same damage as `calculate`, and its mean and variance are those of every
+        skill and damage roll.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        for source in range(3):
+            ctx = DamageFormulaContext(vagner)
+            ctx.created_by_da = source == 0
+            ctx.created_by_pf_action = source == 1
+            ctx.created_by_skill_action = source == 2
+            ctx.charge_level = 3
+            ctx.skill_multiplier = 3
+            ctx.attack_modifier = 0.4
+
+            dist = hit_distribution(ctx, state)
+            self.assertEqual(ctx.calculate(state), (dist.low, dist.high))
+            rolls = [0, 1, 2] if source == 2 else [0]
+            damage = [
+                ctx._calculate_internal(state, skill_rand, dmg_rand)
+                for skill_rand in rolls
+                for dmg_rand in np.linspace(-0.05, 0.05, 100_001)
+            ]
+            self.assertAlmostEqual(np.mean(damage), dist.mean, delta=1e-6 * dist.mean)
+            self.assertAlmostEqual(np.var(damage), dist.var, delta=1e-3 * dist.var)
+
+
+class TestTotalDamageDistribution(TestCase):
+    def test_total(self):
+        """
+        The total of two hits of uniform damage has a triangular distribution.
+        """
+        total = HitDistribution(((1.0, 900.0, 1100.0),)).total(2, bins=256)
+        self.assertEqual(2000, total.mean)
+        self.assertAlmostEqual(2 * 200**2 / 12, total.var)
+        for percentile in (1, 10, 50, 75, 99):
+            p = percentile / 100
+            if p <= 0.5:
+                expected = 1800 + 200 * np.sqrt(2 * p)
+            else:
+                expected = 2200 - 200 * np.sqrt(2 * (1 - p))
+            self.assertAlmostEqual(expected, total.percentile(percentile), delta=1)
+
+        total = HitDistribution(((0.5, 100.0, 110.0), (0.5, 200.0, 220.0))).total(500)
+        self.assertAlmostEqual(total.mean, np.sum(total.pmf * total.values))
+        self.assertAlmostEqual(1, np.sum(total.pmf))
+        low, mid, high = total.percentiles([2.5, 50, 97.5])
+        self.assertAlmostEqual(total.mean, mid, delta=0.01 * total.std)
+        self.assertAlmostEqual(1.96 * total.std, high - mid, delta=0.02 * total.std)
+        self.assertAlmostEqual(1.96 * total.std, mid - low, delta=0.02 * total.std)
@@ -0,0 +1,97 @@
+from unittest import TestCase
+import itertools
+
+import numpy as np
+
+from wf import WorldFlipperData
+from wf.dmg_formula import (
+    BOW_MASKS,
+    DamageFormulaContext,
+    bow_hits,
+    pf_mod_dmg_by_bow_mask,
+)
+from wf.dmg_formula_batch import DamageFormulaBatch
+from wf.enum import CharPosition, PowerFlip
+from wf.game_state import GameState
+
+
+class TestDamageFormulaBatch(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_matches_scalar(self):
+        """
+        Every combination of damage sources and formula branches comes out bit-for-bit the same as
+        calculating each context on its own.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        ahanabi = self.wf_data.find("kunoichi_1anv")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80, uncaps=4)
+        state.party.set_member(ahanabi, CharPosition.UNISON, 0, level=50, uncaps=1)
+
+        contexts = []
+        for source, weak, resist, charge_level, zeroed in itertools.product(
+            range(4), (False, True), (-1, 0, 0.35), range(4), (False, True)
+        ):
+            ctx = DamageFormulaContext(vagner, ahanabi)
+            ctx.created_by_da = source == 0
+            ctx.created_by_pf_action = source == 1
+            ctx.created_by_skill_action = source == 2
+            ctx.created_by_ad = source == 3
+            ctx.weak = weak
+            ctx.target_has_pinch = weak
+            ctx.total_resist = resist
+            ctx.charge_level = charge_level
+            ctx.attack_modifier = 0.4
+            ctx.stat_mod_pf_lv_damage_slayer = 0.2
+            ctx.skill_multiplier = 3
+            ctx.enables_combo_bonus = True
+            ctx.current_combos = 50
+            ctx.enables_range_bonus = not weak
+            ctx.distance = 12
+            ctx.stat_mod_additional_da_times = 2
+            if zeroed:
+                # Multiplying ints only ever results in 0, never -0.
+                ctx.stat_mod_sd_damage = -2
+                ctx.skill_slayer = -1
+                ctx.stat_mod_pf_damage = -1
+                ctx.stat_mod_da_damage = -3
+                ctx.stat_mod_da_resist_mult = 0
+            contexts.append(ctx)
+
+        low, high = DamageFormulaBatch.from_contexts(contexts, state).calculate()
+        for idx, ctx in enumerate(contexts):
+            expected_low, expected_high = ctx.calculate(state)
+            self.assertEqual(np.float64(expected_low).tobytes(), low[idx].tobytes())
+            self.assertEqual(np.float64(expected_high).tobytes(), high[idx].tobytes())
+
+    def test_bow_masks(self):
+        """
+        A power flip for every combination of bow hits comes out bit-for-bit the same as calculating each
+        combination on its own.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80, uncaps=4)
+        for charge_level in range(4):
+            ctx = DamageFormulaContext(vagner)
+            ctx.created_by_pf_action = True
+            ctx.charge_level = charge_level
+            ctx.stat_mod_pf_lv_damage_slayer = 0.2
+            low, high = DamageFormulaBatch.for_bow_masks(ctx, state).calculate()
+            for mask in range(BOW_MASKS):
+                ctx.bow_pf_hits = bow_hits(mask)
+                expected_low, expected_high = ctx.calculate(state)
+                self.assertEqual(
+                    np.float64(expected_low).tobytes(), low[mask].tobytes()
+                )
+                self.assertEqual(
+                    np.float64(expected_high).tobytes(), high[mask].tobytes()
+                )
+
+        bow = pf_mod_dmg_by_bow_mask(PowerFlip.BOW, 3)
+        self.assertEqual(0, bow[0])
+        self.assertEqual(2.5 * 4, bow[0b00100])
+        self.assertEqual(0.5 * 2 + 1 * 3 + 2.5 * 4 + 1 * 3 + 0.5 * 2, bow[0b11111])
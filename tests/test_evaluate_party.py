@@ -0,0 +1,93 @@
+from typing import Optional
+from unittest import TestCase
+
+from wf import WorldFlipperData
+from wf.ability import evaluate_party
+from wf.ability.memo import EvalMemo
+from wf.dmg_formula import DamageFormulaContext
+from wf.enemy import Enemy
+from wf.enum import CharPosition
+from wf.game_state import GameState
+from wf.party import unison_index
+from wf.status_effect import StatusEffect, StatusEffectKind
+
+
+class TestEvaluateParty(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def _state(self) -> GameState:
+        members = [
+            self.wf_data.find("fire_dragon"),
+            self.wf_data.find("kunoichi_1anv"),
+            self.wf_data.find("brown_fighter"),
+            self.wf_data.find("ice_witch_2anv"),
+        ]
+        for char in sorted(self.wf_data.characters.values(), key=lambda c: c.id):
+            if len(members) == 6:
+                break
+            if char not in members:
+                members.append(char)
+
+        state = GameState()
+        state.party.set_member(members[0], CharPosition.LEADER, level=80)
+        state.party.set_member(members[1], CharPosition.UNISON, 0, level=80)
+        state.party.set_member(members[2], CharPosition.MAIN, 1, level=80)
+        state.party.set_member(members[3], CharPosition.UNISON, 1, level=80)
+        state.party.set_member(members[4], CharPosition.MAIN, 2, level=80)
+        state.party.set_member(members[5], CharPosition.UNISON, 2, level=80)
+        for lvs in state.party.ability_lvs:
+            lvs[:] = [6] * 6
+        state.set_powerflips(3, 50)
+        state.set_skill_activations(2, 4)
+        state.combos_reached[30] = 2
+        state.enemy = Enemy()
+        state.enemy.debuffs.append(StatusEffect(StatusEffectKind.POISON, 0, 600))
+        return state
+
+    @staticmethod
+    def _by_hand(state: GameState) -> list[Optional[dict]]:
+        """
+        Evaluates every ability against every main unit one at a time and combines the results, as
+        `main.py` used to.
+        """
+        results = []
+        for col in range(3):
+            main = state.party[col * 2]
+            if main is None:
+                results.append(None)
+                continue
+            ctx = DamageFormulaContext(main, state.party[unison_index(col * 2)])
+            for member in state.party:
+                if member is None:
+                    continue
+                for effects in member.abilities:
+                    for ab in effects:
+                        df = ab.eval_effect(main, state)
+                        if df is not None:
+                            ctx.combine(df)
+            results.append(vars(ctx))
+        return results
+
+    @staticmethod
+    def _vars(results: list[Optional[DamageFormulaContext]]) -> list[Optional[dict]]:
+        return [None if ctx is None else vars(ctx) for ctx in results]
+
+    def test_matches_eval_effect(self):
+        state = self._state()
+        expected = self._by_hand(state)
+        self.assertEqual(expected, self._vars(evaluate_party(state)))
+
+        memo = EvalMemo()
+        for _ in range(2):
+            self.assertEqual(expected, self._vars(evaluate_party(state, memo)))
+        self.assertGreater(memo.hits, 0)
+
+    def test_empty_column(self):
+        state = self._state()
+        del state.party[4]
+        del state.party[5]
+        results = evaluate_party(state)
+        self.assertIsNone(results[2])
+        self.assertEqual(self._by_hand(state), self._vars(results))
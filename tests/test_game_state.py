@@ -0,0 +1,124 @@
+from unittest import TestCase
+import copy
+
+from wf import WorldFlipperData
+from wf.enemy import Enemy
+from wf.enum import CharPosition
+from wf.game_state import GameState
+from wf.status_effect import StatusEffect, StatusEffectKind
+
+
+class TestFork(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def setUp(self) -> None:
+        self.vagner = self.wf_data.find("fire_dragon")
+        self.ahanabi = self.wf_data.find("kunoichi_1anv")
+        self.sonia = self.wf_data.find("brown_fighter")
+        self.acipher = self.wf_data.find("ice_witch_2anv")
+
+        state = GameState()
+        state.party.set_member(self.vagner, CharPosition.LEADER, level=80)
+        state.party.set_member(self.ahanabi, CharPosition.UNISON, 0, level=70)
+        state.party.set_member(self.sonia, CharPosition.MAIN, 1, level=80)
+        state.party.ability_lvs[0] = [6] * 6
+        state.party.ability_lvs[2] = [1, 1, 1, 0, 0, 0]
+        state.skill_hits[0] = 3
+        state.set_skill_activations(2, 1)
+        state.set_powerflips(3, 10)
+        state.direct_hits[1] = 4
+        state.skill_charge[0] = 20
+        state.combos_reached[30] = 1
+        state.buffs[0].append(StatusEffect(StatusEffectKind.ATTACK, 0, 600))
+        state.enemy = Enemy()
+        state.enemy.debuffs.append(StatusEffect(StatusEffectKind.POISON, 0, 300))
+        self.state = state
+
+    @staticmethod
+    def _contents(state: GameState) -> dict:
+        """
+        Plain copy of everything in the state that a fork could get wrong.
+        """
+        contents = {}
+        for name, value in vars(state).items():
+            if name in ("party", "enemy", "buffs"):
+                continue
+            contents[name] = copy.deepcopy(value)
+        party = state.party
+        contents["party"] = (
+            list(party),
+            [party.index(char) for char in party if char is not None],
+            party.signature(),
+        )
+        contents["buffs"] = [list(buffs) for buffs in state.buffs]
+        contents["debuffs"] = list(state.enemy.debuffs)
+        return contents
+
+    def test_original_unchanged(self):
+        """
+        Changing every container of a fork leaves the original as it was.
+        """
+        state = self.state
+        before = self._contents(state)
+        forked = state.fork()
+        self.assertEqual(before, self._contents(forked))
+
+        forked.skill_hits[0] = 23
+        forked.total_skill_hits = 23
+        forked.set_skill_activations(0, 5)
+        forked.set_powerflips(1, 40)
+        forked.direct_hits[1] += 1
+        forked.skill_charge[0] = 100
+        forked.times_skill_reached_100[0] += 1
+        forked.skill_gauge_max[1] = 50
+        forked.ability_condition_active[0][4] = True
+        forked.combos_reached[30] = 4
+        forked.combos_reached[10] = 1
+        forked.buffs[0].append(StatusEffect(StatusEffectKind.ATTACK, 0, 60))
+        forked.buffs[1].append(StatusEffect(StatusEffectKind.ATTACK, 0, 60))
+        forked.buffs[0].expire(600)
+        forked.party.set_member(self.acipher, CharPosition.UNISON, 1, level=50)
+        forked.party.set_member(self.sonia, CharPosition.MAIN, 2)
+        forked.party.levels[0] = 1
+        forked.party.uncaps[0] = 4
+        forked.party.ability_lvs[0][1] = 1
+        forked.party.skill_lvs[0] = 5
+        forked.party.current_hp[0] = 1
+        forked.enemy.debuffs.append(StatusEffect(StatusEffectKind.SLOW, 0, 60))
+        forked.enemy.debuffs.expire(300)
+        forked.enemy.element = "fire"
+
+        self.assertNotEqual(before, self._contents(forked))
+        self.assertEqual(before, self._contents(state))
+        self.assertIsNone(state.enemy.element)
+        self.assertEqual(1, state.party.index(self.ahanabi))
+        self.assertEqual(2, state.party.index(self.sonia))
+        with self.assertRaises(ValueError):
+            state.party.index(self.acipher)
+        self.assertEqual(4, forked.party.index(self.sonia))
+
+    def test_changing_original(self):
+        """
+        Changing the original after forking doesn't show up in the fork either.
+        """
+        forked = self.state.fork()
+        before = self._contents(forked)
+        self.state.skill_hits[1] = 2
+        self.state.party.set_member(self.acipher, CharPosition.LEADER)
+        self.state.buffs[2].append(StatusEffect(StatusEffectKind.ATTACK, 0, 60))
+        self.state.enemy.debuffs.append(StatusEffect(StatusEffectKind.SLOW, 0, 60))
+        self.assertEqual(before, self._contents(forked))
+
+    def test_same_as_deepcopy(self):
+        """
+        A fork starts out the same as a deep copy, including lists that are shared within the state.
+        """
+        forked = self.state.fork()
+        copied = copy.deepcopy(self.state)
+        self.assertEqual(self._contents(copied), self._contents(forked))
+        for state in (forked, copied):
+            state.ability_condition_active[0][4] = True
+            self.assertTrue(state.ability_condition_active[5][4])
+        self.assertFalse(self.state.ability_condition_active[0][4])
@@ -0,0 +1,157 @@
+from unittest import TestCase
+
+from wf import WorldFlipperData
+from wf.ability.memo import EvalMemo, StateKey, freeze
+from wf.enum import CharPosition
+from wf.game_state import GameState
+from wf.status_effect import StatusEffect, StatusEffectKind
+
+# Plain fields of the state that some abilities don't read, along with a different value for each.
+_UNREAD_FIELDS = {
+    "total_ball_flips": 50,
+    "num_multiballs": 3,
+    "fever_active": True,
+    "pierce_active": True,
+}
+
+
+# Changes to fields that abilities commonly read.
+_READ_CHANGES = {
+    "powerflips_by_lv": lambda state: state.set_powerflips(1, 40),
+    "total_powerflips": lambda state: state.set_powerflips(1, 40),
+    "skill_activations": lambda state: state.set_skill_activations(0, 5),
+    "combos_reached": lambda state: state.combos_reached.update({30: 3}),
+    "num_multiballs": lambda state: setattr(state, "num_multiballs", 3),
+}
+
+
+def _vars(ctx):
+    return None if ctx is None else vars(ctx)
+
+
+class TestEvalMemo(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def setUp(self) -> None:
+        self.vagner = self.wf_data.find("fire_dragon")
+        self.sonia = self.wf_data.find("brown_fighter")
+        self.state = GameState()
+        self.state.party.set_member(self.vagner, CharPosition.LEADER, level=80)
+        self.state.party.set_member(self.sonia, CharPosition.UNISON, 0, level=80)
+        self.state.party.ability_lvs[0] = [6] * 6
+        self.state.party.ability_lvs[1] = [6] * 6
+
+    def _abilities(self):
+        for member in (self.vagner, self.sonia):
+            for effects in member.abilities:
+                for ab in effects:
+                    yield ab
+
+    def test_read_field_changed(self):
+        """
+        Changing a field an ability reads misses the cache and gives the result for the new state.
+        """
+        checked = 0
+        for ab in self._abilities():
+            for field in ab.plan().reads:
+                if field not in _READ_CHANGES:
+                    continue
+                memo = EvalMemo()
+                state = self.state.fork()
+                memo.eval_effect(ab, self.vagner, state)
+                _READ_CHANGES[field](state)
+                ctx = memo.eval_effect(ab, self.vagner, state)
+                self.assertEqual((0, 2), (memo.hits, memo.misses), field)
+                expected = ab.eval_effect(self.vagner, state)
+                self.assertEqual(_vars(expected), _vars(ctx), field)
+                checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_unread_field_changed(self):
+        """
+        Changing a field an ability doesn't read hits the cache.
+        """
+        checked = 0
+        for ab in self._abilities():
+            reads = ab.plan().reads
+            unread = [f for f in _UNREAD_FIELDS if f not in reads]
+            if not unread:
+                continue
+            memo = EvalMemo()
+            state = self.state.fork()
+            expected = memo.eval_effect(ab, self.vagner, state)
+            for field in unread:
+                setattr(state, field, _UNREAD_FIELDS[field])
+            ctx = memo.eval_effect(ab, self.vagner, state)
+            self.assertEqual((1, 1), (memo.hits, memo.misses))
+            self.assertEqual(_vars(expected), _vars(ctx))
+            checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_party_changed(self):
+        """
+        Changing levels, ability levels or HP changes the party's signature, which misses the cache for
+        every ability.
+        """
+
+        def level(state):
+            state.party.levels[0] = 70
+
+        def ability_lv(state):
+            state.party.ability_lvs[0][1] = 3
+
+        def hp(state):
+            state.party.current_hp[0] = 1
+
+        ab = next(self._abilities())
+        for change in (level, ability_lv, hp):
+            with self.subTest(change.__name__):
+                memo = EvalMemo()
+                state = self.state.fork()
+                signature = state.party.signature()
+                memo.eval_effect(ab, self.vagner, state)
+                change(state)
+                self.assertNotEqual(signature, state.party.signature())
+                memo.eval_effect(ab, self.vagner, state)
+                self.assertEqual((0, 2), (memo.hits, memo.misses))
+
+    def test_lru_eviction(self):
+        """
+        The least recently used result is dropped once there are more than `maxsize`.
+        """
+        memo = EvalMemo(maxsize=2)
+        first, second, third = list(self._abilities())[:3]
+        key = StateKey(self.state)
+        memo.lookup(first, self.vagner, self.state, key)
+        memo.lookup(second, self.vagner, self.state, key)
+        # Using the first makes the second the least recently used.
+        memo.lookup(first, self.vagner, self.state, key)
+        memo.lookup(third, self.vagner, self.state, key)
+        self.assertEqual(2, len(memo))
+        self.assertEqual((1, 3), (memo.hits, memo.misses))
+
+        memo.lookup(first, self.vagner, self.state, key)
+        self.assertEqual((2, 3), (memo.hits, memo.misses))
+        memo.lookup(second, self.vagner, self.state, key)
+        self.assertEqual((2, 4), (memo.hits, memo.misses))
+        self.assertEqual(2, len(memo))
+
+
+class TestFreeze(TestCase):
+    def test_hashable(self):
+        debuff = StatusEffect(StatusEffectKind.POISON, 0, 10)
+        state = GameState()
+        state.combos_reached = {30: 2, 10: 1}
+        state.buffs[0].append(debuff)
+        for field in ("combos_reached", "buffs", "powerflips_by_lv"):
+            hash(freeze(getattr(state, field)))
+
+    def test_equal_values(self):
+        a = StatusEffect(StatusEffectKind.POISON, 0, 10)
+        b = StatusEffect(StatusEffectKind.POISON, 0, 10)
+        c = StatusEffect(StatusEffectKind.SLOW, 0, 10)
+        self.assertEqual(freeze([a]), freeze([b]))
+        self.assertNotEqual(freeze([a]), freeze([c]))
+        self.assertEqual(freeze({1: 2, 3: 4}), freeze({3: 4, 1: 2}))
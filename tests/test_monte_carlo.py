@@ -0,0 +1,117 @@
+from unittest import TestCase
+
+import numpy as np
+
+from wf import WorldFlipperData
+from wf.effect.conditions import (
+    AttackBuffActiveCondition,
+    AttackBuffsOnSelfCondition,
+    BuffActiveCondition,
+    OnCountDirectHitsCondition,
+    OnSkillGaugeReach100MainCondition,
+)
+from wf.enum import CharPosition, DamageSource
+from wf.game_state import GameState
+from wf.monte_carlo import FightProfile, monte_carlo
+from wf.simulation import BattleSimulation
+from wf.timeline import EventKind, WorldFlipperTimeline
+
+
+class TestMonteCarlo(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_reproducible(self):
+        """
+        Runs come out the same for the same seed, no matter how many workers they're split between.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        sonia = self.wf_data.find("brown_fighter")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        state.party.set_member(sonia, CharPosition.UNISON, 0, level=80)
+        state.party.ability_lvs[0] = [6] * 6
+        state.party.ability_lvs[1] = [6] * 6
+        profile = FightProfile(seconds=30)
+
+        single = monte_carlo(state, 20, profile, seed=7, workers=1)
+        pooled = monte_carlo(state, 20, profile, seed=7, workers=2, chunk_size=3)
+        other = monte_carlo(state, 20, profile, seed=8, workers=1)
+        for source in DamageSource:
+            np.testing.assert_array_equal(single.damage[source], pooled.damage[source])
+        self.assertFalse(np.array_equal(single.total, other.total))
+
+        stats = single.stats()
+        self.assertAlmostEqual(float(single.total.mean()), stats.mean)
+        self.assertLessEqual(stats.percentiles[5], stats.percentiles[95])
+        self.assertLess(stats.ci_low, stats.mean)
+        self.assertGreater(stats.ci_high, stats.mean)
+
+    def test_skill_charge(self):
+        """
+        The simulated state's skill charge follows the charge sampled for the timeline: every direct hit
+        adds to it, and every skill activation uses up 100 of it.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        sonia = self.wf_data.find("brown_fighter")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        state.party.set_member(sonia, CharPosition.MAIN, 2, level=80)
+        profile = FightProfile(seconds=60, skill_charge_per_hit=7)
+        events = profile.sample(np.random.default_rng(3), [0, 2])
+
+        timeline = WorldFlipperTimeline()
+        timeline.add_events(events)
+        sim = BattleSimulation(state, timeline)
+        hits = 0
+        activations = [0, 0, 0]
+        while len(timeline) > 0:
+            event = sim.step()
+            if event.kind == EventKind.DIRECT_HIT:
+                hits += 1
+            elif event.kind == EventKind.SKILL_ACTIVATED:
+                activations[event.skill_unit] += 1
+            for col in (0, 2):
+                self.assertGreaterEqual(sim.state.skill_charge[col], 0)
+            self.assertEqual(0, sim.state.skill_charge[1])
+
+        self.assertGreater(activations[0], 0)
+        for col in (0, 2):
+            self.assertEqual(hits * 7 // 100, activations[col])
+            self.assertEqual(hits * 7 % 100, sim.state.skill_charge[col])
+            self.assertLess(sim.state.skill_charge[col], 100)
+
+    def test_column_conditions(self):
+        """
+        Units in every column can have abilities with conditions on the state of their own column (skill
+        gauge, direct hits, buffs).
+        """
+        conditions = {
+            OnSkillGaugeReach100MainCondition,
+            OnCountDirectHitsCondition,
+            BuffActiveCondition,
+            AttackBuffActiveCondition,
+            AttackBuffsOnSelfCondition,
+        }
+        owners = {}
+        for char in sorted(self.wf_data.characters.values(), key=lambda c: c.id):
+            for effects in char.abilities:
+                for ab in effects:
+                    owners.setdefault(ab.plan().condition_cls, char)
+        vagner = self.wf_data.find("fire_dragon")
+        sonia = self.wf_data.find("brown_fighter")
+        profile = FightProfile(seconds=30, skill_charge_per_hit=20)
+        checked = 0
+        for cls in conditions & set(owners):
+            owner = owners[cls]
+            leader = sonia if owner is vagner else vagner
+            for col in (1, 2):
+                state = GameState()
+                state.party.set_member(leader, CharPosition.LEADER, level=80)
+                state.party.set_member(owner, CharPosition.MAIN, col, level=80)
+                state.party.ability_lvs[col * 2] = [6] * 6
+                result = monte_carlo(state, 2, profile, seed=5, workers=1)
+                self.assertEqual(2, len(result.total), cls.__name__)
+                checked += 1
+        self.assertGreater(checked, 0)
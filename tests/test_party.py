@@ -0,0 +1,106 @@
+from unittest import TestCase
+
+from wf import WorldFlipperData
+from wf.enum import CharPosition
+from wf.party import Party
+
+
+def _scan_index(party: Party, char) -> int:
+    return list(party).index(char)
+
+
+def _scan_ability_index(party: Party, ability) -> tuple[int, int]:
+    for char_idx, char in enumerate(party):
+        if char is None:
+            continue
+        for abs_idx, effects in enumerate(char.abilities):
+            for ab in effects:
+                if ab == ability:
+                    return char_idx, abs_idx
+    return -1, -1
+
+
+class TestParty(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def setUp(self) -> None:
+        self.roster = [
+            self.wf_data.find("fire_dragon"),
+            self.wf_data.find("kunoichi_1anv"),
+            self.wf_data.find("brown_fighter"),
+            self.wf_data.find("ice_witch_2anv"),
+        ]
+        for char in sorted(self.wf_data.characters.values(), key=lambda c: c.id):
+            if len(self.roster) == 8:
+                break
+            if char not in self.roster:
+                self.roster.append(char)
+
+    def assertMatchesScan(self, party: Party, step: str):
+        """
+        Every lookup gives the same answer as scanning the party for it.
+        """
+        for char in self.roster:
+            if char in list(party):
+                idx = _scan_index(party, char)
+                self.assertEqual(idx, party.index(char), step)
+                self.assertEqual(party.position(idx), party.position(char), step)
+            else:
+                with self.assertRaises(ValueError, msg=step):
+                    party.index(char)
+                self.assertIsNone(party.position(char), step)
+            for effects in char.abilities:
+                for ab in effects:
+                    self.assertEqual(
+                        _scan_ability_index(party, ab), party.ability_index(ab), step
+                    )
+        if None in list(party):
+            self.assertEqual(_scan_index(party, None), party.index(None), step)
+
+    def test_changes(self):
+        r = self.roster
+        party = Party()
+        forks = []
+        steps = [
+            ("leader", lambda p: p.set_member(r[0], CharPosition.LEADER)),
+            ("unison 0", lambda p: p.set_member(r[1], CharPosition.UNISON, 0)),
+            ("main 1", lambda p: p.set_member(r[2], CharPosition.MAIN, 1)),
+            ("unison 1", lambda p: p.set_member(r[3], CharPosition.UNISON, 1)),
+            ("main 2", lambda p: p.set_member(r[4], CharPosition.MAIN, 2)),
+            ("unison 2", lambda p: p.set_member(r[5], CharPosition.UNISON, 2)),
+            ("fork", lambda p: forks.append(p.fork())),
+            ("replace main 1", lambda p: p.set_member(r[6], CharPosition.MAIN, 1)),
+            ("replace leader", lambda p: p.set_member(r[7], CharPosition.LEADER)),
+            ("move to unison 2", lambda p: p.set_member(r[6], CharPosition.UNISON, 2)),
+            ("swap", lambda p: p.swap(0, 5)),
+            ("swap back", lambda p: p.swap(5, 0)),
+            ("swap same column", lambda p: p.swap(2, 3)),
+            ("remove unison 0", lambda p: p.set_member(None, CharPosition.UNISON, 0)),
+            ("del main 2", lambda p: p.__delitem__(4)),
+            ("set item", lambda p: p.__setitem__(1, r[2])),
+            ("set removed", lambda p: p.__setitem__(4, r[0])),
+            ("remove leader", lambda p: p.set_member(None, CharPosition.LEADER)),
+        ]
+        for step, change in steps:
+            change(party)
+            self.assertMatchesScan(party, step)
+
+        # The fork was made with all six slots filled and must not have seen any of the later changes.
+        self.assertEqual(r[:6], list(forks[0]))
+        self.assertMatchesScan(forks[0], "fork")
+        for step, change in steps[7:]:
+            change(forks[0])
+            self.assertMatchesScan(forks[0], f"fork: {step}")
+        self.assertEqual(list(party), list(forks[0]))
+
+    def test_remove(self):
+        party = Party()
+        party.set_member(self.roster[0], CharPosition.LEADER)
+        party.set_member(self.roster[1], CharPosition.UNISON, 0)
+        del party[1]
+        self.assertEqual([self.roster[0]] + [None] * 5, list(party))
+        party[1] = self.roster[1]
+        self.assertEqual(self.roster[:2] + [None] * 4, list(party))
+        self.assertMatchesScan(party, "remove")
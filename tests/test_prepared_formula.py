@@ -0,0 +1,40 @@
+from unittest import TestCase
+import itertools
+
+from wf import WorldFlipperData
+from wf.dmg_formula import DamageFormulaContext, PreparedFormula
+from wf.enum import CharPosition
+from wf.game_state import GameState
+
+
+class TestPreparedFormula(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_matches_calculate(self):
+        """
+        Damage with the unit's attack prepared ahead of time is bit-for-bit the same as calculating it
+        from the party, for every damage source.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        ahanabi = self.wf_data.find("kunoichi_1anv")
+        sonia = self.wf_data.find("brown_fighter")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80, uncaps=4)
+        state.party.set_member(ahanabi, CharPosition.UNISON, 0, level=50, uncaps=1)
+        state.party.set_member(sonia, CharPosition.MAIN, 1, level=100, uncaps=2)
+
+        for slot in (0, 2):
+            formula = PreparedFormula(state, slot)
+            for source, charge_level in itertools.product(range(4), range(4)):
+                ctx = DamageFormulaContext(formula.char, formula.unison)
+                ctx.created_by_da = source == 0
+                ctx.created_by_pf_action = source == 1
+                ctx.created_by_skill_action = source == 2
+                ctx.created_by_ad = source == 3
+                ctx.charge_level = charge_level
+                ctx.attack_modifier = 0.4
+                ctx.total_resist = 0.35
+                ctx.skill_multiplier = 3
+                self.assertEqual(ctx.calculate(state), formula.calculate(ctx))
@@ -0,0 +1,247 @@
+from unittest import TestCase
+
+from wf import WorldFlipperData
+from wf.ability import evaluate_party
+from wf.effect.conditions import (
+    AttackBuffActiveCondition,
+    AttackBuffsOnSelfCondition,
+    BuffActiveCondition,
+    OnCountDirectHitsCondition,
+    OnSkillGaugeReach100MainCondition,
+)
+from wf.effect.main_mapping import main_condition_mapping, main_effect_mapping
+from wf.effect.continuous_mapping import (
+    continuous_condition_mapping,
+    continuous_effect_mapping,
+)
+from wf.enemy import Enemy
+from wf.enum import CharPosition, DamageSource
+from wf.game_state import GameState
+from wf.simulation import BattleSimulation, _EVENT_WRITES
+from wf.status_effect import StatusEffect, StatusEffectKind
+from wf.timeline import WorldFlipperTimeline, Event, EventKind
+
+
+def _event(kind: EventKind, time: int, **kwargs) -> Event:
+    event = Event(kind)
+    event.time_activated = time
+    for name, value in kwargs.items():
+        setattr(event, name, value)
+    return event
+
+
+class TestBattleSimulation(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_matches_evaluating_every_hit(self):
+        """
+        Only evaluating abilities again when what they read changes gives the same results as evaluating
+        the whole party for every hit.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        sonia = self.wf_data.find("brown_fighter")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        state.party.set_member(sonia, CharPosition.UNISON, 0, level=80)
+        state.party.ability_lvs[0] = [6] * 6
+        state.party.ability_lvs[1] = [6] * 6
+
+        timeline = WorldFlipperTimeline()
+        for tick in range(0, 60 * 60, 20):
+            timeline.add_event(_event(EventKind.BALL_FLIP, tick))
+            timeline.add_event(_event(EventKind.DIRECT_HIT, tick, skill_unit=0))
+            if tick % 300 == 0:
+                timeline.add_event(
+                    _event(EventKind.POWER_FLIP, tick, powerflip_level=3)
+                )
+                timeline.add_event(
+                    _event(EventKind.POWER_FLIP_HIT, tick, powerflip_level=3)
+                )
+            if tick % 600 == 0:
+                timeline.add_event(_event(EventKind.COMBO_REACHED, tick, count=30))
+
+        sim = BattleSimulation(state, timeline)
+        while len(timeline) > 0:
+            event = sim.step()
+            if event.kind in (EventKind.DIRECT_HIT, EventKind.POWER_FLIP_HIT):
+                expected = evaluate_party(sim.state)[0]
+                self.assertEqual(vars(expected), vars(sim.contexts()[0]))
+
+        self.assertEqual(60 * 60 // 20, sim.state.total_direct_hits)
+        self.assertEqual(12, sim.state.total_powerflips)
+        for source in (DamageSource.DIRECT_ATTACK, DamageSource.POWER_FLIP):
+            hits = [hit for hit in sim.log if hit.source == source]
+            self.assertAlmostEqual(sum(hit.low for hit in hits), sim.low[source])
+            self.assertAlmostEqual(sum(hit.high for hit in hits), sim.high[source])
+
+    def test_status_effects(self):
+        """
+        Buffs and debuffs are gained and run out as the fight goes on, and abilities that care about them
+        are evaluated again when they do.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        state.party.ability_lvs[0] = [6] * 6
+        state.enemy = Enemy()
+
+        attack = StatusEffect(StatusEffectKind.ATTACK, 30, 120, percent_mod=10)
+        poison = StatusEffect(StatusEffectKind.POISON, 60, 300)
+        timeline = WorldFlipperTimeline()
+        timeline.add_event(
+            _event(EventKind.GAINED_BUFF, 30, skill_unit=0, status_effect=attack)
+        )
+        timeline.add_event(_event(EventKind.GAINED_DEBUFF, 60, status_effect=poison))
+        for tick in range(0, 600, 15):
+            timeline.add_event(_event(EventKind.DIRECT_HIT, tick, skill_unit=0))
+
+        sim = BattleSimulation(state, timeline)
+        while len(timeline) > 0:
+            event = sim.step()
+            time = event.time_activated
+            poisoned = StatusEffectKind.POISON in sim.state.enemy.debuffs
+            self.assertEqual(30 <= time < 150, attack in list(sim.state.buffs[0]))
+            self.assertEqual(60 <= time < 360, poisoned)
+            if event.kind == EventKind.DIRECT_HIT:
+                expected = evaluate_party(sim.state)[0]
+                self.assertEqual(vars(expected), vars(sim.contexts()[0]))
+        self.assertEqual(0, len(state.enemy.debuffs))
+
+    def _sim(self, *events: Event) -> BattleSimulation:
+        state = GameState()
+        vagner = self.wf_data.find("fire_dragon")
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        timeline = WorldFlipperTimeline()
+        for event in events:
+            timeline.add_event(event)
+        return BattleSimulation(state, timeline)
+
+    def test_power_flip_without_level(self):
+        sim = self._sim(_event(EventKind.POWER_FLIP, 0))
+        with self.assertRaises(ValueError):
+            sim.run()
+        self.assertEqual([0, 0, 0], sim.state.powerflips_by_lv)
+
+        sim = self._sim(_event(EventKind.POWER_FLIP, 0, powerflip_level=2))
+        sim.run()
+        self.assertEqual([0, 1, 0], sim.state.powerflips_by_lv)
+
+    def test_hit_empty_column(self):
+        """
+        Hits of a column without a unit in it deal no damage, and hits of columns that don't exist are
+        rejected.
+        """
+        sim = self._sim(
+            _event(EventKind.DIRECT_HIT, 0, skill_unit=1),
+            _event(EventKind.SKILL_HIT, 0, skill_unit=2),
+            _event(EventKind.DIRECT_HIT, 10, skill_unit=0),
+        )
+        sim.run()
+        self.assertEqual([0], [hit.column for hit in sim.log])
+
+        sim = self._sim(_event(EventKind.DIRECT_HIT, 0, skill_unit=3))
+        with self.assertRaises(ValueError):
+            sim.run()
+
+    def _column_fight(self, mains: dict, events_col: int) -> BattleSimulation:
+        """
+        Fight with the main units of each column in `mains` (column 0 being the leader), where every direct
+        hit, skill gauge and buff is in column `events_col`. Checks the results against evaluating the
+        whole party along the way.
+        """
+        state = GameState()
+        for col, main in mains.items():
+            if col == 0:
+                state.party.set_member(main, CharPosition.LEADER, level=80)
+            else:
+                state.party.set_member(main, CharPosition.MAIN, col, level=80)
+            state.party.ability_lvs[col * 2] = [6] * 6
+
+        attack = StatusEffect(StatusEffectKind.ATTACK, 0, 6000, percent_mod=10)
+        timeline = WorldFlipperTimeline()
+        timeline.add_event(
+            _event(
+                EventKind.GAINED_BUFF, 0, skill_unit=events_col, status_effect=attack
+            )
+        )
+        for tick in range(0, 3000, 10):
+            timeline.add_event(
+                _event(EventKind.DIRECT_HIT, tick, skill_unit=events_col)
+            )
+            if tick % 300 == 0:
+                timeline.add_event(
+                    _event(EventKind.SKILL_CHARGE_100, tick, skill_unit=events_col)
+                )
+
+        sim = BattleSimulation(state, timeline)
+        while len(timeline) > 0:
+            event = sim.step()
+            if event.kind == EventKind.DIRECT_HIT and event.time_activated % 100 == 0:
+                expected = evaluate_party(sim.state)
+                for ctx, other in zip(expected, sim.contexts()):
+                    self.assertEqual(
+                        None if ctx is None else vars(ctx),
+                        None if other is None else vars(other),
+                    )
+        self.assertEqual(300, sim.state.direct_hits[events_col])
+        self.assertEqual(10, sim.state.times_skill_reached_100[events_col])
+        self.assertIn(attack, list(sim.state.buffs[events_col]))
+        return sim
+
+    def test_column_counters(self):
+        """
+        Direct hits, skill gauges and buffs of a column only count towards the conditions of the unit in
+        that column, which come out the same in every column.
+        """
+        conditions = {
+            OnSkillGaugeReach100MainCondition,
+            OnCountDirectHitsCondition,
+            BuffActiveCondition,
+            AttackBuffActiveCondition,
+            AttackBuffsOnSelfCondition,
+        }
+        vagner = self.wf_data.find("fire_dragon")
+        sonia = self.wf_data.find("brown_fighter")
+
+        def result(ab, char, mains: dict, events_col: int) -> tuple[bool, int]:
+            sim = self._column_fight(mains, events_col)
+            condition = ab.condition(char, sim.state)
+            passed = condition.should_run() and condition.eval()
+            return passed, condition.multiplier
+
+        changed = 0
+        for char in sorted(self.wf_data.characters.values(), key=lambda c: c.id):
+            other = sonia if char is vagner else vagner
+            for effects in char.abilities:
+                for ab in effects:
+                    plan = ab.plan()
+                    _, _, target, _ = plan.condition_info
+                    if plan.condition_cls not in conditions or target != "0":
+                        continue
+                    as_leader = result(ab, char, {0: char, 1: other}, 0)
+                    for col in (1, 2):
+                        mains = {0: other, col: char}
+                        own = result(ab, char, mains, col)
+                        self.assertEqual(as_leader, own, (char.id, col))
+                        if own != result(ab, char, mains, 0):
+                            changed += 1
+        self.assertGreater(changed, 0)
+
+class TestListensTo(TestCase):
+    def test_listens_to_everything_read(self):
+        """
+        Every condition and effect listens to every event that changes something it reads, otherwise
+        simulations would keep using its stale results.
+        """
+        classes = list(main_condition_mapping.values())
+        classes += continuous_condition_mapping.values()
+        for effects in main_effect_mapping.values():
+            classes += effects
+        for effects in continuous_effect_mapping.values():
+            classes += effects
+        for cls in classes:
+            for kind, writes in _EVENT_WRITES.items():
+                if not set(writes).isdisjoint(cls.reads):
+                    self.assertIn(kind, cls.listens_to, cls.__name__)
@@ -0,0 +1,222 @@
+from unittest import TestCase
+import os
+import pickle
+import shutil
+import tempfile
+
+from wf import WorldFlipperData
+from wf.snapshot import (
+    SNAPSHOT_FILE_NAME,
+    SNAPSHOT_VERSION,
+    build_manifest,
+    load_snapshot,
+    write_snapshot,
+)
+from wf.wf import _SOURCE_FILES
+
+
+class TestSnapshot(TestCase):
+    """
+    The snapshot functions on their own, over a data directory of small made up files.
+    """
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+        for name in _SOURCE_FILES:
+            path = os.path.join(self.data_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f'{{"file": "{name}"}}')
+        self.snapshot_path = os.path.join(self.data_dir, SNAPSHOT_FILE_NAME)
+        self.payload = {"characters": {"1": "a", "2": "b"}, "version": 1}
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _write(self, **kwargs) -> bool:
+        return write_snapshot(
+            self.snapshot_path, self.data_dir, _SOURCE_FILES, self.payload, **kwargs
+        )
+
+    def _load(self):
+        return load_snapshot(self.snapshot_path, self.data_dir, _SOURCE_FILES)
+
+    def _leftovers(self) -> list[str]:
+        return [f for f in os.listdir(self.data_dir) if f.endswith(".tmp")]
+
+    def test_round_trip(self):
+        self.assertIsNone(self._load())
+        self.assertTrue(self._write())
+        self.assertEqual(self.payload, self._load())
+        self.assertEqual([], self._leftovers())
+
+    def test_edited(self):
+        """
+        Changing the content of any of the source files invalidates the snapshot, whether or not its size
+        changes.
+        """
+        for name in _SOURCE_FILES:
+            with self.subTest(name):
+                self.assertTrue(self._write())
+                path = os.path.join(self.data_dir, name)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(" ")
+                self.assertIsNone(self._load())
+
+                self.assertTrue(self._write())
+                with open(path, "r+", encoding="utf-8") as f:
+                    content = f.read()
+                    f.seek(0)
+                    f.write(content.replace("file", "FILE"))
+                st = os.stat(path)
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+                self.assertIsNone(self._load())
+
+    def test_touched(self):
+        """
+        A file that was only touched is compared by content, so the snapshot stays valid.
+        """
+        for name in _SOURCE_FILES:
+            with self.subTest(name):
+                self.assertTrue(self._write())
+                path = os.path.join(self.data_dir, name)
+                st = os.stat(path)
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+                self.assertEqual(self.payload, self._load())
+
+    def test_missing_file(self):
+        self.assertTrue(self._write())
+        os.remove(os.path.join(self.data_dir, _SOURCE_FILES[0]))
+        self.assertIsNone(self._load())
+
+    def test_version_mismatch(self):
+        manifest = build_manifest(self.data_dir, _SOURCE_FILES)
+        manifest["version"] = SNAPSHOT_VERSION - 1
+        self.assertTrue(self._write(manifest=manifest))
+        self.assertIsNone(self._load())
+
+    def test_malformed_manifest(self):
+        """
+        A manifest of the current version that isn't laid out like one is rebuilt instead of loaded.
+        """
+        name = _SOURCE_FILES[0]
+        changes = [
+            lambda files: files.update({name: "not a dict"}),
+            lambda files: files.update({name: None}),
+            lambda files: files[name].pop("size"),
+            lambda files: files[name].pop("mtime_ns"),
+            lambda files: files[name].update({"size": "not a size"}),
+        ]
+        for i, change in enumerate(changes):
+            with self.subTest(i):
+                manifest = build_manifest(self.data_dir, _SOURCE_FILES)
+                change(manifest["files"])
+                self.assertTrue(self._write(manifest=manifest))
+                self.assertIsNone(self._load())
+
+        for files in ("not a dict", None, [("a", 1)]):
+            with self.subTest(files):
+                manifest = {"version": SNAPSHOT_VERSION, "files": files}
+                self.assertTrue(self._write(manifest=manifest))
+                self.assertIsNone(self._load())
+
+    def test_corrupt(self):
+        self.assertTrue(self._write())
+        with open(self.snapshot_path, "rb") as f:
+            content = f.read()
+        for broken in (b"", b"not a pickle", content[: len(content) // 2]):
+            with open(self.snapshot_path, "wb") as f:
+                f.write(broken)
+            self.assertIsNone(self._load())
+
+    def test_atomic(self):
+        """
+        A write that fails part of the way through leaves neither a partial file nor a changed snapshot.
+        """
+        self.assertTrue(self._write())
+        with open(self.snapshot_path, "rb") as f:
+            before = f.read()
+
+        self.payload = {"version": 2, "unpicklable": lambda: None}
+        self.assertFalse(self._write())
+        self.assertEqual([], self._leftovers())
+        with open(self.snapshot_path, "rb") as f:
+            self.assertEqual(before, f.read())
+        self.assertEqual("a", self._load()["characters"]["1"])
+
+        missing_dir = os.path.join(self.data_dir, "missing", SNAPSHOT_FILE_NAME)
+        self.assertFalse(
+            write_snapshot(missing_dir, self.data_dir, _SOURCE_FILES, self.payload)
+        )
+
+
+class TestWorldFlipperDataSnapshot(TestCase):
+    """
+    Building the database through a snapshot, over a copy of the real data.
+    """
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+        for name in _SOURCE_FILES:
+            path = os.path.join(self.data_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            shutil.copyfile(os.path.join("wf_data_json", name), path)
+        self.snapshot_path = os.path.join(self.data_dir, SNAPSHOT_FILE_NAME)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _inode(self) -> int:
+        # The snapshot is always written to a new file that replaces the old one, so a different inode
+        # means it was rebuilt.
+        return os.stat(self.snapshot_path).st_ino
+
+    def assertSameData(self, expected: WorldFlipperData, actual: WorldFlipperData):
+        self.assertEqual(expected.characters.keys(), actual.characters.keys())
+        for char_id, char in expected.characters.items():
+            other = actual.characters[char_id]
+            self.assertEqual(char.name, other.name)
+            self.assertEqual(char.base_atk, other.base_atk)
+            self.assertEqual(
+                [[ab.to_dict() for ab in effects] for effects in char.abilities],
+                [[ab.to_dict() for ab in effects] for effects in other.abilities],
+            )
+
+    def test_loaded(self):
+        parsed = WorldFlipperData(self.data_dir, snapshot=False)
+        built = WorldFlipperData(self.data_dir)
+        inode = self._inode()
+        loaded = WorldFlipperData(self.data_dir)
+        self.assertEqual(inode, self._inode())
+        self.assertSameData(parsed, built)
+        self.assertSameData(parsed, loaded)
+
+    def test_rebuilt_when_edited(self):
+        WorldFlipperData(self.data_dir)
+        for name in _SOURCE_FILES:
+            with self.subTest(name):
+                inode = self._inode()
+                path = os.path.join(self.data_dir, name)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n")
+                WorldFlipperData(self.data_dir)
+                self.assertNotEqual(inode, self._inode())
+                inode = self._inode()
+                WorldFlipperData(self.data_dir)
+                self.assertEqual(inode, self._inode())
+
+    def test_rebuilt_when_corrupt(self):
+        parsed = WorldFlipperData(self.data_dir)
+        # Still a valid manifest, but only part of the payload.
+        with open(self.snapshot_path, "rb") as f:
+            content = f.read()
+        with open(self.snapshot_path, "wb") as f:
+            f.write(content[: len(content) // 2])
+        self.assertSameData(parsed, WorldFlipperData(self.data_dir))
+        with open(self.snapshot_path, "rb") as f:
+            self.assertEqual(SNAPSHOT_VERSION, pickle.load(f)["version"])
+        self.assertEqual(
+            [], [f for f in os.listdir(self.data_dir) if f.endswith(".tmp")]
+        )
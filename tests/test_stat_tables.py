@@ -0,0 +1,44 @@
+from unittest import TestCase
+import pickle
+
+from wf import WorldFlipperData
+
+
+class TestStatTables(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_matches_formula(self):
+        """
+        Stats looked up in the tables are exactly the same as calculating them, and levels outside of
+        the tables are still calculated.
+        """
+        for char in list(self.wf_data.characters.values())[:20]:
+            for evolved in (False, True):
+                evol_atk = char._evol_atk(evolved)
+                evol_hp = char._evol_hp(evolved)
+                for level in range(0, 121):
+                    for uncaps in range(6):
+                        self.assertEqual(
+                            char._calc_stat(char.base_atk, evol_atk, level, uncaps),
+                            char.attack(evolved, level, uncaps),
+                        )
+                        self.assertEqual(
+                            char._calc_stat(char.base_hp, evol_hp, level, uncaps),
+                            char.hp(evolved, level, uncaps),
+                        )
+
+    def test_roster(self):
+        chars = list(self.wf_data.characters.values())
+        attacks = self.wf_data.attack_table()[:, 99, 3, 1]
+        hps = self.wf_data.hp_table(chars[:5])[:, 79, 0, 0]
+        self.assertEqual([c.attack(True, 100, 3) for c in chars], attacks.tolist())
+        self.assertEqual([c.hp(False, 80, 0) for c in chars[:5]], hps.tolist())
+
+    def test_pickle(self):
+        char = next(iter(self.wf_data.characters.values()))
+        expected = char.attack(True, 50, 2)
+        copied = pickle.loads(pickle.dumps(char))
+        self.assertEqual({}, copied._stat_tables)
+        self.assertEqual(expected, copied.attack(True, 50, 2))
@@ -0,0 +1,124 @@
+from unittest import TestCase
+
+from wf.enum import Element
+from wf.status_effect import (
+    StatusEffect,
+    StatusEffectKind,
+    StatusEffects,
+    status_mask,
+)
+
+
+class TestStatusEffects(TestCase):
+    def setUp(self) -> None:
+        self.effects = [
+            StatusEffect(StatusEffectKind.ATTACK, 0, 600, percent_mod=10),
+            StatusEffect(StatusEffectKind.ATTACK, 60, 600, percent_mod=20),
+            StatusEffect(StatusEffectKind.POISON, 30, 300),
+            StatusEffect(
+                StatusEffectKind.ELEMENT_RESIST, 0, 120, element=Element.FIRE
+            ),
+            StatusEffect(
+                StatusEffectKind.ELEMENT_RESIST, 0, 900, element=Element.WATER
+            ),
+        ]
+
+    def test_same_as_list(self):
+        """
+        Looking effects up gives the same answers as looking them up in a list of them.
+        """
+        container = StatusEffects(self.effects)
+        keys = [
+            StatusEffectKind.ATTACK,
+            StatusEffectKind.POISON,
+            StatusEffectKind.SLOW,
+            StatusEffectKind.ELEMENT_RESIST,
+            (StatusEffectKind.ELEMENT_RESIST, Element.FIRE),
+            (StatusEffectKind.ELEMENT_RESIST, Element.WIND),
+            self.effects[1],
+        ]
+        for key in keys:
+            self.assertEqual(self.effects.count(key), container.count(key), key)
+            self.assertEqual(key in self.effects, key in container, key)
+        self.assertEqual(self.effects, list(container))
+        self.assertEqual(container, self.effects)
+
+    def test_only_status_effects(self):
+        container = StatusEffects(self.effects)
+        with self.assertRaises(TypeError):
+            container.append(1)
+        with self.assertRaises(TypeError):
+            StatusEffects([1, 2])
+        self.assertEqual(container, self.effects)
+
+    def test_read_only(self):
+        """
+        The kind and element of an effect can't change once it's in a container, which counts effects by
+        them.
+        """
+        container = StatusEffects(self.effects)
+        effect = self.effects[0]
+        changes = [
+            ("kind", StatusEffectKind.POISON),
+            ("kind_code", 0),
+            ("element", Element.FIRE),
+            ("element_code", 0),
+        ]
+        for name, value in changes:
+            with self.assertRaises(AttributeError, msg=name):
+                setattr(effect, name, value)
+        self.assertEqual(StatusEffectKind.ATTACK, effect.kind)
+        self.assertIsNone(effect.element)
+        self.assertEqual(2, container.count(StatusEffectKind.ATTACK))
+        self.assertNotIn((StatusEffectKind.ATTACK, Element.FIRE), container)
+
+    def test_expire(self):
+        container = StatusEffects(self.effects)
+        self.assertEqual(120, container.next_expiry())
+        self.assertEqual([], container.expire(119))
+        self.assertEqual([self.effects[3]], container.expire(120))
+        self.assertNotIn((StatusEffectKind.ELEMENT_RESIST, Element.FIRE), container)
+        self.assertIn(StatusEffectKind.ELEMENT_RESIST, container)
+
+        forked = container.fork()
+        container.remove(self.effects[2])
+        self.assertNotIn(StatusEffectKind.POISON, container)
+        self.assertIn(StatusEffectKind.POISON, forked)
+        self.assertEqual(600, container.next_expiry())
+        self.assertEqual(330, forked.next_expiry())
+
+        self.assertEqual(self.effects[:2], container.expire(660))
+        self.assertEqual(0, container.count(StatusEffectKind.ATTACK))
+        self.assertEqual([self.effects[4]], list(container))
+        self.assertEqual(4, len(forked))
+        with self.assertRaises(ValueError):
+            container.remove(self.effects[0])
+
+    def test_mask(self):
+        container = StatusEffects(self.effects)
+        fire_resist = (StatusEffectKind.ELEMENT_RESIST, Element.FIRE)
+        self.assertTrue(container.has_any(status_mask(StatusEffectKind.POISON)))
+        self.assertTrue(container.has_any(status_mask(fire_resist)))
+        self.assertFalse(container.has_any(status_mask(StatusEffectKind.SLOW)))
+        self.assertTrue(
+            container.has_any(
+                status_mask(StatusEffectKind.SLOW, StatusEffectKind.ATTACK)
+            )
+        )
+
+        container.expire(120)
+        self.assertFalse(container.has_any(status_mask(fire_resist)))
+        self.assertTrue(
+            container.has_any(status_mask(StatusEffectKind.ELEMENT_RESIST))
+        )
+        container.expire(900)
+        self.assertEqual(0, container.mask)
+
+    def test_compact(self):
+        effect = self.effects[3]
+        self.assertFalse(hasattr(effect, "__dict__"))
+        self.assertEqual(StatusEffectKind.ELEMENT_RESIST, effect.kind)
+        self.assertEqual(Element.FIRE, effect.element)
+        self.assertIsNone(self.effects[0].element)
+        self.assertEqual((StatusEffectKind.ELEMENT_RESIST, Element.FIRE), effect)
+        self.assertNotEqual((StatusEffectKind.ELEMENT_RESIST, Element.WATER), effect)
@@ -0,0 +1,70 @@
+from unittest import TestCase
+import itertools
+
+from wf import WorldFlipperData
+from wf.ability import evaluate_party
+from wf.enum import CharPosition, DamageSource
+from wf.game_state import GameState
+from wf.sweep import sweep, powerflips_axis, combos_reached_axis, _SOURCE_FLAGS
+
+
+class TestSweep(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def test_matches_evaluating_every_point(self):
+        """
+        Sweeping the number of powerflips (which Vagner's ability 2 counts) and combos gives the exact
+        same damage as evaluating the whole party at every point.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        sonia = self.wf_data.find("brown_fighter")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        state.party.set_member(sonia, CharPosition.UNISON, 0, level=80)
+        state.party.ability_lvs[0] = [6] * 6
+        state.party.ability_lvs[1] = [6] * 6
+
+        axes = [powerflips_axis(1, range(0, 60, 7)), combos_reached_axis(30, range(4))]
+        result = sweep(state, axes)
+        self.assertEqual((9, 4), result.shape)
+
+        for idxs in itertools.product(*(range(len(a.values)) for a in axes)):
+            point = state.fork()
+            for axis, idx in zip(axes, idxs):
+                axis.apply(point, axis.values[idx])
+            ctx = evaluate_party(point)[0]
+            for source in DamageSource:
+                source_ctx = ctx.copy()
+                setattr(source_ctx, _SOURCE_FLAGS[source], True)
+                if source == DamageSource.POWER_FLIP:
+                    source_ctx.charge_level = 3
+                low, high = source_ctx.calculate(point)
+                self.assertEqual(low, result.low[source][idxs])
+                self.assertEqual(high, result.high[source][idxs])
+
+    def test_counted_results_independent(self):
+        """
+        Applying the effects of a counting ability with different multipliers gives a separate result
+        for each, leaving earlier ones as they were.
+        """
+        vagner = self.wf_data.find("fire_dragon")
+        state = GameState()
+        state.party.set_member(vagner, CharPosition.LEADER, level=80)
+        state.party.ability_lvs[0] = [6] * 6
+        checked = 0
+        for effects in vagner.abilities:
+            for ab in effects:
+                if ab.plan().condition_cls.count_field is None:
+                    continue
+                condition = ab.condition(vagner, state)
+                first = ab.apply_effects(condition, 1)
+                if first is None:
+                    continue
+                expected = dict(vars(first))
+                second = ab.apply_effects(condition, 2)
+                self.assertIsNot(first, second)
+                self.assertEqual(expected, vars(first))
+                checked += 1
+        self.assertGreater(checked, 0)
@@ -0,0 +1,98 @@
+from unittest import TestCase
+import itertools
+
+from wf import WorldFlipperData
+from wf.enum import DamageSource
+from wf.game_state import GameState
+from wf.team_search import TeamSearch, search_teams, search_teams_parallel
+
+
+class TestTeamSearch(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.wf_data = WorldFlipperData("wf_data_json")
+
+    def _roster(self):
+        roster = [
+            self.wf_data.find("fire_dragon"),
+            self.wf_data.find("kunoichi_1anv"),
+            self.wf_data.find("brown_fighter"),
+            self.wf_data.find("ice_witch_2anv"),
+        ]
+        for char in sorted(self.wf_data.characters.values(), key=lambda c: c.id):
+            if len(roster) == 7:
+                break
+            if char not in roster:
+                roster.append(char)
+        return roster
+
+    def test_matches_brute_force(self):
+        """
+        Pruning never drops a team that would have made it into the top teams.
+        """
+        roster = self._roster()
+        state = GameState()
+        state.set_powerflips(3, 20)
+
+        for source in (DamageSource.POWER_FLIP, DamageSource.SKILL):
+            teams = list(itertools.permutations(range(len(roster)), 6))
+            scores = None
+            for symmetry in (False, True):
+                search = TeamSearch(
+                    roster, state, top_k=3, source=source, symmetry=symmetry
+                )
+                self.assertEqual(symmetry, search.symmetric)
+                found = list(search.run())
+                scored = search.stats.teams
+                for result in search.best():
+                    self.assertIn(result, found)
+
+                if scores is None:
+                    scores = [search._score_team(list(members)) for members in teams]
+                # Of every pair of teams with columns 1 and 2 swapped, only one is searched.
+                expected = sorted(
+                    (
+                        result
+                        for members, result in zip(teams, scores)
+                        if not symmetry or members[2] < members[4]
+                    ),
+                    reverse=True,
+                )
+                self.assertEqual(
+                    [r.score for r in expected[:3]], [r.score for r in search.best()]
+                )
+                self.assertLess(scored, len(expected))
+
+    def test_asymmetric_state(self):
+        """
+        Columns 1 and 2 can only be swapped when the state has the same values for both of them.
+        """
+        state = GameState()
+        self.assertTrue(state.columns_interchangeable(["skill_activations"]))
+        state.set_skill_activations(2, 3)
+        self.assertFalse(state.columns_interchangeable(["skill_activations"]))
+        self.assertTrue(state.columns_interchangeable(["direct_hits"]))
+        state.direct_hits[2] = 1
+        self.assertFalse(state.columns_interchangeable(["direct_hits"]))
+        self.assertTrue(state.columns_interchangeable(["total_powerflips"]))
+
+    def test_parallel(self):
+        """
+        Splitting the search up between processes finds teams just as good as searching in one go.
+        """
+        roster = self._roster()
+        state = GameState()
+        state.set_powerflips(3, 20)
+        expected = search_teams(roster, state, top_k=3)
+
+        progress = []
+        found = search_teams_parallel(
+            "wf_data_json",
+            state,
+            [c.internal_name for c in roster],
+            workers=2,
+            progress=lambda done, total: progress.append((done, total)),
+            top_k=3,
+        )
+        self.assertEqual([r.score for r in expected], [r.score for r in found])
+        self.assertEqual((len(roster), len(roster)), progress[-1])
@@ -0,0 +1,55 @@
+from unittest import TestCase
+
+import numpy as np
+
+from wf.effect.base_effect import (
+    timed_effect_active,
+    timed_effect_mask,
+    timed_effect_uptime,
+)
+
+
+def _simulate(seconds: int, time_to_activate: int, time_active: int) -> bool:
+    # Stepping through every activation, the way timed effects used to be checked.
+    if time_to_activate > seconds:
+        return False
+    time_remaining = seconds - time_to_activate
+    time_to_activate -= time_active
+    while time_remaining >= 0:
+        if time_remaining <= time_active:
+            return True
+        time_remaining -= time_active
+        if time_remaining <= time_to_activate:
+            return False
+        time_remaining -= time_to_activate
+    return False
+
+
+class TestTimedEffect(TestCase):
+    def test_matches_stepping_through_activations(self):
+        seconds = np.arange(-1, 240)
+        for time_to_activate in range(1, 25):
+            for time_active in range(0, 30):
+                expected = [
+                    _simulate(s, time_to_activate, time_active) for s in seconds
+                ]
+                actual = [
+                    timed_effect_active(s, time_to_activate, time_active)
+                    for s in seconds
+                ]
+                self.assertEqual(expected, actual)
+                mask = timed_effect_mask(seconds, time_to_activate, time_active)
+                self.assertEqual(expected, mask.tolist())
+
+    def test_uptime(self):
+        for time_to_activate in range(0, 25):
+            for time_active in range(0, 30):
+                for start, end in [(0, 180), (7, 61), (30, 31), (100, 240)]:
+                    active = sum(
+                        timed_effect_active(s, time_to_activate, time_active)
+                        for s in range(start, end)
+                    )
+                    self.assertAlmostEqual(
+                        active / (end - start),
+                        timed_effect_uptime(start, end, time_to_activate, time_active),
+                    )
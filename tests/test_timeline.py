@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from wf.timeline import WorldFlipperTimeline, Event, EventKind
+
+
+def _event(kind: EventKind, time: int) -> Event:
+    event = Event(kind)
+    event.time_activated = time
+    return event
+
+
+class TestTimeline(TestCase):
+    def test_order(self):
+        """
+        Events come out by time, and in the order they were added when they happen at the same time.
+        """
+        timeline = WorldFlipperTimeline()
+        flip = _event(EventKind.BALL_FLIP, 10)
+        skill = _event(EventKind.SKILL_ACTIVATED, 5)
+        hit = _event(EventKind.SKILL_HIT, 10)
+        fever = _event(EventKind.FEVER_START, 0)
+        timeline.add_event(flip)
+        timeline.add_event(skill)
+        timeline.add_event(hit)
+        timeline.add_events([fever])
+
+        self.assertEqual(4, len(timeline))
+        self.assertEqual([fever, skill, flip, hit], list(timeline))
+        self.assertIs(fever, timeline.peek())
+        self.assertIs(fever, timeline.pop_next())
+        self.assertIs(skill, timeline.pop_next())
+        self.assertIs(flip, timeline.pop_next())
+        self.assertIs(hit, timeline.pop_next())
+        self.assertIsNone(timeline.peek())
+        self.assertRaises(IndexError, timeline.pop_next)
+
+    def test_queries(self):
+        """
+        Looking events up by time and kind only finds the ones that are still in the timeline.
+        """
+        timeline = WorldFlipperTimeline()
+        events = []
+        for time in range(100):
+            kind = EventKind.DIRECT_HIT if time % 3 == 0 else EventKind.BALL_FLIP
+            events.append(_event(kind, time))
+            timeline.add_event(events[-1])
+
+        self.assertEqual(events[10:20], timeline.between(10, 20))
+        hits = [e for e in events if e.kind == EventKind.DIRECT_HIT]
+        self.assertEqual(hits, timeline.events(EventKind.DIRECT_HIT))
+        self.assertEqual(hits[4:7], timeline.between(10, 20, EventKind.DIRECT_HIT))
+
+        for _ in range(15):
+            timeline.pop_next()
+        late = _event(EventKind.DIRECT_HIT, 12)
+        timeline.add_event(late)
+        self.assertEqual([late] + events[15:20], timeline.between(10, 20))
+        self.assertEqual(
+            [late, events[15], events[18]],
+            timeline.between(0, 20, EventKind.DIRECT_HIT),
+        )
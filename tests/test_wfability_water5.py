@@ -628,7 +628,10 @@ class TestWorldFlipperAbilityWater5(TestCase):
 
         with self.subTest("ab1"):
             sub_state = copy.deepcopy(state)
-            sub_state.enemy.debuffs = [1, 2]
+            sub_state.enemy.debuffs = [
+                StatusEffect(StatusEffectKind.POISON, 0, 10),
+                StatusEffect(StatusEffectKind.SLOW, 0, 10),
+            ]
 
             df = acipher.abilities[0][0].eval_effect(acipher, sub_state)
             self.assertAlmostEqual(0.4, df.stat_mod_da_damage)
@@ -647,7 +650,10 @@ class TestWorldFlipperAbilityWater5(TestCase):
 
         with self.subTest("ab2"):
             sub_state = copy.deepcopy(state)
-            sub_state.enemy.debuffs = [1, 2]
+            sub_state.enemy.debuffs = [
+                StatusEffect(StatusEffectKind.POISON, 0, 10),
+                StatusEffect(StatusEffectKind.SLOW, 0, 10),
+            ]
 
             df = acipher.abilities[1][0].eval_effect(acipher, sub_state)
             self.assertAlmostEqual(0.4, df.attack_modifier)
@@ -666,7 +672,10 @@ class TestWorldFlipperAbilityWater5(TestCase):
 
         with self.subTest("ab3"):
             sub_state = copy.deepcopy(state)
-            sub_state.enemy.debuffs = [1, 2]
+            sub_state.enemy.debuffs = [
+                StatusEffect(StatusEffectKind.POISON, 0, 10),
+                StatusEffect(StatusEffectKind.SLOW, 0, 10),
+            ]
 
             df = acipher.abilities[2][0].eval_effect(acipher, sub_state)
             self.assertAlmostEqual(0.2, df.attack_modifier)
@@ -1 +1,5 @@
 from .ability import WorldFlipperAbility
+from .table import AbilityTable
+from .batch import evaluate_party
+from .memo import EvalMemo
+from .dispatch import dispatch_table
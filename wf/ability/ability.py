@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import Literal, Optional, TYPE_CHECKING, cast
+from typing import Literal, Optional, TYPE_CHECKING
 
 from wf.dmg_formula import DamageFormulaContext
-from wf.enum import AbilityElementType
 from wf.game_state import GameState
 
 from wf.effect.base_effect import EffectParams
+from wf.ability.plan import AbilityPlan, compile_plan
+from wf.ability.table import AbilityTable, ABILITY_ROW_LEN
 from wf.effect.main_mapping import main_condition_mapping, main_effect_mapping
 from wf.effect.continuous_mapping import (
     continuous_condition_mapping,
@@ -14,6 +15,7 @@ from wf.effect.continuous_mapping import (
 
 if TYPE_CHECKING:
     from wf.character import WorldFlipperCharacter
+    from wf.effect.base_effect import WorldFlipperBaseCondition
 
 EffectType = Literal["0", "1"]
 
@@ -21,6 +23,37 @@ _PERCENT_CONVERT = 100_000
 _COUNT_CONVERT = 100_000
 _SEC_CONVERT = 600_000
 
+
+class _Field:
+    """
+    Reads a single raw field of an ability out of the `AbilityTable` the ability is a view into.
+    """
+
+    def __init__(self, col: int):
+        self.col = col
+
+    def __set_name__(self, owner, name):
+        _FIELD_NAMES[self.col] = name
+
+    def __get__(self, ab: Optional[WorldFlipperAbility], owner=None):
+        if ab is None:
+            return self
+        table = ab._table
+        return table.strings[table.columns[self.col][ab._row]]
+
+
+class _RequiresMainField(_Field):
+    def __init__(self):
+        super().__init__(1)
+
+    def __get__(self, ab: Optional[WorldFlipperAbility], owner=None):
+        if ab is None:
+            return self
+        return super().__get__(ab, owner) == "false"
+
+
+_FIELD_NAMES: list[str] = [""] * ABILITY_ROW_LEN
+
 # TODO: Going to need something that can evaluate an ability to figure out what UI elements to show.
 # Not all abilities are going to need a toggle to say whether or not they're going to be active, as
 # an example. Things that might need this would be stuff like a continuous effect that has a
@@ -30,107 +63,115 @@ _SEC_CONVERT = 600_000
 
 
 class WorldFlipperAbility:
-    def __init__(self, data: list[str], from_char):
+    """
+    A single effect of an ability. This is only a view of one row of the `AbilityTable` that holds every
+    ability in the database; all of the raw fields below are read straight out of the table.
+    """
+
+    __slots__ = ("from_char", "_table", "_row")
+
+    name = _Field(0)
+    requires_main = _RequiresMainField()
+    ability_statue_group = _Field(2)
+    effect_type = _Field(3)  # 0 for "main effect", 1 for continuous
+    party_condition_index = _Field(4)  # TODO: Verify
+    slot5 = _Field(5)
+    slot6 = _Field(6)
+    slot7 = _Field(7)
+    slot8 = _Field(8)
+    party_condition_element = _Field(9)  # TODO: Verify
+    slot10 = _Field(10)
+    slot11 = _Field(11)
+    slot12 = _Field(12)
+    slot13 = _Field(13)
+    slot14 = _Field(14)
+    slot15 = _Field(15)
+    slot16 = _Field(16)
+    slot17 = _Field(17)
+    slot18 = _Field(18)
+    slot19 = _Field(19)
+    slot20 = _Field(20)
+    slot21 = _Field(21)
+    slot22 = _Field(22)
+    slot23 = _Field(23)
+    slot24 = _Field(24)
+    main_condition_index = _Field(25)
+    main_condition_target = _Field(26)
+    main_condition_element = _Field(27)
+    main_condition_min = _Field(28)
+    main_condition_max = _Field(29)
+    # Valid values:
+    # ""
+    # "<number>"
+    # "(None)"
+    main_effect_max_multiplier = _Field(30)
+    cooldown_time = _Field(31)  # Seconds multiplied by 60.
+    condition_target_element = _Field(32)
+    slot33 = _Field(33)
+    slot34 = _Field(34)
+    slot35 = _Field(35)
+    slot36 = _Field(36)
+    slot37 = _Field(37)
+    slot38 = _Field(38)
+    slot39 = _Field(39)
+    slot40 = _Field(40)
+    slot41 = _Field(41)
+    main_effect_index = _Field(42)
+    main_effect_target = _Field(43)
+    # Element here is used when the effect target needs to discriminate on which characters
+    # it's going to actually do something to. e.g.: Increase attack damage for all
+    # Water units, versus all units.
+    main_effect_element = _Field(44)
+    main_effect_min = _Field(45)
+    main_effect_max = _Field(46)
+    slot47 = _Field(47)
+    slot48 = _Field(48)
+    slot49 = _Field(49)
+    slot50 = _Field(50)
+    # Duration stored in seconds * 6,000,000
+    # NOTE: In general it seems like this can be "added" to any main effect in order to
+    # give it some kind of time limit. It doesn't seem to be specific to any particular
+    # index.
+    main_effect_duration_min = _Field(51)
+    main_effect_duration_max = _Field(52)
+    # If a main effect is one that has a duration applied to it, it might be able
+    # to stack the effect. This provides the max stacks/multiplier for that effect.
+    main_effect_incremental_max_multiplier = _Field(53)
+    slot54 = _Field(54)
+    slot55 = _Field(55)
+    slot56 = _Field(56)
+    slot57 = _Field(57)
+    slot58 = _Field(58)
+    slot59 = _Field(59)
+    slot60 = _Field(60)
+    continuous_condition_index = _Field(61)
+    continuous_condition_target = _Field(62)
+    continuous_condition_element = _Field(63)
+    continuous_condition_min = _Field(64)
+    continuous_condition_max = _Field(65)
+    continuous_effect_max_multiplier = _Field(66)  # TODO: Verify
+    slot67 = _Field(67)
+    # This gets set to "1" for 1st Anniversary Celtie's ability 1, don't know what it does though.
+    slot68 = _Field(68)
+    slot69 = _Field(69)
+    slot70 = _Field(70)
+    slot71 = _Field(71)
+    slot72 = _Field(72)
+    continuous_effect_index = _Field(73)
+    continuous_effect_target = _Field(74)
+    continuous_effect_element = _Field(75)
+    continuous_effect_min = _Field(76)
+    continuous_effect_max = _Field(77)
+    slot78 = _Field(78)
+    slot79 = _Field(79)
+    slot80 = _Field(80)
+    slot81 = _Field(81)
+    slot82 = _Field(82)
+
+    def __init__(self, table: AbilityTable, row: int, from_char):
         self.from_char = from_char
-        self.name = data[0]
-        self.requires_main = data[1] == "false"
-        self.ability_statue_group = data[2]
-        self.effect_type: EffectType = cast(
-            EffectType, data[3]
-        )  # 0 for "main effect", 1 for continuous
-        self.party_condition_index = data[4]  # TODO: Verify
-        self.slot5 = data[5]
-        self.slot6 = data[6]
-        self.slot7 = data[7]
-        self.slot8 = data[8]
-        self.party_condition_element = cast(AbilityElementType, data[9])  # TODO: Verify
-        self.slot10 = data[10]
-        self.slot11 = data[11]
-        self.slot12 = data[12]
-        self.slot13 = data[13]
-        self.slot14 = data[14]
-        self.slot15 = data[15]
-        self.slot16 = data[16]
-        self.slot17 = data[17]
-        self.slot18 = data[18]
-        self.slot19 = data[19]
-        self.slot20 = data[20]
-        self.slot21 = data[21]
-        self.slot22 = data[22]
-        self.slot23 = data[23]
-        self.slot24 = data[24]
-        self.main_condition_index = data[25]
-        self.main_condition_target = data[26]
-        self.main_condition_element = cast(AbilityElementType, data[27])
-        self.main_condition_min = data[28]
-        self.main_condition_max = data[29]
-        # Valid values:
-        # ""
-        # "<number>"
-        # "(None)"
-        self.main_effect_max_multiplier = data[30]
-        self.cooldown_time = data[31]  # Seconds multiplied by 60.
-        self.condition_target_element = cast(AbilityElementType, data[32])
-        self.slot33 = data[33]
-        self.slot34 = data[34]
-        self.slot35 = data[35]
-        self.slot36 = data[36]
-        self.slot37 = data[37]
-        self.slot38 = data[38]
-        self.slot39 = data[39]
-        self.slot40 = data[40]
-        self.slot41 = data[41]
-        self.main_effect_index = data[42]
-        self.main_effect_target = data[43]
-        # Element here is used when the effect target needs to discriminate on which characters
-        # it's going to actually do something to. e.g.: Increase attack damage for all
-        # Water units, versus all units.
-        self.main_effect_element = cast(AbilityElementType, data[44])
-        self.main_effect_min = data[45]
-        self.main_effect_max = data[46]
-        self.slot47 = data[47]
-        self.slot48 = data[48]
-        self.slot49 = data[49]
-        self.slot50 = data[50]
-        # Duration stored in seconds * 6,000,000
-        # NOTE: In general it seems like this can be "added" to any main effect in order to
-        # give it some kind of time limit. It doesn't seem to be specific to any particular
-        # index.
-        self.main_effect_duration_min = data[51]
-        self.main_effect_duration_max = data[52]
-        # If a main effect is one that has a duration applied to it, it might be able
-        # to stack the effect. This provides the max stacks/multiplier for that effect.
-        self.main_effect_incremental_max_multiplier = data[53]
-        self.slot54 = data[54]
-        self.slot55 = data[55]
-        self.slot56 = data[56]
-        self.slot57 = data[57]
-        self.slot58 = data[58]
-        self.slot59 = data[59]
-        self.slot60 = data[60]
-        self.continuous_condition_index = data[61]
-        self.continuous_condition_target = data[62]
-        self.continuous_condition_element = cast(AbilityElementType, data[63])
-        self.continuous_condition_min = data[64]
-        self.continuous_condition_max = data[65]
-        self.continuous_effect_max_multiplier = data[66]  # TODO: Verify
-        self.slot67 = data[67]
-        # This gets set to "1" for 1st Anniversary Celtie's ability 1, don't know what it does though.
-        self.slot68 = data[68]
-        self.slot69 = data[69]
-        self.slot70 = data[70]
-        self.slot71 = data[71]
-        self.slot72 = data[72]
-        self.continuous_effect_index = data[73]
-        self.continuous_effect_target = data[74]
-        self.continuous_effect_element = cast(AbilityElementType, data[75])
-        self.continuous_effect_min = data[76]
-        self.continuous_effect_max = data[77]
-        self.slot78 = data[78]
-        self.slot79 = data[79]
-        self.slot80 = data[80]
-        self.slot81 = data[81]
-        self.slot82 = data[82]
+        self._table = table
+        self._row = row
 
     def is_main_effect(self) -> bool:
         return self.effect_type == "0"
@@ -231,24 +272,36 @@ class WorldFlipperAbility:
         else:
             return continuous_effect_mapping
 
+    def plan(self) -> AbilityPlan:
+        """
+        The compiled evaluation plan for this ability. Compiled the first time it's needed, and shared
+        by every view of the same ability row.
+        """
+        plan = self._table.plans.get(self._row)
+        if plan is None:
+            plan = compile_plan(self)
+            self._table.plans[self._row] = plan
+        return plan
+
     def eval_effect(
         self,
         char: WorldFlipperCharacter,
         state: GameState,
     ) -> Optional[DamageFormulaContext]:
-        condition_ui = self.condition_ui()
-        effect_ui = self.effect_ui()
+        condition = self.condition(char, state)
+        if not condition.should_run():
+            return None
+        if not condition.eval():
+            return None
+        return self.apply_effects(condition, condition.multiplier)
 
-        if self.condition_index() not in self._condition_mapping():
-            raise RuntimeError(
-                f"[{self.name}] Unknown {self.effect_type_name()} condition: "
-                f"{self.condition_index()}"
-            )
-        if self.effect_index() not in self._effect_mapping():
-            raise RuntimeError(
-                f"[{self.name}] Unknown {self.effect_type_name()} effect: "
-                f"{self.effect_index()}"
-            )
+    def condition(
+        self, char: WorldFlipperCharacter, state: GameState
+    ) -> WorldFlipperBaseCondition:
+        """
+        The condition of this ability, ready to evaluate against `char`.
+        """
+        plan = self.plan()
 
         ab_char_idx, _ = state.party.ability_index(self)
         ab_char = state.party[ab_char_idx]
@@ -257,22 +310,65 @@ class WorldFlipperAbility:
                 f"Impossible state: Found ability char but was None in party."
             )
         ctx = DamageFormulaContext()
-        condition_param = EffectParams(condition_ui, self, state, char, ab_char, ctx)
-        effect_param = EffectParams(effect_ui, self, state, char, ab_char, ctx)
-
-        condition = self._condition_mapping()[self.condition_index()](condition_param)
+        condition_param = EffectParams(
+            plan.condition_ui, self, state, char, ab_char, ctx
+        )
+        return plan.condition_cls(condition_param)
 
-        if not condition.should_run():
-            return None
-        if not condition.eval():
-            return None
-        effect_param.multiplier = condition.multiplier
-        for e in self._effect_mapping()[self.effect_index()]:
+    def apply_effects(
+        self, condition: WorldFlipperBaseCondition, multiplier: int
+    ) -> Optional[DamageFormulaContext]:
+        """
+        Runs every effect of this ability for a condition that passed, returning the resulting context or
+        None if any of the effects don't apply. Every call starts from a fresh context, so the same
+        condition can be applied with many different multipliers.
+        """
+        plan = self.plan()
+        effect_param = EffectParams(
+            plan.effect_ui,
+            self,
+            condition.state,
+            condition.eval_char,
+            condition.ability_char,
+            DamageFormulaContext(),
+            multiplier,
+        )
+        for e in plan.effect_classes:
             if not e(effect_param).eval():
                 return None
         return effect_param.ctx
 
+    def int_field(self, field: str) -> int:
+        """
+        `int(getattr(ability, field))` for one of the numeric fields, but without any string parsing since
+        the table already holds the parsed value.
+        """
+        return self._table.number(_FIELD_COLUMNS[field], self._row)
+
+    def to_dict(self) -> dict[str, str | bool]:
+        """
+        Every raw field of the ability keyed by its attribute name. Mostly useful for diffing abilities
+        against each other.
+        """
+        return {name: getattr(self, name) for name in _FIELD_NAMES}
+
+    def __getstate__(self):
+        # `from_char` is a weakref proxy, which can't be pickled. The owning character re-links it when
+        # it's unpickled, see `WorldFlipperCharacter.__setstate__`.
+        return self._table, self._row
+
+    def __setstate__(self, state):
+        self._table, self._row = state
+        self.from_char = None
+
     def __eq__(self, other):
         if isinstance(other, WorldFlipperAbility):
+            if self._table is other._table:
+                # Same interned name means same code, no need to look up the strings.
+                names = self._table.columns[0]
+                return names[self._row] == names[other._row]
             return self.name == other.name
         return False
+
+
+_FIELD_COLUMNS = {name: col for col, name in enumerate(_FIELD_NAMES)}
@@ -0,0 +1,85 @@
+from __future__ import annotations
+from typing import Optional, TYPE_CHECKING
+
+from wf.ability.memo import EvalMemo, StateKey
+from wf.dmg_formula import DamageFormulaContext
+from wf.party import unison_index
+
+if TYPE_CHECKING:
+    from wf.ability import WorldFlipperAbility
+    from wf.game_state import GameState
+
+
+def evaluate_party(
+    state: GameState, memo: Optional[EvalMemo] = None
+) -> list[Optional[DamageFormulaContext]]:
+    """
+    Evaluates every ability of every party member against each of the three main units, and combines
+    the results into a single context per main slot (None for an empty slot). Gives the same result as
+    calling `eval_effect` for every ability/main unit pair and combining them in party order, but
+    everything that doesn't depend on the unit being evaluated, such as finding the ability's owner and
+    evaluating conditions whose targets don't involve the evaluated unit, is only done once.
+
+    With a `memo`, results are looked up in (and added to) it instead, which is much faster when
+    evaluating many states that only differ in a few fields.
+    """
+    party = state.party
+    mains = [party[col * 2] for col in range(3)]
+    results: list[Optional[DamageFormulaContext]] = []
+    for col, main in enumerate(mains):
+        if main is None:
+            results.append(None)
+        else:
+            results.append(DamageFormulaContext(main, party[unison_index(col * 2)]))
+
+    key = StateKey(state) if memo is not None else None
+    for member in party:
+        if member is None:
+            continue
+        for effects in member.abilities:
+            for ab in effects:
+                if memo is None:
+                    _evaluate_ability(ab, state, mains, results)
+                    continue
+                for col, main in enumerate(mains):
+                    if main is None:
+                        continue
+                    ctx = memo.lookup(ab, main, state, key)
+                    if ctx is not None:
+                        results[col].combine(ctx)
+    return results
+
+
+def _evaluate_ability(
+    ab: WorldFlipperAbility,
+    state: GameState,
+    mains: list,
+    results: list[Optional[DamageFormulaContext]],
+):
+    plan = ab.plan()
+    ab_char_idx, ab_idx = state.party.ability_index(ab)
+    # Locked abilities never pass `should_run`, whichever unit they're evaluated for.
+    if ab_char_idx != -1 and state.party.ability_lvs[ab_char_idx][ab_idx] == 0:
+        return
+
+    # (passed, multiplier) of the condition, once it's been evaluated for a unit and the result is
+    # known to be the same for every other unit.
+    shared: Optional[tuple[bool, int]] = None
+    for col, main in enumerate(mains):
+        if main is None:
+            continue
+        condition = ab.condition(main, state)
+        if not condition.should_run():
+            continue
+        if shared is None:
+            passed = condition.eval()
+            multiplier = condition.multiplier
+            if plan.condition_shared:
+                shared = passed, multiplier
+        else:
+            passed, multiplier = shared
+        if not passed:
+            continue
+        ctx = ab.apply_effects(condition, multiplier)
+        if ctx is not None:
+            results[col].combine(ctx)
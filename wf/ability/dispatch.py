@@ -0,0 +1,23 @@
+from __future__ import annotations
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from wf.ability import WorldFlipperAbility
+    from wf.timeline.events import EventKind
+
+
+def dispatch_table(
+    abilities: Iterable[WorldFlipperAbility],
+) -> dict[EventKind, tuple[int, ...]]:
+    """
+    Positions in `abilities` of the abilities that listen to each kind of event (see
+    `AbilityPlan.listens_to`). Kinds of events that no ability listens to are left out.
+
+    When an event happens, only its listeners can come out differently than before, so these are the
+    only abilities that have to be evaluated again.
+    """
+    table: dict[EventKind, list[int]] = {}
+    for pos, ab in enumerate(abilities):
+        for kind in ab.plan().listens_to:
+            table.setdefault(kind, []).append(pos)
+    return {kind: tuple(positions) for kind, positions in table.items()}
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Iterable, Optional
+
+from wf.ability.table import AbilityTable
+
+# Raw ability fields that get an inverted index, keyed on attribute name of `WorldFlipperAbility`.
+INDEXED_FIELDS: dict[str, int] = {
+    "effect_type": 3,
+    "main_condition_index": 25,
+    "main_condition_target": 26,
+    "main_condition_element": 27,
+    "main_effect_index": 42,
+    "main_effect_target": 43,
+    "main_effect_element": 44,
+    "continuous_condition_index": 61,
+    "continuous_condition_target": 62,
+    "continuous_condition_element": 63,
+    "continuous_effect_index": 73,
+    "continuous_effect_target": 74,
+    "continuous_effect_element": 75,
+}
+
+
+class AbilityOwner:
+    """
+    Where an ability row lives in the database: which character it belongs to, and its position in
+    that character's `abilities`.
+    """
+
+    __slots__ = ("char_order", "char_id", "ability_idx")
+
+    def __init__(self, char_order: int, char_id: str, ability_idx: int):
+        # Position of the character in the database, so that results come back in the same order as
+        # iterating over every character would produce them.
+        self.char_order = char_order
+        self.char_id = char_id
+        self.ability_idx = ability_idx
+
+
+class AbilityIndex:
+    """
+    Inverted indexes over an `AbilityTable`: for every indexed field, maps each value to the rows that
+    hold it. Together with the owners of every ability this lets reverse-engineering queries (which
+    characters have main effect 54?) be answered without touching any ability that doesn't match.
+    """
+
+    def __init__(self, table: AbilityTable):
+        self.table = table
+        self.postings: dict[str, dict[str, list[int]]] = {}
+        self.owners: dict[str, list[AbilityOwner]] = {}
+
+    def add_owner(
+        self, ability_id: str, char_order: int, char_id: str, ability_idx: int
+    ):
+        self.owners.setdefault(ability_id, []).append(
+            AbilityOwner(char_order, char_id, ability_idx)
+        )
+
+    def build(self):
+        table = self.table
+        for field, col in INDEXED_FIELDS.items():
+            by_code: dict[int, list[int]] = {}
+            for row, code in enumerate(table.columns[col]):
+                by_code.setdefault(code, []).append(row)
+            self.postings[field] = {
+                table.strings[code]: rows for code, rows in by_code.items()
+            }
+
+    def rows(
+        self, field: str, value: str, effect_type: Optional[str] = None
+    ) -> list[int]:
+        rows = self.postings[field].get(value, [])
+        if effect_type is None:
+            return rows
+        return self._filter_type(rows, effect_type)
+
+    def values(self, field: str, effect_type: Optional[str] = None) -> set[str]:
+        """
+        Every distinct value of a field, optionally only counting rows of a single effect type.
+        """
+        postings = self.postings[field]
+        if effect_type is None:
+            return set(postings.keys())
+        type_code = self.table.code(effect_type)
+        effect_types = self.table.columns[INDEXED_FIELDS["effect_type"]]
+        return {
+            value
+            for value, rows in postings.items()
+            if any(effect_types[row] == type_code for row in rows)
+        }
+
+    def owners_of(self, row: int) -> list[AbilityOwner]:
+        return self.owners.get(self.table.ability_id(row), [])
+
+    def _filter_type(self, rows: Iterable[int], effect_type: str) -> list[int]:
+        type_code = self.table.code(effect_type)
+        effect_types = self.table.columns[INDEXED_FIELDS["effect_type"]]
+        return [row for row in rows if effect_types[row] == type_code]
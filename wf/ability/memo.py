@@ -0,0 +1,130 @@
+from __future__ import annotations
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Optional, TYPE_CHECKING
+
+from wf.status_effect import StatusEffects
+
+if TYPE_CHECKING:
+    from wf.ability import WorldFlipperAbility
+    from wf.character import WorldFlipperCharacter
+    from wf.dmg_formula import DamageFormulaContext
+    from wf.game_state import GameState
+
+# Default number of results kept by an `EvalMemo`.
+DEFAULT_MEMO_SIZE = 65_536
+
+
+def freeze(value: Any) -> Any:
+    """
+    Hashable copy of a piece of game state, so that it can be part of a memo key.
+    """
+    if value is None or isinstance(value, (str, int, float, Enum)):
+        return value
+    if isinstance(value, (list, tuple, StatusEffects)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if hasattr(value, "__dict__"):
+        return type(value).__name__, freeze(vars(value))
+    if hasattr(value, "__slots__"):
+        slots = tuple(freeze(getattr(value, name)) for name in value.__slots__)
+        return type(value).__name__, slots
+    return value
+
+
+class StateKey:
+    """
+    Frozen values of the fields of a single `GameState`, computed only when first asked for. Share one
+    between lookups as long as the state doesn't change.
+    """
+
+    def __init__(self, state: GameState, party: Optional[tuple] = None):
+        self.state = state
+        # The party's signature can be passed in when it's already known to save recomputing it.
+        self.party = party if party is not None else state.party.signature()
+        self._fields: dict[str, Any] = {}
+
+    def fields(self, names: tuple[str, ...]) -> tuple:
+        values = []
+        for name in names:
+            if name not in self._fields:
+                self._fields[name] = freeze(getattr(self.state, name))
+            values.append(self._fields[name])
+        return tuple(values)
+
+
+class EvalMemo:
+    """
+    Bounded LRU cache of `WorldFlipperAbility.eval_effect` results.
+
+    A result is keyed on the ability, the slot of the unit it's evaluated for, the whole party and only
+    the `GameState` fields the ability's condition and effects declare they read (see
+    `WorldFlipperBaseEffect.reads`). Changing anything else, like sweeping the number of powerflips, hits
+    the cache for every ability that doesn't care about it.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: OrderedDict[tuple, Optional[DamageFormulaContext]] = (
+            OrderedDict()
+        )
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def eval_effect(
+        self,
+        ab: WorldFlipperAbility,
+        char: WorldFlipperCharacter,
+        state: GameState,
+        key: Optional[StateKey] = None,
+    ) -> Optional[DamageFormulaContext]:
+        """
+        Same as `ab.eval_effect(char, state)`. `key` must have been made from `state` if it's given.
+        """
+        ctx = self.lookup(ab, char, state, key)
+        if ctx is None:
+            return None
+        return ctx.copy()
+
+    def lookup(
+        self,
+        ab: WorldFlipperAbility,
+        char: WorldFlipperCharacter,
+        state: GameState,
+        key: Optional[StateKey] = None,
+    ) -> Optional[DamageFormulaContext]:
+        """
+        `eval_effect` without copying the result. The returned context is shared with the cache, so it
+        must not be modified.
+        """
+        if key is None:
+            key = StateKey(state)
+        plan = ab.plan()
+        memo_key = (
+            ab._table,
+            ab._row,
+            state.party.index(char),
+            key.party,
+            key.fields(plan.reads),
+        )
+        results = self._results
+        if memo_key in results:
+            self.hits += 1
+            results.move_to_end(memo_key)
+            return results[memo_key]
+
+        self.misses += 1
+        ctx = ab.eval_effect(char, state)
+        results[memo_key] = ctx
+        if len(results) > self.maxsize:
+            results.popitem(last=False)
+        return ctx
@@ -0,0 +1,236 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Tuple, Type, TYPE_CHECKING
+
+from wf.enum import Element, element_ab_to_enum
+from wf.effect.base_effect import (
+    EffectType,
+    WorldFlipperBaseCondition,
+    WorldFlipperBaseEffect,
+    _index_target_overrides,
+)
+from wf.effect.main_mapping import main_condition_mapping, main_effect_mapping
+from wf.effect.continuous_mapping import (
+    continuous_condition_mapping,
+    continuous_effect_mapping,
+)
+
+if TYPE_CHECKING:
+    from wf.ability import WorldFlipperAbility
+    from wf.timeline.events import EventKind
+
+# Ability levels that get a precomputed value. Anything outside of this falls back to calculating the
+# value on the fly.
+MAX_PLAN_LV = 6
+
+# (index, index type, target, element) as used by `WorldFlipperBaseEffect.eval`.
+EffectInfo = Tuple[str, EffectType, str, Optional[Element]]
+
+
+@dataclass(frozen=True)
+class AbilityPlan:
+    """
+    Everything about evaluating an ability that only depends on the ability's own data: which
+    condition/effect classes to run, parsed numbers, the value at every ability level and the resolved
+    targets and elements. Compiled once per ability by `WorldFlipperAbility.plan()`.
+    """
+
+    is_main: bool
+    requires_main: bool
+    # Whether the ability has no cooldown, which is the only case timed effects are simulated for.
+    no_cooldown: bool
+
+    condition_cls: Type[WorldFlipperBaseCondition]
+    effect_classes: Tuple[Type[WorldFlipperBaseEffect], ...]
+    condition_ui: list[str]
+    effect_ui: list[str]
+
+    condition_info: EffectInfo
+    effect_info: EffectInfo
+    # Target of the effect as it is in the data, before any overrides.
+    raw_effect_target: str
+    # Whether the effect's element applies to any unit. When it doesn't, `effect_element` is the only
+    # element it applies to.
+    effect_any_element: bool
+    effect_element: Optional[Element]
+    # Whether the condition comes out the same no matter which unit the ability is evaluated for, in
+    # which case its result can be shared between every unit of the party.
+    condition_shared: bool
+    # Every `GameState` field the condition and effects read, see `WorldFlipperBaseEffect.reads`.
+    reads: Tuple[str, ...]
+    # Kinds of events after which the ability has to be evaluated again, see
+    # `WorldFlipperBaseEffect.listens_to`.
+    listens_to: Tuple[EventKind, ...]
+
+    # Value of the condition/effect at each ability level (indexed by level), or None when the ability
+    # doesn't have numbers for it.
+    condition_values: Optional[Tuple[float, ...]]
+    effect_values: Optional[Tuple[float, ...]]
+    # How long a timed effect stays active at each ability level.
+    active_time_values: Optional[Tuple[float, ...]]
+
+
+def _int_or_none(ab: WorldFlipperAbility, field: str) -> Optional[int]:
+    try:
+        return ab.int_field(field)
+    except ValueError:
+        return None
+
+
+def level_values(
+    effect_min: Optional[int], effect_max: Optional[int]
+) -> Optional[Tuple[float, ...]]:
+    """
+    Same calculation as `WorldFlipperBaseEffect._calc_abil_lv` (before any multiplier is applied) for
+    every ability level.
+    """
+    if effect_min is None or effect_max is None:
+        return None
+    v_min = effect_min / 100_000
+    v_max = effect_max / 100_000
+    step = abs(v_max - v_min) / 5
+    return tuple(v_min + step * (lv - 1) for lv in range(MAX_PLAN_LV + 1))
+
+
+def _condition_info(ab: WorldFlipperAbility) -> EffectInfo:
+    if ab.is_main_effect():
+        index = ab.main_condition_index
+        index_type = EffectType.MAIN_CONDITION
+        target = ab.main_condition_target
+        # SPECIAL CASE: I *think* when an ability has "if self is a(n) <element> character", this
+        # gets set to 2 and then the random other element index gets set to an element. I first
+        # noticed this for Selene's AB5. The normal locations you would expect to have an element
+        # for a condition don't have elements set in them in this case.
+        if ab.party_condition_index == "2":
+            element = element_ab_to_enum(ab.party_condition_element)
+        elif target == "":
+            element = element_ab_to_enum(ab.condition_target_element)
+        else:
+            element = element_ab_to_enum(ab.main_condition_element)
+    else:
+        index = ab.continuous_condition_index
+        index_type = EffectType.CONTINUOUS_CONDITION
+        element = element_ab_to_enum(ab.continuous_condition_element)
+        target = ab.continuous_condition_target
+    if (index_type, index) in _index_target_overrides:
+        target = _index_target_overrides[(index_type, index)]
+    return index, index_type, target, element
+
+
+def _effect_info(ab: WorldFlipperAbility) -> EffectInfo:
+    if ab.is_main_effect():
+        index = ab.main_effect_index
+        index_type = EffectType.MAIN_EFFECT
+        element = element_ab_to_enum(ab.main_effect_element)
+        target = ab.main_effect_target
+    else:
+        index = ab.continuous_effect_index
+        index_type = EffectType.CONTINUOUS_EFFECT
+        element = element_ab_to_enum(ab.continuous_effect_element)
+        target = ab.continuous_effect_target
+    if (index_type, index) in _index_target_overrides:
+        target = _index_target_overrides[(index_type, index)]
+    return index, index_type, target, element
+
+
+def _condition_shared(
+    condition_cls: Type[WorldFlipperBaseCondition],
+    condition_target: str,
+    raw_effect_target: str,
+) -> bool:
+    # Conditions with their own `eval` could look at anything, don't make any assumptions about them.
+    if condition_cls.eval is not WorldFlipperBaseCondition.eval:
+        return False
+    # Mirrors the targets in `WorldFlipperBaseEffect.eval` that resolve to the evaluated unit.
+    match condition_target:
+        case "":
+            return False
+        case "5":
+            return raw_effect_target != "7"
+        case "7":
+            return raw_effect_target in ("0", "")
+    return True
+
+
+def compile_plan(ab: WorldFlipperAbility) -> AbilityPlan:
+    if ab.is_main_effect():
+        condition_mapping = main_condition_mapping
+        effect_mapping = main_effect_mapping
+    else:
+        condition_mapping = continuous_condition_mapping
+        effect_mapping = continuous_effect_mapping
+
+    condition_index = ab.condition_index()
+    if condition_index not in condition_mapping:
+        raise RuntimeError(
+            f"[{ab.name}] Unknown {ab.effect_type_name()} condition index: "
+            f"{condition_index}"
+        )
+    effect_index = ab.effect_index()
+    if effect_index not in effect_mapping:
+        raise RuntimeError(
+            f"[{ab.name}] Unknown {ab.effect_type_name()} effect index: "
+            f"{effect_index}"
+        )
+    condition_cls = condition_mapping[condition_index]
+    effect_classes = tuple(effect_mapping[effect_index])
+    effect_ui = []
+    for e in effect_classes:
+        for key in e.ui_key():
+            effect_ui.append(key)
+
+    if ab.is_main_effect():
+        prefix = "main"
+        raw_effect_target = ab.main_effect_target
+        raw_effect_element = ab.main_effect_element
+    else:
+        prefix = "continuous"
+        raw_effect_target = ab.continuous_effect_target
+        raw_effect_element = ab.continuous_effect_element
+    condition_values = level_values(
+        _int_or_none(ab, f"{prefix}_condition_min"),
+        _int_or_none(ab, f"{prefix}_condition_max"),
+    )
+    effect_values = level_values(
+        _int_or_none(ab, f"{prefix}_effect_min"),
+        _int_or_none(ab, f"{prefix}_effect_max"),
+    )
+    if ab.is_main_effect():
+        active_time_values = level_values(
+            _int_or_none(ab, "main_effect_duration_min"),
+            _int_or_none(ab, "main_effect_duration_max"),
+        )
+    else:
+        active_time_values = effect_values
+
+    effect_any_element = not raw_effect_element or raw_effect_element == "(None)"
+    condition_info = _condition_info(ab)
+    reads = set(condition_cls.reads)
+    listens_to = set(condition_cls.listens_to)
+    for e in effect_classes:
+        reads.update(e.reads)
+        listens_to.update(e.listens_to)
+    return AbilityPlan(
+        is_main=ab.is_main_effect(),
+        requires_main=ab.requires_main,
+        no_cooldown=ab.cooldown_time in ("", "0"),
+        condition_cls=condition_cls,
+        effect_classes=effect_classes,
+        condition_ui=condition_cls.ui_key(),
+        effect_ui=effect_ui,
+        condition_info=condition_info,
+        effect_info=_effect_info(ab),
+        raw_effect_target=raw_effect_target,
+        effect_any_element=effect_any_element,
+        effect_element=(
+            None if effect_any_element else element_ab_to_enum(raw_effect_element)
+        ),
+        condition_shared=_condition_shared(
+            condition_cls, condition_info[2], raw_effect_target
+        ),
+        reads=tuple(sorted(reads)),
+        listens_to=tuple(sorted(listens_to, key=lambda kind: kind.value)),
+        condition_values=condition_values,
+        effect_values=effect_values,
+        active_time_values=active_time_values,
+    )
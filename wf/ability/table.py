@@ -0,0 +1,133 @@
+from __future__ import annotations
+from array import array
+from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from wf.ability.plan import AbilityPlan
+
+# Number of entries in a single row of ability.json.
+ABILITY_ROW_LEN = 83
+
+# Columns that hold numbers, pre-parsed so that hot code never has to call `int()` on a string again.
+NUMERIC_COLUMNS = (
+    28,  # main_condition_min
+    29,  # main_condition_max
+    30,  # main_effect_max_multiplier
+    31,  # cooldown_time
+    45,  # main_effect_min
+    46,  # main_effect_max
+    51,  # main_effect_duration_min
+    52,  # main_effect_duration_max
+    53,  # main_effect_incremental_max_multiplier
+    64,  # continuous_condition_min
+    65,  # continuous_condition_max
+    66,  # continuous_effect_max_multiplier
+    76,  # continuous_effect_min
+    77,  # continuous_effect_max
+)
+
+# Stored in a numeric column when the raw value isn't a number ("", "(None)", etc.).
+MISSING = -(2**63)
+
+
+class AbilityTable:
+    """
+    Column store for every row of ability.json that belongs to a character in the database.
+
+    Every raw field is stored as an integer code into a single pool of interned strings, one contiguous
+    array per field, and fields that hold numbers additionally get a pre-parsed integer column.
+    `WorldFlipperAbility` is only a view of a single row in this table, so the whole ability database
+    costs a handful of arrays instead of 83 attributes on thousands of objects.
+    """
+
+    def __init__(self):
+        self.strings: list[str] = []
+        self._string_codes: dict[str, int] = {}
+        self.columns: list[array] = [array("I") for _ in range(ABILITY_ROW_LEN)]
+        self.numbers: dict[int, array] = {col: array("q") for col in NUMERIC_COLUMNS}
+        # Ability ID -> (first row, one past the last row) for every effect of that ability.
+        self.rows_by_id: dict[str, tuple[int, int]] = {}
+        self.row_ids = array("I")
+        # Compiled evaluation plans by row, see `WorldFlipperAbility.plan()`.
+        self.plans: dict[int, AbilityPlan] = {}
+
+    def __getstate__(self):
+        # Plans hold references to condition/effect classes, some of which are created on the fly and
+        # can't be pickled. They're cheap to compile again anyway.
+        state = self.__dict__.copy()
+        state["plans"] = {}
+        return state
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def intern(self, value: str) -> int:
+        code = self._string_codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.strings.append(value)
+            self._string_codes[value] = code
+        return code
+
+    def code(self, value: str) -> Optional[int]:
+        """
+        Returns the code for a string, or None if no row in the table holds that string (which means
+        comparing a column against it can never match).
+        """
+        return self._string_codes.get(value)
+
+    def add(self, ability_id: str, rows: list[list[str]]) -> tuple[int, int]:
+        if ability_id in self.rows_by_id:
+            return self.rows_by_id[ability_id]
+        start = len(self)
+        id_code = self.intern(ability_id)
+        for row in rows:
+            if len(row) != ABILITY_ROW_LEN:
+                raise RuntimeError(
+                    f"[{ability_id}] Expected {ABILITY_ROW_LEN} ability fields, got {len(row)}"
+                )
+            for col, value in enumerate(row):
+                self.columns[col].append(self.intern(value))
+            for col, numbers in self.numbers.items():
+                try:
+                    numbers.append(int(row[col]))
+                except ValueError:
+                    numbers.append(MISSING)
+            self.row_ids.append(id_code)
+        self.rows_by_id[ability_id] = (start, len(self))
+        return self.rows_by_id[ability_id]
+
+    def value(self, col: int, row: int) -> str:
+        return self.strings[self.columns[col][row]]
+
+    def number(self, col: int, row: int) -> int:
+        """
+        Same as `int(table.value(col, row))`, including raising a ValueError when the field isn't a
+        number, without having to parse anything.
+        """
+        n = self.numbers[col][row]
+        if n == MISSING:
+            raise ValueError(
+                f"invalid literal for int() with base 10: {self.value(col, row)!r}"
+            )
+        return n
+
+    def ability_id(self, row: int) -> str:
+        return self.strings[self.row_ids[row]]
+
+    def rows_where(self, col: int, value: str) -> Iterator[int]:
+        code = self.code(value)
+        if code is None:
+            return
+        column = self.columns[col]
+        for row in range(len(column)):
+            if column[row] == code:
+                yield row
+
+    def distinct(self, col: int, rows: Optional[Iterable[int]] = None) -> set[str]:
+        column = self.columns[col]
+        if rows is None:
+            codes = set(column)
+        else:
+            codes = {column[row] for row in rows}
+        return {self.strings[code] for code in codes}
@@ -1,10 +1,19 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
+import weakref
+
+import numpy as np
 
 from .enum import PowerFlip, Element
 
 if TYPE_CHECKING:
     from .ability import WorldFlipperAbility
+    from .ability.table import AbilityTable
+
+# Highest level and number of uncaps that the stat tables of a character cover, see
+# `WorldFlipperCharacter.attack_table`.
+MAX_LEVEL = 100
+MAX_UNCAPS = 4
 
 
 class WorldFlipperCharacter:
@@ -55,38 +64,116 @@ class WorldFlipperCharacter:
         self.skill_base_dmg = 0
         self.skill_base_cost = 0
         self.skill_evolve_cost = 0
+        # Stat tables by name, along with the (base stat, stars) they were built for.
+        self._stat_tables: dict[str, tuple[tuple[int, int], np.ndarray]] = {}
+
+    def set_ability_table(self, table: AbilityTable):
+        """
+        Hands the character the table holding its abilities, and builds the views of its rows.
+        """
+        from .ability import WorldFlipperAbility
+
+        abilities = []
+        for ability_id in self.ability_ids:
+            if ability_id == "(None)":
+                continue
+            start, stop = table.rows_by_id[ability_id]
+            # Use a weakref of the character to prevent a cycle. Should always be safe because
+            # once a character is no longer being referenced we should also no longer be able to
+            # access/use the ability.
+            abilities.append(
+                [
+                    WorldFlipperAbility(table, row, weakref.proxy(self))
+                    for row in range(start, stop)
+                ]
+            )
+        self.abilities = abilities
 
     def attack(self, evolved: bool, level: int, uncaps: int) -> float:
-        evol_atk = 0
-        if evolved:
-            if self.stars == 1:
-                evol_atk = 30
-            elif self.stars == 2:
-                evol_atk = 40
-            elif self.stars == 3:
-                evol_atk = 50
-            elif self.stars == 4:
-                evol_atk = 54
-            else:
-                evol_atk = 60
-
-        return self._calc_stat(self.base_atk, evol_atk, level, uncaps)
+        if 1 <= level <= MAX_LEVEL and 0 <= uncaps <= MAX_UNCAPS:
+            return self.attack_table.item(level - 1, uncaps, int(evolved))
+        return self._calc_stat(self.base_atk, self._evol_atk(evolved), level, uncaps)
 
     def hp(self, evolved: bool, level: int, uncaps: int) -> float:
-        evol_hp = 0
-        if evolved:
-            if self.stars == 1:
-                evol_hp = 150
-            elif self.stars == 2:
-                evol_hp = 200
-            elif self.stars == 3:
-                evol_hp = 250
-            elif self.stars == 4:
-                evol_hp = 270
-            else:
-                evol_hp = 300
-
-        return self._calc_stat(self.base_hp, evol_hp, level, uncaps)
+        if 1 <= level <= MAX_LEVEL and 0 <= uncaps <= MAX_UNCAPS:
+            return self.hp_table.item(level - 1, uncaps, int(evolved))
+        return self._calc_stat(self.base_hp, self._evol_hp(evolved), level, uncaps)
+
+    @property
+    def attack_table(self) -> np.ndarray:
+        """
+        `attack` at every level up to `MAX_LEVEL`, number of uncaps up to `MAX_UNCAPS` and whether the
+        character is evolved, indexed by `[level - 1, uncaps, evolved]`. Built the first time it's needed.
+        """
+        return self._stat_table("atk", self.base_atk, self._evol_atk)
+
+    @property
+    def hp_table(self) -> np.ndarray:
+        """
+        `hp` laid out the same way as `attack_table`.
+        """
+        return self._stat_table("hp", self.base_hp, self._evol_hp)
+
+    def _stat_table(
+        self, name: str, base_stat, evol_stat: Callable[[bool], int]
+    ) -> np.ndarray:
+        key = (base_stat, self.stars)
+        cached = self._stat_tables.get(name)
+        if cached is None or cached[0] != key:
+            levels = np.arange(1, MAX_LEVEL + 1)
+            stat_mult = np.select(
+                [levels <= 10, levels <= 80],
+                [levels / 10, 1 + (levels - 10) / 14],
+                6 + 3 * (levels - 80) / 100,
+            )
+            uncap_mult = 1 + np.arange(MAX_UNCAPS + 1) * self._uncap_mult()
+            evol = np.array([evol_stat(False), evol_stat(True)])
+            # Same operations in the same order as `_calc_stat`, so that the table holds the exact same
+            # values.
+            table = (
+                base_stat * stat_mult[:, None, None] * uncap_mult[None, :, None]
+                + evol[None, None, :]
+            )
+            cached = key, table
+            self._stat_tables[name] = cached
+        return cached[1]
+
+    def _evol_atk(self, evolved: bool) -> int:
+        if not evolved:
+            return 0
+        if self.stars == 1:
+            return 30
+        elif self.stars == 2:
+            return 40
+        elif self.stars == 3:
+            return 50
+        elif self.stars == 4:
+            return 54
+        return 60
+
+    def _evol_hp(self, evolved: bool) -> int:
+        if not evolved:
+            return 0
+        if self.stars == 1:
+            return 150
+        elif self.stars == 2:
+            return 200
+        elif self.stars == 3:
+            return 250
+        elif self.stars == 4:
+            return 270
+        return 300
+
+    def _uncap_mult(self) -> float:
+        if self.stars == 1:
+            return 0.4
+        elif self.stars == 2:
+            return 0.5
+        elif self.stars == 3:
+            return 0.8
+        elif self.stars == 4:
+            return 1.5
+        return 3.0
 
     def _calc_stat(self, base_stat, evol_stat, level: int, uncaps: int):
         if 1 <= level <= 10:
@@ -96,18 +183,20 @@ class WorldFlipperCharacter:
         else:
             stat_mult = 6 + 3 * (level - 80) / 100
 
-        if self.stars == 1:
-            uncap_mult = 0.4
-        elif self.stars == 2:
-            uncap_mult = 0.5
-        elif self.stars == 3:
-            uncap_mult = 0.8
-        elif self.stars == 4:
-            uncap_mult = 1.5
-        else:
-            uncap_mult = 3.0
+        return base_stat * stat_mult * (1 + uncaps * self._uncap_mult()) + evol_stat
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Stat tables are quick to build again, no need to store them.
+        state["_stat_tables"] = {}
+        return state
 
-        return base_stat * stat_mult * (1 + uncaps * uncap_mult) + evol_stat
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Abilities only hold a weakref to the character that owns them, which doesn't survive pickling.
+        for effects in self.abilities:
+            for ab in effects:
+                ab.from_char = weakref.proxy(self)
 
     def __eq__(self, other):
         if isinstance(other, WorldFlipperCharacter):
@@ -0,0 +1,148 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .dmg_formula import DamageFormulaContext
+    from .game_state import GameState
+
+# Every value `randomInt(0, 2)` of the damage formula can take, see `DamageFormulaContext._damage`. The
+# damage roll `randomFloat(-0.05, 0.05)` is uniform, which makes the damage for a given skill roll
+# uniform between the damage of the lowest and highest damage roll.
+SKILL_ROLLS = (0, 1, 2)
+DAMAGE_ROLL = 0.05
+
+
+@dataclass(frozen=True)
+class HitDistribution:
+    """
+    Distribution of the damage of a single hit: uniform from `low` to `high` of one of `ranges`, each with
+    its own chance.
+    """
+
+    # (chance, low, high) for each skill roll, or just one for damage that isn't from a skill.
+    ranges: tuple[tuple[float, float, float], ...]
+
+    @property
+    def mean(self) -> float:
+        return sum(chance * (low + high) / 2 for chance, low, high in self.ranges)
+
+    @property
+    def var(self) -> float:
+        second_moment = sum(
+            chance * (low * low + low * high + high * high) / 3
+            for chance, low, high in self.ranges
+        )
+        return max(0.0, second_moment - self.mean**2)
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.var))
+
+    @property
+    def low(self) -> float:
+        return min(low for _, low, _ in self.ranges)
+
+    @property
+    def high(self) -> float:
+        return max(high for _, _, high in self.ranges)
+
+    def cdf(self, x: np.ndarray | float) -> np.ndarray:
+        """
+        Chance of a hit dealing at most `x` damage.
+        """
+        x = np.asarray(x, dtype=float)
+        total = np.zeros(x.shape)
+        for chance, low, high in self.ranges:
+            if high > low:
+                total += chance * np.clip((x - low) / (high - low), 0, 1)
+            else:
+                total += chance * (x >= low)
+        return total
+
+    def total(self, hits: int, bins: int = 64) -> TotalDamageDistribution:
+        """
+        Distribution of the total damage of `hits` independent hits, by convolving the distribution of a
+        single hit (spread over `bins` bins) with itself `hits` times through an FFT.
+        """
+        low = self.low
+        width = (self.high - low) / bins
+        if hits == 0 or width == 0:
+            values = np.array([hits * low])
+            return TotalDamageDistribution(
+                hits, self.mean * hits, self.var * hits, values, np.ones(1), 0.0
+            )
+        # Chance of a hit falling into each bin, which stands in for the damage in the middle of the bin.
+        # That's off by a bit where the bin isn't uniformly filled, so move every bin by as much as it
+        # takes for the mean to be right.
+        pmf = np.diff(self.cdf(low + np.arange(bins + 1) * width))
+        centers = low + (np.arange(bins) + 0.5) * width
+        shift = self.mean - float(np.dot(pmf, centers))
+        size = hits * (bins - 1) + 1
+        n = 1 << (size - 1).bit_length()
+        total = np.fft.irfft(np.fft.rfft(pmf, n) ** hits, n)[:size]
+        total = np.clip(total, 0, None)
+        total /= total.sum()
+        values = hits * (centers[0] + shift) + np.arange(size) * width
+        return TotalDamageDistribution(
+            hits, self.mean * hits, self.var * hits, values, total, width
+        )
+
+
+@dataclass(frozen=True)
+class TotalDamageDistribution:
+    """
+    Distribution of the total damage of a number of hits. `mean` and `var` are exact, while `pmf` is the
+    chance of the total falling into the bin of `width` around each of `values`.
+    """
+
+    hits: int
+    mean: float
+    var: float
+    values: np.ndarray
+    pmf: np.ndarray
+    width: float
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.var))
+
+    def percentiles(self, percentiles: Sequence[float]) -> list[float]:
+        """
+        Total damage at each of `percentiles` (from 0 to 100).
+        """
+        # Chance of the total being at most the upper edge of each bin.
+        edges = np.concatenate(([self.values[0] - self.width / 2], self.values))
+        edges[1:] += self.width / 2
+        cdf = np.concatenate(([0.0], np.cumsum(self.pmf)))
+        return np.interp(np.asarray(percentiles) / 100, cdf, edges).tolist()
+
+    def percentile(self, percentile: float) -> float:
+        return self.percentiles([percentile])[0]
+
+
+def hit_distribution(
+    ctx: DamageFormulaContext,
+    state: Optional[GameState] = None,
+    atk: Optional[float] = None,
+) -> HitDistribution:
+    """
+    Distribution of the damage of a hit of `ctx` in `state`, which only needs to be given when its
+    `unitAttack` isn't (see `PreparedFormula.atk`). The lowest and highest damage are exactly those of
+    `DamageFormulaContext.calculate`.
+    """
+    if atk is None:
+        atk = ctx.unit_attack(state)
+    rolls = SKILL_ROLLS if ctx.created_by_skill_action else (0,)
+    return HitDistribution(
+        tuple(
+            (
+                1 / len(rolls),
+                ctx._damage(atk, roll, -DAMAGE_ROLL),
+                ctx._damage(atk, roll, DAMAGE_ROLL),
+            )
+            for roll in rolls
+        )
+    )
@@ -1,7 +1,11 @@
 from __future__ import annotations
+import copy
 from typing import Self, Optional, TYPE_CHECKING, Tuple
 
+import numpy as np
+
 from .enum import PowerFlip, Element
+from .party import unison_index
 
 if TYPE_CHECKING:
     from .character import WorldFlipperCharacter
@@ -14,6 +18,107 @@ BOW_MIDDLE = 2
 BOW_NEAR_RIGHT = 3
 BOW_FAR_RIGHT = 4
 
+# Number of combinations of bow power flip hits. Bit `BOW_*` of a bow hit mask is set when that part of
+# the power flip hits, see `DamageFormulaContext.bow_pf_hits`.
+BOW_MASKS = 1 << 5
+
+
+def bow_mask(bow_pf_hits: list[bool]) -> int:
+    return sum(1 << idx for idx, hit in enumerate(bow_pf_hits) if hit)
+
+
+def bow_hits(mask: int) -> list[bool]:
+    return [mask >> idx & 1 == 1 for idx in range(5)]
+
+
+def _pf_mod_dmg(pf_type: PowerFlip, charge_level: int, bow_pf_hits: list[bool]):
+    match pf_type:
+        case PowerFlip.SWORD:
+            match charge_level:
+                case 0:
+                    return 0
+                case 1:
+                    return 2.75 * 3
+                case 2:
+                    return 3.5 * 4
+                case 3:
+                    return 5.5 * 5
+
+        case PowerFlip.BOW:
+            match charge_level:
+                case 0:
+                    return 0
+                case 1:
+                    if bow_pf_hits[BOW_MIDDLE]:
+                        return 1.83 * 3
+                    return 0
+                case 2:
+                    total = 0
+                    if bow_pf_hits[BOW_NEAR_LEFT]:
+                        total += 0.5 * 2
+                    if bow_pf_hits[BOW_MIDDLE]:
+                        total += 2 * 4
+                    if bow_pf_hits[BOW_NEAR_RIGHT]:
+                        total += 0.5 * 2
+                    return total
+                case 3:
+                    total = 0
+                    if bow_pf_hits[BOW_FAR_LEFT]:
+                        total += 0.5 * 2
+                    if bow_pf_hits[BOW_NEAR_LEFT]:
+                        total += 1 * 3
+                    if bow_pf_hits[BOW_MIDDLE]:
+                        total += 2.5 * 4
+                    if bow_pf_hits[BOW_NEAR_RIGHT]:
+                        total += 1 * 3
+                    if bow_pf_hits[BOW_FAR_RIGHT]:
+                        total += 0.5 * 2
+                    return total
+
+        case PowerFlip.FIST:
+            match charge_level:
+                case 0:
+                    return 0
+                case 1:
+                    return 2.8 + 0.9 * 3
+                case 2:
+                    return 5.8 + 1.2 * 4
+                case 3:
+                    return 12.5 + 1.5 * 5
+
+        case PowerFlip.SPECIAL:
+            match charge_level:
+                case 0:
+                    return 0
+                case 1:
+                    return 5
+                case 2:
+                    return 7
+                case 3:
+                    return 13
+
+        case PowerFlip.SUPPORT:
+            if charge_level == 3:
+                return 4
+            return 0
+
+
+# `_pf_mod_dmg` for every (power flip type, charge level), by bow hit mask.
+_PF_MOD_DMG = {
+    (pf_type, charge_level): tuple(
+        _pf_mod_dmg(pf_type, charge_level, bow_hits(mask)) for mask in range(BOW_MASKS)
+    )
+    for pf_type in PowerFlip
+    for charge_level in range(4)
+}
+
+
+def pf_mod_dmg_by_bow_mask(pf_type: PowerFlip, charge_level: int) -> np.ndarray:
+    """
+    `DamageFormulaContext._calc_pf_mod_dmg` for every bow hit mask.
+    """
+    return np.array(_PF_MOD_DMG[pf_type, charge_level], dtype=float)
+
 
 class DamageFormulaContext:
     def __init__(self, char: Optional[WorldFlipperCharacter] = None, unison=None):
@@ -94,6 +199,15 @@ class DamageFormulaContext:
         self.stat_mod_ad_damage = 0
         self.element_damage_cut = 0
 
+    def copy(self) -> Self:
+        ctx = copy.copy(self)
+        # Everything is either immutable or a small list/dict of immutables, so copying those is enough
+        # for the copy to be independent.
+        for name, value in vars(ctx).items():
+            if isinstance(value, (list, dict)):
+                setattr(ctx, name, value.copy())
+        return ctx
+
     def combine(self, ctx: Self):
         # Always has a base of 1, so we need to combine only the potential difference from the base.
         self.stat_mod_pf_resist_mult += ctx.stat_mod_pf_resist_mult - 1
@@ -133,8 +247,9 @@ class DamageFormulaContext:
     def calculate(self, state: GameState) -> Tuple[float, float]:
         # Find the lowest possible random damage and the highest possible. Allows for displaying the full range
         # in a UI.
-        low_range = self._calculate_internal(state, 0, -0.05)
-        high_range = self._calculate_internal(state, 2, 0.05)
+        atk = self.unit_attack(state)
+        low_range = self._damage(atk, 0, -0.05)
+        high_range = self._damage(atk, 2, 0.05)
         return low_range, high_range
 
     def _calculate_internal(self, state: GameState, skill_rand, dmg_rand) -> float:
@@ -164,29 +279,15 @@ class DamageFormulaContext:
         22 - elementDamageCut
         23 * targetIsInvincible ? 0
         """
+        return self._damage(self.unit_attack(state), skill_rand, dmg_rand)
+
+    def _damage(self, atk: float, skill_rand, dmg_rand) -> float:
+        """
+        The formula of `_calculate_internal` for a given `unitAttack`.
+        """
         # All lines of Python are preceded by a comment with a number. That number corresponds to the same line in
         # the above formula.
-        if self.char is None:
-            raise RuntimeError(
-                "Can only calculate damage if formula was given a character."
-            )
-        char_idx = state.party.index(self.char)
-
         # 1
-        atk = self.char.attack(
-            state.is_evolved(self.char), state.levels[char_idx], state.uncaps[char_idx]
-        )
-        # Main units inherit a quarter of a unison's attack, make sure to include that in the calculation.
-        if self.unison is not None:
-            unison_idx = state.party.index(self.unison)
-            atk += (
-                self.unison.attack(
-                    state.is_evolved(self.unison),
-                    state.levels[unison_idx],
-                    state.uncaps[unison_idx],
-                )
-                * 0.25
-            )
         dmg = atk * (1 + max(-0.5, self.attack_modifier))
         # 2
         if self.created_by_skill_action:
@@ -260,76 +361,40 @@ class DamageFormulaContext:
         # 23: Ignore this line: We don't care about invincibility state.
         return dmg
 
+    def unit_attack(self, state: GameState) -> float:
+        """
+        The `unitAttack` of the damage formula: the character's attack, plus a quarter of their unison's.
+        """
+        if self.char is None:
+            raise RuntimeError(
+                "Can only calculate damage if formula was given a character."
+            )
+        party = state.party
+        char_idx = party.index(self.char)
+
+        atk = self.char.attack(
+            party.is_evolved(self.char), party.levels[char_idx], party.uncaps[char_idx]
+        )
+        # Main units inherit a quarter of a unison's attack, make sure to include that in the calculation.
+        if self.unison is not None:
+            unison_idx = party.index(self.unison)
+            atk += (
+                self.unison.attack(
+                    party.is_evolved(self.unison),
+                    party.levels[unison_idx],
+                    party.uncaps[unison_idx],
+                )
+                * 0.25
+            )
+        return atk
+
     def _calc_pf_mod_dmg(self):
-        match self.char.pf_type:
-            case PowerFlip.SWORD:
-                match self.charge_level:
-                    case 0:
-                        return 0
-                    case 1:
-                        return 2.75 * 3
-                    case 2:
-                        return 3.5 * 4
-                    case 3:
-                        return 5.5 * 5
-
-            case PowerFlip.BOW:
-                match self.charge_level:
-                    case 0:
-                        return 0
-                    case 1:
-                        if self.bow_pf_hits[BOW_MIDDLE]:
-                            return 1.83 * 3
-                        return 0
-                    case 2:
-                        total = 0
-                        if self.bow_pf_hits[BOW_NEAR_LEFT]:
-                            total += 0.5 * 2
-                        if self.bow_pf_hits[BOW_MIDDLE]:
-                            total += 2 * 4
-                        if self.bow_pf_hits[BOW_NEAR_RIGHT]:
-                            total += 0.5 * 2
-                        return total
-                    case 3:
-                        total = 0
-                        if self.bow_pf_hits[BOW_FAR_LEFT]:
-                            total += 0.5 * 2
-                        if self.bow_pf_hits[BOW_NEAR_LEFT]:
-                            total += 1 * 3
-                        if self.bow_pf_hits[BOW_MIDDLE]:
-                            total += 2.5 * 4
-                        if self.bow_pf_hits[BOW_NEAR_RIGHT]:
-                            total += 1 * 3
-                        if self.bow_pf_hits[BOW_FAR_RIGHT]:
-                            total += 0.5 * 2
-                        return total
-
-            case PowerFlip.FIST:
-                match self.charge_level:
-                    case 0:
-                        return 0
-                    case 1:
-                        return 2.8 + 0.9 * 3
-                    case 2:
-                        return 5.8 + 1.2 * 4
-                    case 3:
-                        return 12.5 + 1.5 * 5
-
-            case PowerFlip.SPECIAL:
-                match self.charge_level:
-                    case 0:
-                        return 0
-                    case 1:
-                        return 5
-                    case 2:
-                        return 7
-                    case 3:
-                        return 13
-
-            case PowerFlip.SUPPORT:
-                if self.charge_level == 3:
-                    return 4
-                return 0
+        hits = self.bow_pf_hits
+        mods = _PF_MOD_DMG.get((self.char.pf_type, self.charge_level))
+        if mods is None:
+            return _pf_mod_dmg(self.char.pf_type, self.charge_level, hits)
+        mask = hits[0] | hits[1] << 1 | hits[2] << 2 | hits[3] << 3 | hits[4] << 4
+        return mods[mask]
 
     def changed_values(self):
         out = []
@@ -443,3 +508,33 @@ class DamageFormulaContext:
         # TODO: Remaining attributes.
         out.append("== WF DAMAGE FORMULA END ==")
         return "\n".join(out)
+
+
+class PreparedFormula:
+    """
+    The part of the damage formula of the main unit in a party slot that only depends on the party, which
+    is their `unitAttack`. Calculating the damage of many contexts for the same unit with it skips
+    looking the unit and their unison up in the party every time, and is bit-for-bit identical to
+    `DamageFormulaContext.calculate`.
+
+    Everything else in the formula comes from the unit's context, so a prepared formula stays valid for
+    as long as the party doesn't change.
+    """
+
+    def __init__(self, state: GameState, slot: int):
+        party = state.party
+        self.char: Optional[WorldFlipperCharacter] = party[slot]
+        self.unison: Optional[WorldFlipperCharacter] = party[unison_index(slot)]
+        self.atk = DamageFormulaContext(self.char, self.unison).unit_attack(state)
+
+    def damage(self, ctx: DamageFormulaContext, skill_rand, dmg_rand) -> float:
+        """
+        `DamageFormulaContext._calculate_internal` of a context for this unit.
+        """
+        return ctx._damage(self.atk, skill_rand, dmg_rand)
+
+    def calculate(self, ctx: DamageFormulaContext) -> Tuple[float, float]:
+        """
+        `DamageFormulaContext.calculate` of a context for this unit.
+        """
+        return self.damage(ctx, 0, -0.05), self.damage(ctx, 2, 0.05)
@@ -0,0 +1,306 @@
+from __future__ import annotations
+from typing import Iterable, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from .dmg_formula import BOW_MASKS, pf_mod_dmg_by_bow_mask
+
+if TYPE_CHECKING:
+    from .dmg_formula import DamageFormulaContext
+    from .game_state import GameState
+
+# Fields of `DamageFormulaContext` that the damage formula reads, one array each in a batch.
+_FLOAT_FIELDS = (
+    "attack_modifier",
+    "total_resist",
+    "stat_mod_pinch_slayer",
+    "condition_slayer",
+    "character_slayer",
+    "stat_mod_adversity",
+    "attacker_fraction_health_lost",
+    "stat_mod_da_damage",
+    "stat_mod_da_resist_mult",
+    "stat_mod_additional_da_damage",
+    "stat_mod_additional_da_times",
+    "stat_mod_pf_damage",
+    "stat_mod_pf_resist_mult",
+    "stat_mod_pf_lv_damage_slayer",
+    "stat_mod_sd_damage",
+    "stat_mod_sd_resist_mult",
+    "skill_multiplier",
+    "skill_slayer",
+    "current_combos",
+    "total_coffin_counts",
+    "total_buff_counts",
+    "distance",
+    "stat_mod_ad_damage",
+    "stat_mod_ad_resist_mult",
+    "element_damage_cut",
+)
+_BOOL_FIELDS = (
+    "created_by_da",
+    "created_by_pf_action",
+    "created_by_skill_action",
+    "created_by_ad",
+    "weak",
+    "target_has_pinch",
+    "enables_combo_bonus",
+    "enables_coffin_count_bonus",
+    "enables_buff_count_bonus",
+    "enables_range_bonus",
+)
+
+
+# Fields that are multiplied together in the formula. In Python, when both sides of a multiplication are
+# ints the result is an int, which unlike a float never is -0. To come up with the exact same zero as the
+# scalar formula, a batch keeps track of which values were ints.
+_PRODUCT_FIELDS = (
+    "stat_mod_da_damage",
+    "stat_mod_da_resist_mult",
+    "stat_mod_additional_da_damage",
+    "stat_mod_pf_damage",
+    "stat_mod_pf_resist_mult",
+    "stat_mod_sd_damage",
+    "stat_mod_sd_resist_mult",
+    "skill_multiplier",
+    "skill_slayer",
+    "stat_mod_ad_damage",
+    "stat_mod_ad_resist_mult",
+)
+
+# A value along with whether it would have been an int in the scalar formula.
+_Term = Tuple[np.ndarray, np.ndarray]
+
+
+def _mul(lhs: _Term, rhs: _Term) -> _Term:
+    values = lhs[0] * rhs[0]
+    both_int = lhs[1] & rhs[1]
+    # Adding zero turns -0 into 0 and leaves everything else as is.
+    return np.where(both_int, values + 0.0, values), both_int
+
+
+class DamageFormulaBatch:
+    """
+    Struct-of-arrays form of many `DamageFormulaContext`s, which evaluates the damage formula for all of
+    them at once.
+
+    Every step is the same floating point operation in the same order as
+    `DamageFormulaContext._calculate_internal`, with branches turned into masks, so results are
+    bit-for-bit identical to calculating each context on its own.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        # `unitAttack` of each context, see `DamageFormulaContext.unit_attack`.
+        self.atk = np.zeros(size)
+        self.skill_base_dmg = np.zeros(size, dtype=np.int64)
+        self.charge_level = np.zeros(size, dtype=np.int64)
+        # `DamageFormulaContext._calc_pf_mod_dmg` of each context, only used where PF level damage applies.
+        self.pf_mod_dmg = np.zeros(size)
+        for name in _FLOAT_FIELDS:
+            setattr(self, name, np.zeros(size))
+        for name in _BOOL_FIELDS:
+            setattr(self, name, np.zeros(size, dtype=bool))
+        # Which values of each of `_PRODUCT_FIELDS` are ints.
+        self.is_int = {name: np.ones(size, dtype=bool) for name in _PRODUCT_FIELDS}
+
+    @classmethod
+    def from_contexts(
+        cls,
+        contexts: Sequence[DamageFormulaContext],
+        state: GameState | Iterable[GameState],
+    ) -> DamageFormulaBatch:
+        """
+        Builds a batch out of contexts, all evaluated against `state` or each against the state at the
+        same position in a sequence of states.
+        """
+        batch = cls(len(contexts))
+        if hasattr(state, "party"):
+            states: Iterable[GameState] = [state] * len(contexts)
+        else:
+            states = state
+        float_columns = {name: [] for name in _FLOAT_FIELDS}
+        bool_columns = {name: [] for name in _BOOL_FIELDS}
+        atk = []
+        skill_base_dmg = []
+        charge_level = []
+        pf_mod_dmg = []
+        # Contexts for the same unit in the same state all have the same attack.
+        atks: dict[tuple, float] = {}
+        for ctx, ctx_state in zip(contexts, states, strict=True):
+            atk_key = (id(ctx_state), id(ctx.char), id(ctx.unison))
+            if atk_key not in atks:
+                atks[atk_key] = ctx.unit_attack(ctx_state)
+            atk.append(atks[atk_key])
+            skill_base_dmg.append(ctx.char.skill_base_dmg)
+            charge_level.append(ctx.charge_level)
+            if ctx.created_by_pf_action and ctx.charge_level > 0:
+                pf_mod_dmg.append(ctx._calc_pf_mod_dmg())
+            else:
+                pf_mod_dmg.append(0)
+            for name, column in float_columns.items():
+                column.append(getattr(ctx, name))
+            for name, column in bool_columns.items():
+                column.append(getattr(ctx, name))
+
+        batch.atk[:] = atk
+        batch.skill_base_dmg[:] = skill_base_dmg
+        batch.charge_level[:] = charge_level
+        batch.pf_mod_dmg[:] = pf_mod_dmg
+        for name, column in float_columns.items():
+            getattr(batch, name)[:] = column
+        for name, column in bool_columns.items():
+            getattr(batch, name)[:] = column
+        for name in _PRODUCT_FIELDS:
+            batch.is_int[name][:] = [isinstance(v, int) for v in float_columns[name]]
+        return batch
+
+    @classmethod
+    def for_bow_masks(
+        cls, ctx: DamageFormulaContext, state: GameState
+    ) -> DamageFormulaBatch:
+        """
+        Batch of `ctx` with each bow hit mask, at the index of the mask (see `bow_mask`). Calculating it
+        gives the damage of a power flip of `ctx` for every combination of bow hits at once.
+        """
+        batch = cls.from_contexts([ctx] * BOW_MASKS, state)
+        if ctx.created_by_pf_action and ctx.charge_level > 0:
+            batch.pf_mod_dmg[:] = pf_mod_dmg_by_bow_mask(
+                ctx.char.pf_type, ctx.charge_level
+            )
+        return batch
+
+    def _term(self, name: str, plus_one: bool = False) -> _Term:
+        values = getattr(self, name)
+        if plus_one:
+            values = 1 + values
+        return values, self.is_int[name]
+
+    def __len__(self):
+        return self.size
+
+    def calculate(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `DamageFormulaContext.calculate` for every context in the batch.
+        """
+        low_range = self._calculate_internal(0, -0.05)
+        high_range = self._calculate_internal(2, 0.05)
+        return low_range, high_range
+
+    def _calculate_internal(self, skill_rand, dmg_rand) -> np.ndarray:
+        """
+        See `DamageFormulaContext._calculate_internal`, the numbered comments refer to the same lines of
+        the formula. `skill_rand` and `dmg_rand` can either be single values or one per context.
+        """
+        # Branches that aren't taken are still calculated for every context, and are allowed to divide by
+        # zero as long as the result isn't used.
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            # 1
+            dmg = self.atk * (1 + np.maximum(-0.5, self.attack_modifier))
+            # 2
+            dmg = np.where(
+                self.created_by_skill_action,
+                dmg + (skill_rand + self.skill_base_dmg),
+                dmg,
+            )
+            # 3
+            dmg = np.where(self.weak, dmg * 1.5, dmg)
+            # 4
+            dmg = np.where(
+                self.total_resist > 0,
+                dmg * (1 / (1 + self.total_resist)),
+                dmg * (1 - self.total_resist),
+            )
+            # 5
+            dmg = np.where(
+                self.target_has_pinch,
+                dmg * (1.5 * (1 + self.stat_mod_pinch_slayer)),
+                dmg,
+            )
+            # 7
+            dmg = dmg * (1 + self.condition_slayer)
+            # 8
+            dmg = dmg * (1 + self.character_slayer)
+            # 9
+            dmg = dmg * (
+                1 + self.stat_mod_adversity * self.attacker_fraction_health_lost
+            )
+            # 10, 11
+            da_mult = _mul(
+                _mul(
+                    self._term("stat_mod_da_damage", plus_one=True),
+                    self._term("stat_mod_da_resist_mult"),
+                ),
+                self._term("stat_mod_additional_da_damage", plus_one=True),
+            )[0]
+            dmg = np.where(
+                self.created_by_da,
+                dmg * (da_mult / self.stat_mod_additional_da_times),
+                dmg,
+            )
+            # 12
+            pf_mult = _mul(
+                self._term("stat_mod_pf_damage", plus_one=True),
+                self._term("stat_mod_pf_resist_mult"),
+            )[0]
+            dmg = np.where(self.created_by_pf_action, dmg * pf_mult, dmg)
+            # 13
+            pf_mod_dmg = np.where(
+                self.charge_level == 3,
+                self.pf_mod_dmg * (1 + self.stat_mod_pf_lv_damage_slayer),
+                self.pf_mod_dmg,
+            )
+            dmg = np.where(
+                self.created_by_pf_action & (self.charge_level > 0),
+                dmg * (1 + pf_mod_dmg),
+                dmg,
+            )
+            # 14 - 19
+            # 14, 15
+            sdmg = _mul(
+                _mul(
+                    _mul(
+                        self._term("stat_mod_sd_damage", plus_one=True),
+                        self._term("stat_mod_sd_resist_mult"),
+                    ),
+                    self._term("skill_multiplier"),
+                ),
+                self._term("skill_slayer", plus_one=True),
+            )[0]
+            # 16
+            sdmg = np.where(
+                self.enables_combo_bonus,
+                sdmg * (1 + 0.005 * self.current_combos),
+                sdmg,
+            )
+            # 17
+            sdmg = np.where(
+                self.enables_coffin_count_bonus,
+                sdmg * (1 + 0.026 * self.total_coffin_counts),
+                sdmg,
+            )
+            # 18
+            sdmg = np.where(
+                self.enables_buff_count_bonus,
+                sdmg * (1 + 0.1 * self.total_buff_counts),
+                sdmg,
+            )
+            # 19
+            sdmg = np.where(
+                self.enables_range_bonus,
+                sdmg
+                * (1 + np.minimum(0.5, self.distance * self.distance / 700)),
+                sdmg,
+            )
+            dmg = np.where(self.created_by_skill_action, dmg * sdmg, dmg)
+            # 20
+            ad_mult = _mul(
+                self._term("stat_mod_ad_damage", plus_one=True),
+                self._term("stat_mod_ad_resist_mult"),
+            )[0]
+            dmg = np.where(self.created_by_ad, dmg * ad_mult, dmg)
+            # 21
+            dmg = dmg * (1 + dmg_rand)
+            # 22
+            dmg = dmg - self.element_damage_cut
+        return dmg
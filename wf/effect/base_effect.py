@@ -6,12 +6,11 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 import math
 
-from wf.enum import (
-    CharPosition,
-    element_ab_to_enum,
-    AbilityElementType,
-)
-from wf.party import main_index, unison_index
+import numpy as np
+
+from wf.enum import CharPosition
+from wf.party import main_index, mains_only_index, unison_index
+from wf.timeline.events import EventKind
 
 if TYPE_CHECKING:
     from wf.ability import WorldFlipperAbility
@@ -45,21 +44,79 @@ _index_target_overrides: dict[Tuple[EffectType, str], str] = {
 }
 
 
+# State read by `WorldFlipperBaseEffect._check_timed`, and the events that change it other than time passing.
+TIMED_READS = ("ability_condition_active", "seconds_passed")
+TIMED_LISTENS_TO = (EventKind.ABILITY_ACTIVATED,)
+
+
 def simulate_timed_effect(
     state: GameState, time_to_activate: int, time_active: int
 ) -> bool:
-    if time_to_activate > state.seconds_passed:
+    return timed_effect_active(state.seconds_passed, time_to_activate, time_active)
+
+
+# A timed effect first activates `time_to_activate` seconds into the battle and then again every
+# `time_to_activate` seconds, each time staying active for `time_active` seconds (including the second it
+# activated on). When it stays active for at least as long as it takes to activate again, it never goes
+# away.
+def timed_effect_active(seconds: int, time_to_activate: int, time_active: int) -> bool:
+    """
+    Whether a timed effect is active `seconds` into the battle.
+    """
+    if time_to_activate > seconds:
         return False
-    time_remaining = state.seconds_passed - time_to_activate
-    time_to_activate -= time_active
-    while time_remaining >= 0:
-        if time_remaining <= time_active:
-            return True
-        time_remaining -= time_active
-        if time_remaining <= time_to_activate:
-            return False
-        time_remaining -= time_to_activate
-    return False
+    if time_to_activate <= 0 or time_active >= time_to_activate:
+        return True
+    periods, into_period = divmod(seconds - time_to_activate, time_to_activate)
+    if into_period == 0:
+        # Either the second it first activated on, or the second right after the previous activation ran
+        # out which is when it activates again.
+        return periods == 0
+    return into_period <= time_active
+
+
+def timed_effect_mask(
+    seconds: np.ndarray, time_to_activate: int, time_active: int
+) -> np.ndarray:
+    """
+    `timed_effect_active` for every one of an array of `seconds`.
+    """
+    seconds = np.asarray(seconds)
+    if time_to_activate <= 0 or time_active >= time_to_activate:
+        return seconds >= time_to_activate
+    periods, into_period = np.divmod(seconds - time_to_activate, time_to_activate)
+    return (seconds >= time_to_activate) & np.where(
+        into_period == 0, periods == 0, into_period <= time_active
+    )
+
+
+def timed_effect_uptime(
+    start: int, end: int, time_to_activate: int, time_active: int
+) -> float:
+    """
+    Fraction of the seconds from `start` up to (but not including) `end` that a timed effect is active
+    for.
+    """
+    if end <= start:
+        return 0.0
+    return (
+        _timed_effect_active_seconds(end, time_to_activate, time_active)
+        - _timed_effect_active_seconds(start, time_to_activate, time_active)
+    ) / (end - start)
+
+
+def _timed_effect_active_seconds(
+    seconds: int, time_to_activate: int, time_active: int
+) -> int:
+    # Number of seconds from 0 up to `seconds` that the effect is active for.
+    since_active = seconds - max(time_to_activate, 0)
+    if since_active <= 0:
+        return 0
+    if time_to_activate <= 0 or time_active >= time_to_activate:
+        return since_active
+    # The second it first activates on, and then `time_active` seconds out of every `time_to_activate`.
+    periods, into_period = divmod(since_active - 1, time_to_activate)
+    return 1 + periods * time_active + min(time_active, into_period)
 
 
 @dataclass
@@ -76,6 +133,13 @@ class EffectParams:
 
 class WorldFlipperBaseEffect(ABC):
     _is_condition = False
+    # `GameState` fields that evaluating this looks at, besides the party which everything depends on.
+    # Results are memoized on exactly these, see `EvalMemo`, so anything new that reads the state must be
+    # listed here.
+    reads: Tuple[str, ...] = ()
+    # Kinds of events that change any of `reads`, after which this has to be evaluated again. Time passing
+    # (`seconds_passed`) isn't an event of its own.
+    listens_to: Tuple[EventKind, ...] = ()
 
     @staticmethod
     @abstractmethod
@@ -105,42 +169,12 @@ class WorldFlipperBaseEffect(ABC):
         self.ability_main_idx = main_index(self.ability_char_idx)
         self.ability_char_position = self.state.party.position(self.ability_char)
         self.lv = self.state.party.ability_lvs[self.ability_char_idx][self.ability_idx]
+        self.plan = self.ability.plan()
 
     def _effect_info(self):
-        if self.ability.is_main_effect():
-            if self._is_condition:
-                index = self.ability.main_condition_index
-                index_type = EffectType.MAIN_CONDITION
-                target = self.ability.main_condition_target
-                # SPECIAL CASE: I *think* when an ability has "if self is a(n) <element> character", this
-                # gets set to 2 and then the random other element index gets set to an element. I first
-                # noticed this for Selene's AB5. The normal locations you would expect to have an element
-                # for a condition don't have elements set in them in this case.
-                if self.ability.party_condition_index == "2":
-                    element = element_ab_to_enum(self.ability.party_condition_element)
-                elif target == "":
-                    element = element_ab_to_enum(self.ability.condition_target_element)
-                else:
-                    element = element_ab_to_enum(self.ability.main_condition_element)
-            else:
-                index = self.ability.main_effect_index
-                index_type = EffectType.MAIN_EFFECT
-                element = element_ab_to_enum(self.ability.main_effect_element)
-                target = self.ability.main_effect_target
-        else:
-            if self._is_condition:
-                index = self.ability.continuous_condition_index
-                index_type = EffectType.CONTINUOUS_CONDITION
-                element = element_ab_to_enum(self.ability.continuous_condition_element)
-                target = self.ability.continuous_condition_target
-            else:
-                index = self.ability.continuous_effect_index
-                index_type = EffectType.CONTINUOUS_EFFECT
-                element = element_ab_to_enum(self.ability.continuous_effect_element)
-                target = self.ability.continuous_effect_target
-        if (index_type, index) in _index_target_overrides:
-            target = _index_target_overrides[(index_type, index)]
-        return index, index_type, target, element
+        if self._is_condition:
+            return self.plan.condition_info
+        return self.plan.effect_info
 
     def eval(self) -> bool:
         index, index_type, target, element = self._effect_info()
@@ -174,13 +208,7 @@ class WorldFlipperBaseEffect(ABC):
                 # SPECIAL CASE: Condition target 5 with effect target 7. This means that whenever an
                 # individual unit does a thing, it affects only itself.
                 if target == "5":
-                    if (
-                        self.ability.is_main_effect()
-                        and self.ability.main_effect_target == "7"
-                    ) or (
-                        self.ability.is_continuous_effect()
-                        and self.ability.continuous_effect_target == "7"
-                    ):
+                    if self.plan.raw_effect_target == "7":
                         main = self.state.party[self.eval_main_idx]
                         if main is None:
                             return False
@@ -208,13 +236,7 @@ class WorldFlipperBaseEffect(ABC):
 
                 # SPECIAL CASE: When the condition target is a triggering unit, and the effect target is
                 # a self unit (or a global effect), then we should check the entire party.
-                if (
-                    self.ability.is_main_effect()
-                    and self.ability.main_effect_target in ("0", "")
-                ) or (
-                    self.ability.is_continuous_effect()
-                    and self.ability.continuous_effect_target in ("0", "")
-                ):
+                if self.plan.raw_effect_target in ("0", ""):
                     char_idxs: list[int] = []
                     for idx, p in enumerate(self.state.party):
                         if p is None:
@@ -260,51 +282,63 @@ class WorldFlipperBaseEffect(ABC):
             if self.state.party[main] is not None:
                 yield main
 
+    def _only_main_columns(self, char_idxs: list[int]) -> Generator[int, None, None]:
+        """
+        Columns of `_only_mains`, for indexing state that has one entry per column (`direct_hits`,
+        `buffs`, etc.) rather than one per party slot.
+        """
+        for main in self._only_mains(char_idxs):
+            yield mains_only_index(main)
+
     def effect_min(self) -> int:
         if self._is_condition:
             if self.ability.is_main_effect():
-                return int(self.ability.main_condition_min)
+                return self.ability.int_field("main_condition_min")
             else:
-                return int(self.ability.continuous_condition_min)
+                return self.ability.int_field("continuous_condition_min")
         else:
             if self.ability.is_main_effect():
-                return int(self.ability.main_effect_min)
+                return self.ability.int_field("main_effect_min")
             else:
-                return int(self.ability.continuous_effect_min)
+                return self.ability.int_field("continuous_effect_min")
 
     def effect_max(self) -> int:
         if self._is_condition:
             if self.ability.is_main_effect():
-                return int(self.ability.main_condition_max)
+                return self.ability.int_field("main_condition_max")
             else:
-                return int(self.ability.continuous_condition_max)
+                return self.ability.int_field("continuous_condition_max")
         else:
             if self.ability.is_main_effect():
-                return int(self.ability.main_effect_max)
+                return self.ability.int_field("main_effect_max")
             else:
-                return int(self.ability.continuous_effect_max)
+                return self.ability.int_field("continuous_effect_max")
 
     def _check_timed(self):
         if self.state.ability_condition_active[self.ability_char_idx][self.ability_idx]:
             return True
-        if self.ability.cooldown_time in ("", "0") and self.state.seconds_passed >= 0:
-            if self.ability.is_main_effect():
-                time_to_activate = self._calc_abil_lv(
-                    effect_min=int(self.ability.main_condition_min),
-                    effect_max=int(self.ability.main_condition_max),
+        if self.plan.no_cooldown and self.state.seconds_passed >= 0:
+            if self.plan.is_main:
+                time_to_activate = self._lv_value(
+                    self.plan.condition_values,
+                    "main_condition_min",
+                    "main_condition_max",
                 )
-                time_active = self._calc_abil_lv(
-                    effect_min=int(self.ability.main_effect_duration_min),
-                    effect_max=int(self.ability.main_effect_duration_max),
+                time_active = self._lv_value(
+                    self.plan.active_time_values,
+                    "main_effect_duration_min",
+                    "main_effect_duration_max",
                 )
             else:
-                time_to_activate = self._calc_abil_lv(
-                    effect_min=int(self.ability.continuous_condition_min),
-                    effect_max=int(self.ability.continuous_condition_max),
+                time_to_activate = self._lv_value(
+                    self.plan.condition_values,
+                    "continuous_condition_min",
+                    "continuous_condition_max",
                 )
-                time_active = self._calc_abil_lv(
-                    effect_min=int(self.ability.continuous_effect_min),
-                    effect_max=int(self.ability.continuous_effect_max),
+                time_active = self._lv_value(
+                    self.plan.active_time_values,
+                    "continuous_effect_min",
+                    "continuous_effect_max",
                 )
             return simulate_timed_effect(
                 self.state, int(time_to_activate / 60), int(time_active / 60)
@@ -318,6 +352,16 @@ class WorldFlipperBaseEffect(ABC):
         Abilities generally have a linear increment on each level they gain on the mana board between a minimum
         and a maximum. This calculates the current value for an ability based on its current level.
         """
+        if effect_min is None and effect_max is None:
+            if self._is_condition:
+                values = self.plan.condition_values
+            else:
+                values = self.plan.effect_values
+            if values is not None and 0 <= self.lv < len(values):
+                amt = values[self.lv]
+                if not self._is_condition:
+                    amt *= self.multiplier
+                return amt
         if effect_min is None:
             effect_min = self.effect_min()
         if effect_max is None:
@@ -330,6 +374,23 @@ class WorldFlipperBaseEffect(ABC):
             amt *= self.multiplier
         return amt
 
+    def _lv_value(
+        self, values: Optional[Tuple[float, ...]], min_field: str, max_field: str
+    ):
+        """
+        `_calc_abil_lv` for a pair of fields other than the usual min/max, looked up in the ability's
+        precompiled per-level values when possible.
+        """
+        if values is not None and 0 <= self.lv < len(values):
+            amt = values[self.lv]
+            if not self._is_condition:
+                amt *= self.multiplier
+            return amt
+        return self._calc_abil_lv(
+            effect_min=self.ability.int_field(min_field),
+            effect_max=self.ability.int_field(max_field),
+        )
+
     def is_target_main(self) -> bool:
         if self.eval_char_position == CharPosition.LEADER:
             return True
@@ -340,6 +401,17 @@ class WorldFlipperBaseEffect(ABC):
 
 class WorldFlipperBaseCondition(WorldFlipperBaseEffect, ABC):
     _is_condition = True
+    # Conditions whose multiplier is `_calc_multiplier` of the ability's max multiplier and a single count
+    # out of the state set this to the field holding the count, and override `count()`. This lets the
+    # multiplier be calculated for many different counts at once, see `_calc_multipliers`.
+    count_field: Optional[str] = None
+
+    def count(self) -> Optional[int]:
+        """
+        The count out of `count_field` that the multiplier is based on, or None for conditions that
+        don't count anything.
+        """
+        return None
 
     def _calc_multiplier(self, cap: int, count: int) -> int:
         abil = self._calc_abil_lv()
@@ -348,6 +420,16 @@ class WorldFlipperBaseCondition(WorldFlipperBaseEffect, ABC):
             times = cap
         return times
 
+    def _calc_multipliers(self, cap: int, counts: np.ndarray) -> np.ndarray:
+        """
+        `_calc_multiplier` for every count in an array.
+        """
+        abil = self._calc_abil_lv()
+        if abil == 0:
+            raise ZeroDivisionError("division by zero")
+        times = np.floor(counts / abil).astype(np.int64)
+        return np.minimum(times, cap)
+
     def should_run(self) -> bool:
         if self.eval_char_position is None:
             return False
@@ -358,28 +440,19 @@ class WorldFlipperBaseCondition(WorldFlipperBaseEffect, ABC):
         # Don't apply an effect if it requires a character to be in a main slot and the unit is
         # a unison.
         if (
-            self.ability.requires_main
+            self.plan.requires_main
             and self.ability_char_position == CharPosition.UNISON
         ):
             return False
 
-        if self.ability.is_main_effect():
-            target = self.ability.main_effect_target
-            element = self.ability.main_effect_element
-        else:
-            target = self.ability.continuous_effect_target
-            element = self.ability.continuous_effect_element
         if not self._target_applies_to(
-            target,
-            element,
+            self.plan.raw_effect_target,
             self.eval_char,
         ):
             return False
         return True
 
-    def _target_applies_to(
-        self, target: str, element: AbilityElementType, char: WorldFlipperCharacter
-    ) -> bool:
+    def _target_applies_to(self, target: str, char: WorldFlipperCharacter) -> bool:
         # Abilities only ever apply to the main units in the party. Code should generally only ever be
         # trying to apply them to main units, but we want to make sure to guard against it here and
         # let tests that deliberately do the wrong thing pass so that we know the code is solid.
@@ -404,10 +477,10 @@ class WorldFlipperBaseCondition(WorldFlipperBaseEffect, ABC):
             case "2":
                 return char.position == CharPosition.LEADER
             case "5" | "7":
-                if not element or element == "(None)":
+                if self.plan.effect_any_element:
                     return True
                 else:
-                    return char.element == element_ab_to_enum(element)
+                    return char.element == self.plan.effect_element
             case "8":
                 # TODO: Implement multiball
                 return False
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from typing import Type
+from typing import Optional, Type
 import math
 
 from wf.enum import element_ab_to_enum
-from wf.effect.base_effect import WorldFlipperBaseCondition
-from wf.party import main_index, mains_only_index
+from wf.effect.base_effect import (
+    TIMED_LISTENS_TO,
+    TIMED_READS,
+    WorldFlipperBaseCondition,
+)
+from wf.party import mains_only_index
 from wf.status_effect import StatusEffectKind
+from wf.timeline.events import EventKind
 
 
 class OnBattleStartMainCondition(WorldFlipperBaseCondition):
@@ -22,41 +27,54 @@ class OnBattleStartMainCondition(WorldFlipperBaseCondition):
 
 
 def NTimesCondition(following_ui_name: str) -> Type[WorldFlipperBaseCondition]:
+    match following_ui_name:
+        case "ability_description_instant_trigger_kind_power_flip":
+            field = "total_powerflips"
+            kind = EventKind.POWER_FLIP
+        case "ability_description_instant_trigger_kind_skill_hit":
+            field = "skill_hits"
+            kind = EventKind.SKILL_HIT
+        case "ability_description_instant_trigger_kind_ball_flip":
+            field = "total_ball_flips"
+            kind = EventKind.BALL_FLIP
+        case _:
+            field = None
+            kind = None
+
     class _NTimesCondition(WorldFlipperBaseCondition):
+        reads = (field,) if field is not None else ()
+        listens_to = (kind,) if kind is not None else ()
+        count_field = field
+
         @staticmethod
         def ui_key() -> list[str]:
             return ["ability_description_n_times"]
 
+        def count(self) -> Optional[int]:
+            if field is None:
+                return None
+            if field == "skill_hits":
+                return self.state.skill_hits[self.ability_char_idx]
+            return getattr(self.state, field)
+
         def _apply_effect(self, char_idxs: list[int]) -> bool:
-            match following_ui_name:
-                case "ability_description_instant_trigger_kind_power_flip":
-                    self.multiplier = self._calc_multiplier(
-                        int(self.ability.main_effect_max_multiplier),
-                        self.state.total_powerflips,
-                    )
-
-                case "ability_description_instant_trigger_kind_skill_hit":
-                    self.multiplier = self._calc_multiplier(
-                        int(self.ability.main_effect_max_multiplier),
-                        self.state.skill_hits[self.ability_char_idx],
-                    )
-
-                case "ability_description_instant_trigger_kind_ball_flip":
-                    self.multiplier = self._calc_multiplier(
-                        int(self.ability.main_effect_max_multiplier),
-                        self.state.total_ball_flips,
-                    )
-
-                case _:
-                    raise RuntimeError(
-                        f"[{self.ability.name}] Failed to eval secondary condition: {self.ui_name[1]}"
-                    )
+            if field is None:
+                raise RuntimeError(
+                    f"[{self.ability.name}] Failed to eval secondary condition: {self.ui_name[1]}"
+                )
+            self.multiplier = self._calc_multiplier(
+                self.ability.int_field("main_effect_max_multiplier"),
+                self.count(),
+            )
             return True
 
     return _NTimesCondition
 
 
 class OnSkillInvokeMainCondition(WorldFlipperBaseCondition):
+    reads = ("skill_activations",)
+    listens_to = (EventKind.SKILL_ACTIVATED,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_skill_invoke"]
@@ -74,13 +92,16 @@ class OnSkillInvokeMainCondition(WorldFlipperBaseCondition):
         if self.ability.main_effect_max_multiplier == "(None)":
             max_mult = 9999
         else:
-            max_mult = int(self.ability.main_effect_max_multiplier)
+            max_mult = self.ability.int_field("main_effect_max_multiplier")
         if self.multiplier > max_mult:
             self.multiplier = max_mult
         return True
 
 
 class OnSkillGaugeReach100MainCondition(WorldFlipperBaseCondition):
+    reads = ("times_skill_reached_100",)
+    listens_to = (EventKind.SKILL_CHARGE_100,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_skill_max"]
@@ -90,13 +111,13 @@ class OnSkillGaugeReach100MainCondition(WorldFlipperBaseCondition):
         # Calling code has no idea that we might need to limit the indexes to just the main unit ones.
         # So we guard against the possibility of being handed, as an example, every unit in the party.
         # We also need to avoid double-counting any individual set of units in the party.
-        main_idxs: set[int] = set()
+        columns: set[int] = set()
         for idx in char_idxs:
-            main_idxs.add(main_index(idx))
-        for idx in main_idxs:
+            columns.add(mains_only_index(idx))
+        for col in columns:
             self.multiplier += self._calc_multiplier(
-                int(self.ability.main_effect_max_multiplier),
-                self.state.times_skill_reached_100[idx],
+                self.ability.int_field("main_effect_max_multiplier"),
+                self.state.times_skill_reached_100[col],
             )
         return True
 
@@ -108,26 +129,36 @@ class PartyMembersAddedMainCondition(WorldFlipperBaseCondition):
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         self.multiplier = self._calc_multiplier(
-            int(self.ability.main_effect_max_multiplier),
+            self.ability.int_field("main_effect_max_multiplier"),
             len(char_idxs),
         )
         return True
 
 
 class Lv3PowerFlipsMainCondition(WorldFlipperBaseCondition):
+    reads = ("powerflips_by_lv",)
+    listens_to = (EventKind.POWER_FLIP,)
+    count_field = "powerflips_by_lv"
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_power_flip_lv"]
 
+    def count(self) -> int:
+        return self.state.powerflips_by_lv[2]
+
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         self.multiplier = self._calc_multiplier(
-            int(self.ability.main_effect_max_multiplier),
-            self.state.powerflips_by_lv[2],
+            self.ability.int_field("main_effect_max_multiplier"),
+            self.count(),
         )
         return True
 
 
 class ComboReachedMainCondition(WorldFlipperBaseCondition):
+    reads = ("combos_reached",)
+    listens_to = (EventKind.COMBO_REACHED,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_combo"]
@@ -135,7 +166,7 @@ class ComboReachedMainCondition(WorldFlipperBaseCondition):
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         combo_req = self._calc_abil_lv()
         num_combos = self.state.combos_reached.get(combo_req, 0)
-        max_combos = int(self.ability.main_effect_max_multiplier)
+        max_combos = self.ability.int_field("main_effect_max_multiplier")
         if num_combos > max_combos:
             num_combos = max_combos
         if num_combos == 0:
@@ -145,6 +176,9 @@ class ComboReachedMainCondition(WorldFlipperBaseCondition):
 
 
 class EveryNSecondsMainCondition(WorldFlipperBaseCondition):
+    reads = TIMED_READS
+    listens_to = TIMED_LISTENS_TO
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["TODO"]
@@ -154,6 +188,9 @@ class EveryNSecondsMainCondition(WorldFlipperBaseCondition):
 
 
 class InFeverCondition(WorldFlipperBaseCondition):
+    reads = ("fever_active",)
+    listens_to = (EventKind.FEVER_START, EventKind.FEVER_END)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_fever"]
@@ -163,6 +200,9 @@ class InFeverCondition(WorldFlipperBaseCondition):
 
 
 class InPierceCondition(WorldFlipperBaseCondition):
+    reads = ("pierce_active",)
+    listens_to = (EventKind.PIERCE_ACTIVATED, EventKind.PIERCE_DEACTIVATED)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["TODO"]
@@ -172,6 +212,9 @@ class InPierceCondition(WorldFlipperBaseCondition):
 
 
 class OnAttackBuffActivateCondition(WorldFlipperBaseCondition):
+    reads = ("ability_condition_active",)
+    listens_to = (EventKind.ABILITY_ACTIVATED,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_condition"]
@@ -184,6 +227,9 @@ class OnAttackBuffActivateCondition(WorldFlipperBaseCondition):
 
 
 class OnCountDirectHitsCondition(WorldFlipperBaseCondition):
+    reads = ("direct_hits",)
+    listens_to = (EventKind.DIRECT_HIT,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_instant_trigger_kind_direct_attack"]
@@ -191,9 +237,9 @@ class OnCountDirectHitsCondition(WorldFlipperBaseCondition):
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         self.multiplier = 0
         amt = self._calc_abil_lv()
-        for idx in self._only_mains(char_idxs):
-            if self.state.direct_hits[idx] >= amt:
-                self.multiplier += math.floor(self.state.direct_hits[idx] / amt)
+        for col in self._only_main_columns(char_idxs):
+            if self.state.direct_hits[col] >= amt:
+                self.multiplier += math.floor(self.state.direct_hits[col] / amt)
         if self.multiplier == 0:
             return False
         return True
@@ -227,6 +273,8 @@ class HPAbovePercentCondition(WorldFlipperBaseCondition):
 
 
 class MultiballCountCondition(WorldFlipperBaseCondition):
+    reads = ("num_multiballs",)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_during_trigger_kind_multiball"]
@@ -236,41 +284,48 @@ class MultiballCountCondition(WorldFlipperBaseCondition):
 
 
 class BuffActiveCondition(WorldFlipperBaseCondition):
+    reads = ("buffs",)
+    listens_to = (EventKind.GAINED_BUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_during_trigger_kind_condition"]
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         for idx in char_idxs:
-            if len(self.state.buffs[main_index(idx)]) == 0:
+            if len(self.state.buffs[mains_only_index(idx)]) == 0:
                 return False
         return True
 
 
 class AttackBuffActiveCondition(WorldFlipperBaseCondition):
+    reads = ("buffs",)
+    listens_to = (EventKind.GAINED_BUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_during_trigger_kind_condition"]
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
-        for idx in self._only_mains(char_idxs):
-            try:
-                self.state.buffs[idx].index(StatusEffectKind.ATTACK)
-            except ValueError:
+        for col in self._only_main_columns(char_idxs):
+            if StatusEffectKind.ATTACK not in self.state.buffs[col]:
                 return False
         return True
 
 
 class AttackBuffsOnSelfCondition(WorldFlipperBaseCondition):
+    reads = ("buffs",)
+    listens_to = (EventKind.GAINED_BUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_during_trigger_kind_condition_high_count"]
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         self.multiplier = 0
-        for idx in self._only_mains(char_idxs):
+        for col in self._only_main_columns(char_idxs):
             self.multiplier += (
-                self.state.buffs[idx].count(StatusEffectKind.ATTACK)
+                self.state.buffs[col].count(StatusEffectKind.ATTACK)
                 * self._calc_abil_lv()
             )
         if self.multiplier == 0:
@@ -279,6 +334,9 @@ class AttackBuffsOnSelfCondition(WorldFlipperBaseCondition):
 
 
 class SkillGaugeAboveCondition(WorldFlipperBaseCondition):
+    reads = ("skill_charge",)
+    listens_to = (EventKind.SKILL_CHARGE_ADD,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_during_trigger_kind_skill_gauge_high"]
@@ -286,12 +344,15 @@ class SkillGaugeAboveCondition(WorldFlipperBaseCondition):
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         amt = self._calc_abil_lv()
         for idx in char_idxs:
-            if self.state.skill_charge[main_index(idx)] <= amt:
+            if self.state.skill_charge[mains_only_index(idx)] <= amt:
                 return False
         return True
 
 
 class DebuffsOnEnemyCondition(WorldFlipperBaseCondition):
+    reads = ("enemy",)
+    listens_to = (EventKind.GAINED_DEBUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return [
@@ -307,6 +368,9 @@ class DebuffsOnEnemyCondition(WorldFlipperBaseCondition):
 
 
 class PierceActiveCondition(WorldFlipperBaseCondition):
+    reads = ("pierce_active",)
+    listens_to = (EventKind.PIERCE_ACTIVATED, EventKind.PIERCE_DEACTIVATED)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_during_trigger_kind_condition"]
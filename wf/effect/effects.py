@@ -4,8 +4,18 @@ from typing import Type
 from abc import ABC
 
 from wf.enum import CharPosition, Element, element_ab_to_enum
-from wf.status_effect import StatusEffectKind
-from wf.effect.base_effect import WorldFlipperBaseEffect
+from wf.status_effect import StatusEffectKind, status_mask
+from wf.effect.base_effect import (
+    TIMED_LISTENS_TO,
+    TIMED_READS,
+    WorldFlipperBaseEffect,
+)
+from wf.timeline.events import EventKind
+
+# Debuffs on the enemy that effects check for, see `StatusEffects.has_any`.
+_FIRE_RESIST = status_mask((StatusEffectKind.ELEMENT_RESIST, Element.FIRE))
+_POISON = status_mask(StatusEffectKind.POISON)
+_SLOW = status_mask(StatusEffectKind.SLOW)
 
 
 def NoOpMainEffect(ui_key: list[str]) -> Type[WorldFlipperBaseEffect]:
@@ -24,6 +34,9 @@ def NoOpMainEffect(ui_key: list[str]) -> Type[WorldFlipperBaseEffect]:
 
 
 class ActiveForSecondsMainEffect(WorldFlipperBaseEffect):
+    reads = TIMED_READS
+    listens_to = TIMED_LISTENS_TO
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_for_second"]
@@ -85,6 +98,9 @@ class FireResistDebuffSlayerMainEffect(WorldFlipperBaseEffect):
     is effectively hard-coded to be for Fire Debuffs.
     """
 
+    reads = ("enemy",)
+    listens_to = (EventKind.GAINED_DEBUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_common_content_condition_slayer"]
@@ -92,17 +108,16 @@ class FireResistDebuffSlayerMainEffect(WorldFlipperBaseEffect):
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         if self.state.enemy is None:
             return False
-        try:
-            self.state.enemy.debuffs.index(
-                (StatusEffectKind.ELEMENT_RESIST, Element.FIRE)
-            )
-            self.ctx.condition_slayer += self._calc_abil_lv()
-            return True
-        except ValueError:
+        if not self.state.enemy.debuffs.has_any(_FIRE_RESIST):
             return False
+        self.ctx.condition_slayer += self._calc_abil_lv()
+        return True
 
 
 class PoisonSlayerMainEffect(WorldFlipperBaseEffect):
+    reads = ("enemy",)
+    listens_to = (EventKind.GAINED_DEBUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_common_content_condition_slayer"]
@@ -112,15 +127,16 @@ class PoisonSlayerMainEffect(WorldFlipperBaseEffect):
             return False
         if self.state.enemy is None:
             return False
-        try:
-            self.state.enemy.debuffs.index(StatusEffectKind.POISON)
-            self.ctx.condition_slayer += self._calc_abil_lv()
-            return True
-        except ValueError:
+        if not self.state.enemy.debuffs.has_any(_POISON):
             return False
+        self.ctx.condition_slayer += self._calc_abil_lv()
+        return True
 
 
 class PoisonAttackMainEffect(WorldFlipperBaseEffect):
+    reads = ("enemy",)
+    listens_to = (EventKind.GAINED_DEBUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_common_content_condition_slayer_for_attack"]
@@ -130,15 +146,16 @@ class PoisonAttackMainEffect(WorldFlipperBaseEffect):
             return False
         if self.state.enemy is None:
             return False
-        try:
-            self.state.enemy.debuffs.index(StatusEffectKind.POISON)
-            self.ctx.attack_modifier += self._calc_abil_lv()
-            return True
-        except ValueError:
+        if not self.state.enemy.debuffs.has_any(_POISON):
             return False
+        self.ctx.attack_modifier += self._calc_abil_lv()
+        return True
 
 
 class PoisonDirectAttackMainEffect(WorldFlipperBaseEffect):
+    reads = ("enemy",)
+    listens_to = (EventKind.GAINED_DEBUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_common_content_condition_slayer_for_direct_attack"]
@@ -148,15 +165,16 @@ class PoisonDirectAttackMainEffect(WorldFlipperBaseEffect):
             return False
         if self.state.enemy is None:
             return False
-        try:
-            self.state.enemy.debuffs.index(StatusEffectKind.POISON)
-            self.ctx.stat_mod_da_damage += self._calc_abil_lv()
-            return True
-        except ValueError:
+        if not self.state.enemy.debuffs.has_any(_POISON):
             return False
+        self.ctx.stat_mod_da_damage += self._calc_abil_lv()
+        return True
 
 
 class SlowDebuffSlayerMainEffect(WorldFlipperBaseEffect):
+    reads = ("enemy",)
+    listens_to = (EventKind.GAINED_DEBUFF,)
+
     @staticmethod
     def ui_key() -> list[str]:
         return ["ability_description_common_content_condition_slayer"]
@@ -164,12 +182,10 @@ class SlowDebuffSlayerMainEffect(WorldFlipperBaseEffect):
     def _apply_effect(self, char_idxs: list[int]) -> bool:
         if self.state.enemy is None:
             return False
-        try:
-            self.state.enemy.debuffs.index(StatusEffectKind.SLOW)
-            self.ctx.condition_slayer += self._calc_abil_lv()
-            return True
-        except ValueError:
+        if not self.state.enemy.debuffs.has_any(_SLOW):
             return False
+        self.ctx.condition_slayer += self._calc_abil_lv()
+        return True
 
 
 class Lv3PowerFlipDamageMainEffect(WorldFlipperBaseEffect):
@@ -230,8 +246,8 @@ class IncreaseSkillChargeMainEffect(WorldFlipperBaseEffect):
         return ["ability_description_instant_content_skill_gauge"]
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
-        for idx in self._only_mains(char_idxs):
-            self.ctx.skill_charge[idx] += self._calc_abil_lv()
+        for col in self._only_main_columns(char_idxs):
+            self.ctx.skill_charge[col] += self._calc_abil_lv()
         return True
 
 
@@ -241,8 +257,8 @@ class SkillChargeRateEffect(WorldFlipperBaseEffect):
         return ["ability_description_common_content_skill_gauge_chaging"]
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
-        for idx in self._only_mains(char_idxs):
-            self.ctx.skill_charge_speed[idx] += self._calc_abil_lv()
+        for col in self._only_main_columns(char_idxs):
+            self.ctx.skill_charge_speed[col] += self._calc_abil_lv()
         return True
 
 
@@ -252,8 +268,8 @@ class SecondSkillGaugeMainEffect(WorldFlipperBaseEffect):
         return ["ability_description_common_content_second_skill_gauge"]
 
     def _apply_effect(self, char_idxs: list[int]) -> bool:
-        for idx in self._only_mains(char_idxs):
-            self.ctx.skill_gauge_max[idx] += 100
+        for col in self._only_main_columns(char_idxs):
+            self.ctx.skill_gauge_max[col] += 100
         return True
 
 
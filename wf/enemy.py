@@ -1,4 +1,27 @@
+from __future__ import annotations
+from typing import Iterable
+import copy
+
+from .party import copy_containers
+from .status_effect import StatusEffect, StatusEffects
+
+
 class Enemy:
     def __init__(self):
         self.element = None
-        self.debuffs = []
+        self._debuffs = StatusEffects()
+
+    @property
+    def debuffs(self) -> StatusEffects:
+        return self._debuffs
+
+    @debuffs.setter
+    def debuffs(self, debuffs: Iterable[StatusEffect]):
+        if not isinstance(debuffs, StatusEffects):
+            debuffs = StatusEffects(debuffs)
+        self._debuffs = debuffs
+
+    def fork(self) -> Enemy:
+        forked = copy.copy(self)
+        forked._debuffs = copy_containers(self._debuffs, {})
+        return forked
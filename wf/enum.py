@@ -31,6 +31,14 @@ class CharPosition(StrEnum):
         return self == CharPosition.LEADER or self == CharPosition.MAIN
 
 
+class DamageSource(StrEnum):
+    # Each corresponds to one of the `created_by_*` flags of the damage formula.
+    DIRECT_ATTACK = auto()
+    POWER_FLIP = auto()
+    SKILL = auto()
+    ABILITY = auto()
+
+
 AbilityElementType = Literal["Red", "Yellow", "Green", "Blue", "White", "Black"]
 
 
@@ -1,13 +1,25 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Tuple
+import copy
 
 from .character import WorldFlipperCharacter
-from .party import Party
+from .party import Party, copy_containers
+from .status_effect import StatusEffects
 
 if TYPE_CHECKING:
     from .ability import WorldFlipperAbility
     from .enemy import Enemy
 
+# Fields with one entry per party slot, and one entry per column.
+SLOT_FIELDS = ("ability_condition_active", "skill_hits", "skill_activations")
+COLUMN_FIELDS = (
+    "times_skill_reached_100",
+    "skill_gauge_max",
+    "skill_charge",
+    "direct_hits",
+    "buffs",
+)
+
 
 class GameState:
     def __init__(self):
@@ -31,12 +43,40 @@ class GameState:
         self.direct_hits = [0] * 3
         self.total_direct_hits = 0
         self.num_multiballs = 0
-        self.buffs = [[], [], []]
+        self.buffs = [StatusEffects(), StatusEffects(), StatusEffects()]
         self.combos_reached: dict[int, int] = {}
         self.fever_active = False
         self.pierce_active = False
         self.enemy: Optional[Enemy] = None
 
+    def fork(self) -> GameState:
+        """
+        Copy of the state to try out a variation of it, at a fraction of the cost of `copy.deepcopy`.
+        Counters, the party and the enemy are copied, while characters, abilities and status effects are
+        shared with the original since they're never modified.
+        """
+        forked = copy.copy(self)
+        memo: dict[int, Any] = {}
+        for name, value in vars(self).items():
+            setattr(forked, name, copy_containers(value, memo))
+        forked.party = self.party.fork()
+        if self.enemy is not None:
+            forked.enemy = self.enemy.fork()
+        return forked
+
+    def columns_interchangeable(self, fields: Iterable[str]) -> bool:
+        """
+        Whether swapping columns 1 and 2 of the party (along with their entries in the state) leaves
+        every one of `fields` as is.
+        """
+        for name in fields:
+            value = getattr(self, name)
+            if name in SLOT_FIELDS and value[2:4] != value[4:6]:
+                return False
+            if name in COLUMN_FIELDS and value[1] != value[2]:
+                return False
+        return True
+
     def set_powerflips(self, lv: int, count: int):
         self.powerflips_by_lv[lv - 1] = count
         self.total_powerflips = sum(self.powerflips_by_lv)
@@ -45,5 +85,5 @@ class GameState:
         if isinstance(char, int):
             self.skill_activations[char] = count
         else:
-            self.skill_activations[self._party.index(char)] = count
+            self.skill_activations[self.party.index(char)] = count
         self.total_skill_activations = sum(self.skill_activations)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Optional, Sequence, TYPE_CHECKING
+
+import numpy as np
+
+from .enum import DamageSource
+from .simulation import BattleSimulation
+from .timeline import Event, EventKind, WorldFlipperTimeline
+from .timeline.events import TICKS_PER_SECOND
+
+if TYPE_CHECKING:
+    from .game_state import GameState
+
+
+@dataclass(frozen=True)
+class FightProfile:
+    """
+    How a fight tends to play out. Every run of `monte_carlo` samples its own timeline of events from this.
+    """
+
+    seconds: float = 180
+    # Ball flips happen at random times (a Poisson process), this many per second on average.
+    flips_per_second: float = 1.0
+    # Chance of a flip ending with the ball hitting the enemy, which adds to the combo.
+    direct_hit_chance: float = 0.8
+    # Chance of the combo breaking on a flip.
+    combo_break_chance: float = 0.02
+    # Flips it takes to charge up a power flip, and the relative chance of it being each level.
+    flips_per_powerflip: int = 12
+    pf_level_weights: tuple[float, float, float] = (0.2, 0.3, 0.5)
+    # Skill charge every main unit gets from a direct hit, and how many times a skill hits.
+    skill_charge_per_hit: int = 4
+    skill_hits: int = 1
+
+    def sample(self, rng: np.random.Generator, columns: Sequence[int]) -> list[Event]:
+        """
+        A random timeline of a fight with main units in `columns`.
+        """
+        flips = rng.poisson(self.flips_per_second * self.seconds)
+        times = np.sort(rng.uniform(0, self.seconds, flips))
+        ticks = (times * TICKS_PER_SECOND).astype(np.int64).tolist()
+        direct = (rng.random(flips) < self.direct_hit_chance).tolist()
+        breaks = (rng.random(flips) < self.combo_break_chance).tolist()
+        weights = np.array(self.pf_level_weights, dtype=float)
+        powerflips = flips // max(1, self.flips_per_powerflip) + 1
+        pf_levels = rng.choice([1, 2, 3], powerflips, p=weights / weights.sum())
+        pf_levels = pf_levels.tolist()
+
+        events = []
+        combo = 0
+        flips_charged = 0
+        skill_charge = {col: 0 for col in columns}
+        for tick, hit, broke in zip(ticks, direct, breaks):
+            events.append(_event(EventKind.BALL_FLIP, tick))
+            if broke:
+                combo = 0
+            if hit:
+                combo += 1
+                events.append(_event(EventKind.DIRECT_HIT, tick))
+                events.append(_event(EventKind.COMBO_REACHED, tick, count=combo))
+                for col in columns:
+                    skill_charge[col] += self.skill_charge_per_hit
+                    charge = _event(EventKind.SKILL_CHARGE_ADD, tick, skill_unit=col)
+                    charge.count = self.skill_charge_per_hit
+                    events.append(charge)
+                    if skill_charge[col] < 100:
+                        continue
+                    skill_charge[col] -= 100
+                    for kind in (EventKind.SKILL_CHARGE_100, EventKind.SKILL_ACTIVATED):
+                        events.append(_event(kind, tick, skill_unit=col))
+                    # Activating the skill uses up the gauge, which keeps the state's `skill_charge` the
+                    # same as the charge sampled here.
+                    spent = _event(EventKind.SKILL_CHARGE_ADD, tick, skill_unit=col)
+                    spent.count = -100
+                    events.append(spent)
+                    skill_hit = _event(EventKind.SKILL_HIT, tick, skill_unit=col)
+                    skill_hit.count = self.skill_hits
+                    events.append(skill_hit)
+            flips_charged += 1
+            if flips_charged == self.flips_per_powerflip:
+                flips_charged = 0
+                level = pf_levels.pop()
+                for kind in (EventKind.POWER_FLIP, EventKind.POWER_FLIP_HIT):
+                    events.append(_event(kind, tick, powerflip_level=level))
+        return events
+
+
+def _event(kind: EventKind, time: int, **kwargs) -> Event:
+    event = Event(kind)
+    event.time_activated = time
+    for name, value in kwargs.items():
+        setattr(event, name, value)
+    return event
+
+
+@dataclass(frozen=True)
+class DamageStats:
+    mean: float
+    std: float
+    # Value at each of the requested percentiles.
+    percentiles: dict[float, float]
+    # Confidence interval of the mean.
+    ci_low: float
+    ci_high: float
+
+
+@dataclass
+class MonteCarloResult:
+    # Damage of each source, one entry per run. See `BattleSimulation.damage`.
+    damage: dict[DamageSource, np.ndarray]
+
+    @property
+    def total(self) -> np.ndarray:
+        return np.sum([self.damage[source] for source in DamageSource], axis=0)
+
+    def stats(
+        self,
+        source: Optional[DamageSource] = None,
+        percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+        confidence: float = 0.95,
+    ) -> DamageStats:
+        """
+        Statistics of the damage of a single source, or of the total damage of every source.
+        """
+        samples = self.total if source is None else self.damage[source]
+        mean = float(samples.mean())
+        std = float(samples.std(ddof=1)) if len(samples) > 1 else 0.0
+        # The mean of enough runs is normally distributed, whatever the distribution of the runs.
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        margin = z * std / np.sqrt(len(samples))
+        values = np.percentile(samples, percentiles).tolist()
+        return DamageStats(
+            mean, std, dict(zip(percentiles, values)), mean - margin, mean + margin
+        )
+
+
+# State and profile of the current worker process, see `monte_carlo`.
+_worker_state: Optional[GameState] = None
+_worker_profile: Optional[FightProfile] = None
+
+
+def _init_worker(state: GameState, profile: FightProfile):
+    global _worker_state, _worker_profile
+    _worker_state = state
+    _worker_profile = profile
+
+
+def _run(
+    state: GameState, profile: FightProfile, seed: np.random.SeedSequence
+) -> list[float]:
+    columns = [col for col in range(3) if state.party[col * 2] is not None]
+    timeline = WorldFlipperTimeline()
+    timeline.add_events(profile.sample(np.random.default_rng(seed), columns))
+    sim = BattleSimulation(state, timeline)
+    sim.run()
+    damage = sim.damage
+    return [damage[source] for source in DamageSource]
+
+
+def _run_chunk(seeds: list[np.random.SeedSequence]) -> list[list[float]]:
+    return [_run(_worker_state, _worker_profile, seed) for seed in seeds]
+
+
+def monte_carlo(
+    state: GameState,
+    runs: int,
+    profile: FightProfile = FightProfile(),
+    seed: int = 0,
+    workers: Optional[int] = None,
+    chunk_size: int = 16,
+) -> MonteCarloResult:
+    """
+    Simulates `runs` fights of the party in `state`, each on its own random timeline sampled from
+    `profile`, spread over a pool of `workers` processes (one per core for None).
+
+    Every run gets its own seed, spawned from `seed`, so the results only depend on `seed` and never on
+    how the runs are split between workers.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(runs)
+    if workers == 1:
+        rows = [_run(state, profile, s) for s in seeds]
+    else:
+        chunks = [seeds[i : i + chunk_size] for i in range(0, runs, chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(state, profile)
+        ) as executor:
+            rows = [row for chunk in executor.map(_run_chunk, chunks) for row in chunk]
+
+    damage = np.array(rows, dtype=float).reshape(runs, len(DamageSource))
+    return MonteCarloResult(
+        {source: damage[:, idx] for idx, source in enumerate(DamageSource)}
+    )
@@ -1,8 +1,10 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional, Tuple, Self
+from typing import TYPE_CHECKING, Any, Optional, Tuple, Self
+import copy
 
 from .enum import CharPosition
 from .character import WorldFlipperCharacter
+from .status_effect import StatusEffects
 
 if TYPE_CHECKING:
     from .ability import WorldFlipperAbility
@@ -38,6 +40,32 @@ def main_index(char_idx: int):
     return char_idx - 1
 
 
+def copy_containers(value: Any, memo: dict[int, Any]) -> Any:
+    """
+    Copies lists, dicts and status effects, along with any containers inside of them. Containers that are
+    shared between multiple places stay shared in the copy the same way `copy.deepcopy` keeps them, while
+    everything else is shared with the original.
+    """
+    if not isinstance(value, (list, dict, StatusEffects)):
+        return value
+    copied = memo.get(id(value))
+    if copied is not None:
+        return copied
+    if isinstance(value, StatusEffects):
+        copied = value.fork()
+        memo[id(value)] = copied
+    elif isinstance(value, list):
+        copied = []
+        memo[id(value)] = copied
+        copied.extend(copy_containers(v, memo) for v in value)
+    else:
+        copied = {}
+        memo[id(value)] = copied
+        for k, v in value.items():
+            copied[k] = copy_containers(v, memo)
+    return copied
+
+
 class Party:
     def __init__(self):
         # 0: LEADER        (col 0)
@@ -56,6 +84,13 @@ class Party:
         # character.
         self.ability_lvs = [[0] * 6] * 6
         self.skill_lvs = [0] * 6
+        # Kept up to date with every change to the party so that looking up where a character or
+        # ability is doesn't need to scan the party. Each entry is every (sorted) location of that
+        # character/ability, the first of which is the one lookups return.
+        self._char_slots: dict[str, list[int]] = {}
+        self._ability_slots: dict[str, list[Tuple[int, int]]] = {}
+        # Whether the above are shared with a fork of this party, see `fork()`.
+        self._slots_shared = False
 
     def position(
         self, char: Optional[WorldFlipperCharacter | int]
@@ -65,7 +100,7 @@ class Party:
 
         if isinstance(char, WorldFlipperCharacter):
             try:
-                idx = self._party.index(char)
+                idx = self.index(char)
             except ValueError:
                 return None
         else:
@@ -81,7 +116,7 @@ class Party:
 
     def is_evolved(self, char: WorldFlipperCharacter) -> bool:
         try:
-            idx = self._party.index(char)
+            idx = self.index(char)
             # A unit evolves when every MB1 ability is unlocked AND their skill has been upgraded at least once.
             return (
                 self.ability_lvs[idx][0] >= 1
@@ -98,7 +133,7 @@ class Party:
             uncaps = self.uncaps[char]
             char = self._party[char]
         else:
-            idx = self._party.index(char)
+            idx = self.index(char)
             level = self.levels[idx]
             uncaps = self.uncaps[idx]
         return char.attack(self.is_evolved(char), level, uncaps)
@@ -109,7 +144,7 @@ class Party:
             uncaps = self.uncaps[char]
             char = self._party[char]
         else:
-            idx = self._party.index(char)
+            idx = self.index(char)
             level = self.levels[idx]
             uncaps = self.uncaps[idx]
         if char is None:
@@ -130,7 +165,7 @@ class Party:
 
         if char is not None:
             try:
-                existing = self._party.index(char)
+                existing = self.index(char)
                 to_idx = _index(position, column)
                 if to_idx == existing:
                     return
@@ -149,7 +184,10 @@ class Party:
         uncaps=0,
     ):
         idx = _index(position, column)
+        self._own_slots()
+        self._unindex_slot(idx)
         self._party[idx] = char
+        self._index_slot(idx)
         self.levels[idx] = level
         self.uncaps[idx] = uncaps
         self.ability_lvs[idx] = [0] * 6
@@ -172,10 +210,16 @@ class Party:
             self.current_hp[column] = self.max_hp[column]
 
     def swap(self, char_idx: int, to_idx: int):
+        moved = {char_idx, to_idx}
+        self._own_slots()
+        for idx in moved:
+            self._unindex_slot(idx)
         self._party[to_idx], self._party[char_idx] = (
             self._party[char_idx],
             self._party[to_idx],
         )
+        for idx in moved:
+            self._index_slot(idx)
         self.levels[to_idx], self.levels[char_idx] = (
             self.levels[char_idx],
             self.levels[to_idx],
@@ -191,17 +235,86 @@ class Party:
         self._update_hp()
 
     def ability_index(self, ability: WorldFlipperAbility) -> Tuple[int, int]:
-        for char_idx, char in enumerate(self._party):
-            if char is None:
-                continue
-            for char_abs_idx, char_abs in enumerate(char.abilities):
-                for char_ab in char_abs:
-                    if char_ab == ability:
-                        return char_idx, char_abs_idx
-        return -1, -1
+        slots = self._ability_slots.get(ability.name)
+        if not slots:
+            return -1, -1
+        return slots[0]
 
     def index(self, key: Optional[WorldFlipperCharacter]) -> int:
-        return self._party.index(key)
+        if key is None:
+            return self._party.index(key)
+        slots = self._char_slots.get(key.internal_name)
+        if not slots:
+            raise ValueError(f"{key.internal_name} is not in the party")
+        return slots[0]
+
+    def fork(self) -> Party:
+        """
+        Copy of the party that can be changed without affecting this one, see `GameState.fork`.
+        """
+        forked = copy.copy(self)
+        memo: dict[int, Any] = {}
+        for name, value in vars(self).items():
+            if name in ("_char_slots", "_ability_slots"):
+                continue
+            setattr(forked, name, copy_containers(value, memo))
+        # Members rarely change in a fork, so both parties keep using the same location maps until one of
+        # them does.
+        self._slots_shared = forked._slots_shared = True
+        return forked
+
+    def _own_slots(self):
+        if not self._slots_shared:
+            return
+        self._char_slots = {k: v.copy() for k, v in self._char_slots.items()}
+        self._ability_slots = {k: v.copy() for k, v in self._ability_slots.items()}
+        self._slots_shared = False
+
+    def _index_slot(self, idx: int):
+        char = self._party[idx]
+        if char is None:
+            return
+        char_slots = self._char_slots.setdefault(char.internal_name, [])
+        char_slots.append(idx)
+        char_slots.sort()
+        for ab_idx, effects in enumerate(char.abilities):
+            for ab in effects:
+                ab_slots = self._ability_slots.setdefault(ab.name, [])
+                if (idx, ab_idx) not in ab_slots:
+                    ab_slots.append((idx, ab_idx))
+                    ab_slots.sort()
+
+    def _unindex_slot(self, idx: int):
+        char = self._party[idx]
+        if char is None:
+            return
+        char_slots = self._char_slots[char.internal_name]
+        char_slots.remove(idx)
+        if not char_slots:
+            del self._char_slots[char.internal_name]
+        for effects in char.abilities:
+            for ab in effects:
+                ab_slots = self._ability_slots.get(ab.name)
+                if ab_slots is None:
+                    continue
+                ab_slots[:] = [s for s in ab_slots if s[0] != idx]
+                if not ab_slots:
+                    del self._ability_slots[ab.name]
+
+    def signature(self) -> tuple:
+        """
+        Hashable snapshot of everything about the party that abilities can depend on: who is in which
+        slot along with their levels, uncaps, ability/skill levels and HP.
+        """
+        return (
+            tuple(None if c is None else c.internal_name for c in self._party),
+            tuple(self.levels),
+            tuple(self.uncaps),
+            tuple(tuple(lvs) for lvs in self.ability_lvs),
+            tuple(self.skill_lvs),
+            tuple(self.max_hp),
+            tuple(self.current_hp),
+        )
 
     def main_chars(self):
         for i in range(3):
@@ -221,7 +334,7 @@ class Party:
     def __setitem__(self, idx: int, value: Optional[WorldFlipperCharacter]):
         position = self.position(idx)
         column = mains_only_index(idx)
-        self.set_member(self._party[idx], position, column)
+        self.set_member(value, position, column)
 
     def __delitem__(self, idx: int):
         self.__setitem__(idx, None)
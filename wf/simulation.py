@@ -0,0 +1,279 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+
+from .ability.dispatch import dispatch_table
+from .dmg_formula import DamageFormulaContext, PreparedFormula
+from .enum import DamageSource
+from .party import unison_index
+from .status_effect import StatusEffects
+from .sweep import _SOURCE_FLAGS
+from .timeline.events import EventKind, TICKS_PER_SECOND
+
+if TYPE_CHECKING:
+    from .ability import WorldFlipperAbility
+    from .game_state import GameState
+    from .timeline import Event, WorldFlipperTimeline
+
+# `GameState` fields that each kind of event changes, see `BattleSimulation._apply`. Abilities that read one
+# of them are evaluated again after the event, whether or not they list it in their `listens_to`.
+_EVENT_WRITES: dict[EventKind, tuple[str, ...]] = {
+    EventKind.BALL_FLIP: ("total_ball_flips",),
+    EventKind.POWER_FLIP: ("powerflips_by_lv", "total_powerflips"),
+    EventKind.COMBO_REACHED: ("combos_reached",),
+    EventKind.SKILL_ACTIVATED: ("skill_activations", "total_skill_activations"),
+    EventKind.SKILL_CHARGE_ADD: ("skill_charge",),
+    EventKind.SKILL_CHARGE_100: ("times_skill_reached_100",),
+    EventKind.FEVER_START: ("fever_active",),
+    EventKind.FEVER_END: ("fever_active",),
+    EventKind.DIRECT_HIT: ("direct_hits", "total_direct_hits"),
+    EventKind.POWER_FLIP_HIT: ("total_powerflip_hits",),
+    EventKind.SKILL_HIT: ("skill_hits", "total_skill_hits"),
+    EventKind.PIERCE_ACTIVATED: ("pierce_active",),
+    EventKind.PIERCE_DEACTIVATED: ("pierce_active",),
+    EventKind.GAINED_BUFF: ("buffs",),
+    EventKind.GAINED_DEBUFF: ("enemy",),
+}
+
+# Kinds of events that deal damage, and where the damage comes from.
+_HIT_SOURCES: dict[EventKind, DamageSource] = {
+    EventKind.DIRECT_HIT: DamageSource.DIRECT_ATTACK,
+    EventKind.POWER_FLIP_HIT: DamageSource.POWER_FLIP,
+    EventKind.SKILL_HIT: DamageSource.SKILL,
+    EventKind.ABILITY_HIT: DamageSource.ABILITY,
+}
+
+
+@dataclass(frozen=True)
+class DamageDealt:
+    time: int
+    source: DamageSource
+    column: int
+    # Low/high end of the damage range, see `DamageFormulaContext.calculate`.
+    low: float
+    high: float
+
+
+class BattleSimulation:
+    """
+    Plays out a timeline of events on a copy of `state`, keeping track of the damage every hit deals.
+
+    Events update the counters of the state as they happen, and hits are counted before their damage is
+    calculated:
+      - `count` is how many times the event happened, where 0 counts as once. For `COMBO_REACHED` it's
+        the combo that was reached, and for `SKILL_CHARGE_ADD` the amount of charge.
+      - `skill_unit` is the column of the unit the event is about, where -1 means every main unit.
+      - `powerflip_level` is the level of power flips, and the charge level of their hits.
+      - `time_activated` sets `seconds_passed`, see `TICKS_PER_SECOND`.
+      - `status_effect` is the buff gained by the main units of the columns, or the debuff gained by the
+        enemy.
+    Status effects are taken out once they stop being active, as time advances. Other kinds of events
+    (damage taken, etc.) don't have anything to update in the state yet, and only advance the time.
+
+    Ability results are kept between events. Only abilities that listen to an event that happened since
+    (see `dispatch_table`), that read something it changed (see `_EVENT_WRITES`), or that depend on time
+    when a second has passed, are evaluated again, and only once damage is dealt. Damage is exactly the
+    same as evaluating the whole party (see `evaluate_party`) for every hit.
+    """
+
+    def __init__(self, state: GameState, timeline: WorldFlipperTimeline):
+        self.state = state.fork()
+        self.state.buffs = [StatusEffects(effects) for effects in self.state.buffs]
+        if self.state.enemy is not None:
+            self.state.enemy.debuffs = StatusEffects(self.state.enemy.debuffs)
+        self.timeline = timeline
+        self.log: list[DamageDealt] = []
+        # Sum of the low/high end of the damage of every hit, for each source.
+        self.low = {source: 0.0 for source in DamageSource}
+        self.high = {source: 0.0 for source in DamageSource}
+        # Number of times an ability was evaluated for a unit.
+        self.evaluations = 0
+
+        party = self.state.party
+        self._mains = [party[col * 2] for col in range(3)]
+        self._unisons = [party[unison_index(col * 2)] for col in range(3)]
+        # The party doesn't change during a fight.
+        self._formulas = [
+            None if main is None else PreparedFormula(self.state, col * 2)
+            for col, main in enumerate(self._mains)
+        ]
+        # Every unlocked ability in party order, which is the order their results are combined in.
+        self._abilities: list[WorldFlipperAbility] = []
+        for member in party:
+            if member is None:
+                continue
+            for effects in member.abilities:
+                for ab in effects:
+                    ab_char_idx, ab_idx = party.ability_index(ab)
+                    if party.ability_lvs[ab_char_idx][ab_idx] > 0:
+                        self._abilities.append(ab)
+        self._listeners = dispatch_table(self._abilities)
+        # Abilities (by position in `_abilities`) that read each `GameState` field.
+        self._readers: dict[str, list[int]] = {}
+        for pos, ab in enumerate(self._abilities):
+            for name in ab.plan().reads:
+                self._readers.setdefault(name, []).append(pos)
+
+        self._results: list[list[Optional[DamageFormulaContext]]] = [
+            [None] * len(self._abilities) for _ in range(3)
+        ]
+        self._dirty: set[int] = set(range(len(self._abilities)))
+        self._contexts: list[Optional[DamageFormulaContext]] = [None] * 3
+        # Whether `_contexts` have to be combined again, even when there are no abilities to evaluate.
+        self._stale = True
+        # (low, high) for each (column, source, charge level), for as long as the contexts don't change.
+        self._damage: dict[tuple[int, DamageSource, int], tuple[float, float]] = {}
+
+    @property
+    def damage(self) -> dict[DamageSource, float]:
+        """
+        Total damage of each source, taking the middle of the damage range of every hit.
+        """
+        return {
+            source: (self.low[source] + self.high[source]) / 2
+            for source in DamageSource
+        }
+
+    def run(self, until: Optional[int] = None):
+        """
+        Plays out every event in the timeline, or only up to and including time `until`.
+        """
+        while len(self.timeline) > 0:
+            if until is not None and self.timeline.peek().time_activated > until:
+                break
+            self.step()
+
+    def step(self) -> Event:
+        """
+        Plays out the next event in the timeline.
+        """
+        event = self.timeline.pop_next()
+        seconds = event.time_activated // TICKS_PER_SECOND
+        if seconds != self.state.seconds_passed:
+            self.state.seconds_passed = seconds
+            self._dirty.update(self._readers.get("seconds_passed", ()))
+        self._expire(event.time_activated)
+        self._apply(event)
+        self._invalidate(event.kind)
+        source = _HIT_SOURCES.get(event.kind)
+        if source is not None:
+            self._hit(event, source)
+        return event
+
+    def contexts(self) -> list[Optional[DamageFormulaContext]]:
+        """
+        Combined ability results for each main unit in the current state, like `evaluate_party`.
+        """
+        if self._stale or len(self._dirty) > 0:
+            for pos in self._dirty:
+                ab = self._abilities[pos]
+                for col, main in enumerate(self._mains):
+                    if main is None:
+                        continue
+                    self._results[col][pos] = ab.eval_effect(main, self.state)
+                    self.evaluations += 1
+            self._dirty.clear()
+            self._stale = False
+            for col, main in enumerate(self._mains):
+                if main is None:
+                    continue
+                ctx = DamageFormulaContext(main, self._unisons[col])
+                for result in self._results[col]:
+                    if result is not None:
+                        ctx.combine(result)
+                self._contexts[col] = ctx
+            self._damage.clear()
+        return self._contexts
+
+    def _expire(self, time: int):
+        state = self.state
+        for effects in state.buffs:
+            if len(effects.expire(time)) > 0:
+                self._invalidate(EventKind.GAINED_BUFF)
+        if state.enemy is not None and len(state.enemy.debuffs.expire(time)) > 0:
+            self._invalidate(EventKind.GAINED_DEBUFF)
+
+    def _invalidate(self, kind: EventKind):
+        """
+        Marks the abilities that can come out differently after an event of `kind` to be evaluated again.
+        """
+        self._dirty.update(self._listeners.get(kind, ()))
+        for name in _EVENT_WRITES.get(kind, ()):
+            self._dirty.update(self._readers.get(name, ()))
+
+    def _columns(self, event: Event) -> list[int]:
+        if event.skill_unit == -1:
+            return [col for col in range(3) if self._mains[col] is not None]
+        if event.skill_unit not in (0, 1, 2):
+            raise ValueError(f"Unknown column for {event.kind}: {event.skill_unit}")
+        return [event.skill_unit]
+
+    def _apply(self, event: Event):
+        state = self.state
+        count = max(1, event.count)
+        match event.kind:
+            case EventKind.BALL_FLIP:
+                state.total_ball_flips += count
+            case EventKind.POWER_FLIP:
+                if event.powerflip_level not in (1, 2, 3):
+                    raise ValueError(
+                        f"Power flip level must be 1-3, got {event.powerflip_level}"
+                    )
+                state.powerflips_by_lv[event.powerflip_level - 1] += count
+                state.total_powerflips += count
+            case EventKind.COMBO_REACHED:
+                state.combos_reached[event.count] = (
+                    state.combos_reached.get(event.count, 0) + 1
+                )
+            case EventKind.SKILL_ACTIVATED:
+                for col in self._columns(event):
+                    state.skill_activations[col * 2] += count
+                    state.total_skill_activations += count
+            case EventKind.SKILL_CHARGE_ADD:
+                for col in self._columns(event):
+                    state.skill_charge[col] += event.count
+            case EventKind.SKILL_CHARGE_100:
+                for col in self._columns(event):
+                    state.times_skill_reached_100[col] += count
+            case EventKind.FEVER_START | EventKind.FEVER_END:
+                state.fever_active = event.kind == EventKind.FEVER_START
+            case EventKind.PIERCE_ACTIVATED | EventKind.PIERCE_DEACTIVATED:
+                state.pierce_active = event.kind == EventKind.PIERCE_ACTIVATED
+            case EventKind.DIRECT_HIT:
+                for col in self._columns(event):
+                    state.direct_hits[col] += count
+                    state.total_direct_hits += count
+            case EventKind.POWER_FLIP_HIT:
+                state.total_powerflip_hits += count
+            case EventKind.SKILL_HIT:
+                for col in self._columns(event):
+                    state.skill_hits[col * 2] += count
+                    state.total_skill_hits += count
+            case EventKind.GAINED_BUFF if event.status_effect is not None:
+                for col in self._columns(event):
+                    state.buffs[col].append(event.status_effect)
+            case EventKind.GAINED_DEBUFF if event.status_effect is not None:
+                if state.enemy is not None:
+                    state.enemy.debuffs.append(event.status_effect)
+
+    def _hit(self, event: Event, source: DamageSource):
+        contexts = self.contexts()
+        charge_level = max(0, event.powerflip_level)
+        for col in self._columns(event):
+            if contexts[col] is None:
+                # Nobody in that column to deal the damage.
+                continue
+            key = (col, source, charge_level)
+            if key not in self._damage:
+                ctx = contexts[col].copy()
+                setattr(ctx, _SOURCE_FLAGS[source], True)
+                if source == DamageSource.POWER_FLIP:
+                    ctx.charge_level = charge_level
+                self._damage[key] = self._formulas[col].calculate(ctx)
+            low, high = self._damage[key]
+            for _ in range(max(1, event.count)):
+                self.log.append(
+                    DamageDealt(event.time_activated, source, col, low, high)
+                )
+                self.low[source] += low
+                self.high[source] += high
@@ -0,0 +1,125 @@
+from __future__ import annotations
+from typing import Any, Optional
+import hashlib
+import os
+import pickle
+
+# Bump whenever the layout of anything stored in a snapshot changes (attributes on characters, abilities,
+# etc.) so that stale snapshots from an older version of the code get rebuilt instead of loaded.
+SNAPSHOT_VERSION = 7
+
+SNAPSHOT_FILE_NAME = ".wf_snapshot.pickle"
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_key(path: str, sha256: Optional[str] = None) -> dict[str, Any]:
+    st = os.stat(path)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": sha256 if sha256 is not None else _file_hash(path),
+    }
+
+
+def build_manifest(data_dir: str, source_files: tuple[str, ...]) -> dict[str, Any]:
+    return {
+        "version": SNAPSHOT_VERSION,
+        "files": {
+            name: _file_key(os.path.join(data_dir, name)) for name in source_files
+        },
+    }
+
+
+def _manifest_matches(
+    manifest: dict[str, Any], data_dir: str, source_files: tuple[str, ...]
+) -> bool:
+    """
+    A file whose size and mtime are unchanged is trusted without being read. Anything else (a fresh
+    checkout, `touch`, copying the dump around) falls back to comparing content hashes, so a snapshot
+    is only thrown away when the asset dump actually changed.
+    """
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        return False
+    files = manifest.get("files", {})
+    if set(files.keys()) != set(source_files):
+        return False
+    for name in source_files:
+        path = os.path.join(data_dir, name)
+        key = files[name]
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != key["size"]:
+            return False
+        if st.st_mtime_ns == key["mtime_ns"]:
+            continue
+        if _file_hash(path) != key["sha256"]:
+            return False
+    return True
+
+
+def load_snapshot(
+    snapshot_path: str, data_dir: str, source_files: tuple[str, ...]
+) -> Optional[Any]:
+    """
+    Returns the payload stored in the snapshot, or None if there is no snapshot or it no longer matches
+    the source files. The manifest is stored as its own pickle in front of the payload so validating a
+    snapshot never has to unpickle the (much larger) payload.
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            manifest = pickle.load(f)
+            if not isinstance(manifest, dict) or not _manifest_matches(
+                manifest, data_dir, source_files
+            ):
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # A truncated or otherwise broken snapshot is no worse than a missing one.
+        return None
+    except (KeyError, TypeError, ValueError):
+        # Neither is a manifest of the right version that isn't laid out like one (entries that aren't
+        # dicts, keys that are missing, etc.).
+        return None
+
+
+def write_snapshot(
+    snapshot_path: str,
+    data_dir: str,
+    source_files: tuple[str, ...],
+    payload: Any,
+    manifest: Optional[dict[str, Any]] = None,
+) -> bool:
+    """
+    Writes the snapshot atomically, so that any number of workers can start up at the same time
+    without ever seeing a partially written file. Returns False if the snapshot couldn't be written
+    (e.g. a read-only data directory), which callers are free to ignore.
+    """
+    if manifest is None:
+        manifest = build_manifest(data_dir, source_files)
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(manifest, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+        return True
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        # Objects that can't be pickled raise any of the last three, depending on what they are.
+        return False
+    finally:
+        # Whatever went wrong, don't leave a partial file behind.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
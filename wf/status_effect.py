@@ -1,5 +1,7 @@
+from __future__ import annotations
 from enum import StrEnum, auto
-from typing import cast
+from typing import Iterable, Iterator, Optional, Union, cast
+import heapq
 
 from typing_extensions import TypedDict
 
@@ -46,32 +48,226 @@ class StatusEffectKwargs(TypedDict, total=False):
     nullify: bool
 
 
+# Small integer codes of kinds and elements, which is how status effects store them. Elements are coded
+# from 1 so that 0 can stand for no element.
+_KINDS = tuple(StatusEffectKind)
+_KIND_CODES = {kind: code for code, kind in enumerate(_KINDS)}
+_ELEMENTS = (None,) + tuple(Element)
+_ELEMENT_CODES = {element: code for code, element in enumerate(_ELEMENTS)}
+# Bits of a `status_mask`, one for each kind followed by one for each kind along with its element.
+_BITS = len(_KINDS) * (1 + len(_ELEMENTS))
+
+
+def _bit(kind_code: int, element_code: int) -> int:
+    return len(_KINDS) + kind_code * len(_ELEMENTS) + element_code
+
+
+def status_mask(*keys: StatusEffectKind | tuple[StatusEffectKind, Element]) -> int:
+    """
+    Bitmask with the bit of each kind, or kind along with its element, in `keys` set. See
+    `StatusEffects.mask`.
+    """
+    mask = 0
+    for key in keys:
+        if isinstance(key, tuple):
+            mask |= 1 << _bit(_KIND_CODES[key[0]], _ELEMENT_CODES[key[1]])
+        else:
+            mask |= 1 << _KIND_CODES[key]
+    return mask
+
+
 class StatusEffect:
+    __slots__ = (
+        "_kind_code",
+        "_element_code",
+        "time_start",
+        "time_active",
+        "percent_mod",
+        "combo",
+        "nullify",
+    )
+
     def __init__(
         self, kind: StatusEffectKind, time_start: int, time_active: int, **kwargs
     ):
         typed_kwargs = cast(StatusEffectKwargs, kwargs)
-        self.kind = kind
+        # Kind and element can't change once the effect exists, since `StatusEffects` counts effects by
+        # them as they're added.
+        self._kind_code = _KIND_CODES[kind]
+        self._element_code = _ELEMENT_CODES[typed_kwargs.get("element")]
         self.time_start = time_start
         self.time_active = time_active
         self.percent_mod = typed_kwargs.get("percent_mod", 0.0)
-        self.element = typed_kwargs.get("element")
         self.combo = typed_kwargs.get("combo", 0)
         self.nullify = typed_kwargs.get("nullify", False)
 
+    @property
+    def kind_code(self) -> int:
+        return self._kind_code
+
+    @property
+    def element_code(self) -> int:
+        return self._element_code
+
+    @property
+    def kind(self) -> StatusEffectKind:
+        return _KINDS[self._kind_code]
+
+    @property
+    def element(self) -> Optional[Element]:
+        return _ELEMENTS[self._element_code]
+
     def __eq__(self, other):
         if isinstance(other, StatusEffect):
             return (
-                self.kind == other.kind
+                self._kind_code == other._kind_code
                 and self.time_start == other.time_start
                 and self.time_active == other.time_active
                 and self.percent_mod == other.percent_mod
-                and self.element == other.element
+                and self._element_code == other._element_code
                 and self.combo == other.combo
             )
         elif isinstance(other, StatusEffectKind):
-            return self.kind == other
+            return self._kind_code == _KIND_CODES[other]
         elif isinstance(other, tuple):
             if isinstance(other[0], StatusEffectKind) and isinstance(other[1], Element):
-                return self.kind == other[0] and self.element == other[1]
+                return (
+                    self._kind_code == _KIND_CODES[other[0]]
+                    and self._element_code == _ELEMENT_CODES[other[1]]
+                )
         return False
+
+    def __repr__(self):
+        return (
+            f"StatusEffect({self.kind!s}, {self.time_start}, {self.time_active}, "
+            f"percent_mod={self.percent_mod}, element={self.element}, "
+            f"combo={self.combo}, nullify={self.nullify})"
+        )
+
+
+# What `StatusEffects` can be asked about: a kind of effect, a kind along with its element, or a specific
+# effect.
+StatusEffectKey = Union[
+    StatusEffectKind, tuple[StatusEffectKind, Optional[Element]], StatusEffect
+]
+
+
+class StatusEffects:
+    """
+    Status effects on a unit or the enemy, in the order they were added. Effects can be looked up the
+    same way as in a list of them (`StatusEffectKind.POISON in effects`, `effects.count((kind, element))`),
+    except that looking up a kind or a kind with its element takes constant time.
+
+    Effects stop being active `time_active` ticks after `time_start` (see `Event.time_activated`), which
+    is when `expire` takes them out.
+    """
+
+    def __init__(self, effects: Iterable[StatusEffect] = ()):
+        # Effects by the order they were added in.
+        self._effects: dict[int, StatusEffect] = {}
+        self._seq = 0
+        # Bit of each kind of effect, and kind along with its element, there is at least one of. See
+        # `status_mask`.
+        self.mask = 0
+        # Number of effects with each bit of the mask.
+        self._counts = [0] * _BITS
+        # Heap of (time the effect stops being active, order it was added in). Entries of effects that
+        # were removed are skipped once they come up.
+        self._expiry: list[tuple[int, int]] = []
+        for effect in effects:
+            self.append(effect)
+
+    def append(self, effect: StatusEffect):
+        if not isinstance(effect, StatusEffect):
+            raise TypeError(f"Expected a StatusEffect, got {effect!r}")
+        seq = self._seq
+        self._seq += 1
+        self._effects[seq] = effect
+        self._count(effect, 1)
+        heapq.heappush(self._expiry, (effect.time_start + effect.time_active, seq))
+
+    def remove(self, effect: StatusEffect):
+        """
+        Removes the first effect equal to `effect`. Raises ValueError when there isn't one.
+        """
+        for seq, other in self._effects.items():
+            if other == effect:
+                del self._effects[seq]
+                self._count(other, -1)
+                return
+        raise ValueError("Status effect not found.")
+
+    def expire(self, time: int) -> list[StatusEffect]:
+        """
+        Removes every effect that stopped being active at or before `time`, and returns them.
+        """
+        expired = []
+        while len(self._expiry) > 0 and self._expiry[0][0] <= time:
+            _, seq = heapq.heappop(self._expiry)
+            effect = self._effects.pop(seq, None)
+            if effect is not None:
+                self._count(effect, -1)
+                expired.append(effect)
+        return expired
+
+    def next_expiry(self) -> Optional[int]:
+        """
+        When the next effect stops being active, or None if there are no effects.
+        """
+        while len(self._expiry) > 0 and self._expiry[0][1] not in self._effects:
+            heapq.heappop(self._expiry)
+        if len(self._expiry) == 0:
+            return None
+        return self._expiry[0][0]
+
+    def has_any(self, mask: int) -> bool:
+        """
+        Whether there's an effect with any of the bits of `mask`, see `status_mask`.
+        """
+        return self.mask & mask != 0
+
+    def count(self, key: StatusEffectKey) -> int:
+        if isinstance(key, StatusEffectKind):
+            return self._counts[_KIND_CODES[key]]
+        if isinstance(key, tuple):
+            if not isinstance(key[1], Element):
+                return 0
+            return self._counts[_bit(_KIND_CODES[key[0]], _ELEMENT_CODES[key[1]])]
+        return sum(1 for effect in self._effects.values() if effect == key)
+
+    def fork(self) -> StatusEffects:
+        forked = StatusEffects()
+        forked._effects = dict(self._effects)
+        forked._seq = self._seq
+        forked.mask = self.mask
+        forked._counts = list(self._counts)
+        forked._expiry = list(self._expiry)
+        return forked
+
+    def _count(self, effect: StatusEffect, amount: int):
+        kind_code = effect._kind_code
+        for bit in (kind_code, _bit(kind_code, effect._element_code)):
+            self._counts[bit] += amount
+            if self._counts[bit] == 0:
+                self.mask &= ~(1 << bit)
+            else:
+                self.mask |= 1 << bit
+
+    def __contains__(self, key: StatusEffectKey) -> bool:
+        if isinstance(key, StatusEffectKind):
+            return self.mask >> _KIND_CODES[key] & 1 == 1
+        return self.count(key) > 0
+
+    def __len__(self):
+        return len(self._effects)
+
+    def __iter__(self) -> Iterator[StatusEffect]:
+        return iter(self._effects.values())
+
+    def __eq__(self, other):
+        if isinstance(other, (StatusEffects, list)):
+            return list(self) == list(other)
+        return False
+
+    def __repr__(self):
+        return f"StatusEffects({list(self)!r})"
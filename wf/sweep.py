@@ -0,0 +1,285 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence, TYPE_CHECKING
+import itertools
+
+import numpy as np
+
+from .ability.memo import EvalMemo, StateKey
+from .dmg_formula import DamageFormulaContext
+from .dmg_formula_batch import DamageFormulaBatch
+from .enum import DamageSource
+from .party import unison_index
+
+if TYPE_CHECKING:
+    from .ability import WorldFlipperAbility
+    from .character import WorldFlipperCharacter
+    from .effect.base_effect import WorldFlipperBaseCondition
+    from .game_state import GameState
+
+# Flag of `DamageFormulaContext` that is set to calculate damage from each source.
+_SOURCE_FLAGS = {
+    DamageSource.DIRECT_ATTACK: "created_by_da",
+    DamageSource.POWER_FLIP: "created_by_pf_action",
+    DamageSource.SKILL: "created_by_skill_action",
+    DamageSource.ABILITY: "created_by_ad",
+}
+
+
+@dataclass(frozen=True)
+class SweepAxis:
+    """
+    A single variable of the state to sweep over. `apply` sets the variable to one of `values`, and
+    `fields` are every `GameState` field that it changes.
+    """
+
+    name: str
+    values: Sequence[Any]
+    fields: tuple[str, ...]
+    apply: Callable[[GameState, Any], None]
+
+
+def powerflips_axis(lv: int, values: Sequence[int]) -> SweepAxis:
+    return SweepAxis(
+        f"powerflips_lv{lv}",
+        values,
+        ("powerflips_by_lv", "total_powerflips"),
+        lambda state, count: state.set_powerflips(lv, count),
+    )
+
+
+def skill_activations_axis(char_idx: int, values: Sequence[int]) -> SweepAxis:
+    return SweepAxis(
+        f"skill_activations_{char_idx}",
+        values,
+        ("skill_activations", "total_skill_activations"),
+        lambda state, count: state.set_skill_activations(char_idx, count),
+    )
+
+
+def skill_hits_axis(char_idx: int, values: Sequence[int]) -> SweepAxis:
+    def apply(state: GameState, count: int):
+        state.skill_hits[char_idx] = count
+        state.total_skill_hits = sum(state.skill_hits)
+
+    return SweepAxis(
+        f"skill_hits_{char_idx}", values, ("skill_hits", "total_skill_hits"), apply
+    )
+
+
+def combos_reached_axis(combo: int, values: Sequence[int]) -> SweepAxis:
+    def apply(state: GameState, count: int):
+        state.combos_reached[combo] = count
+
+    return SweepAxis(f"combos_reached_{combo}", values, ("combos_reached",), apply)
+
+
+def direct_hits_axis(column: int, values: Sequence[int]) -> SweepAxis:
+    def apply(state: GameState, count: int):
+        state.direct_hits[column] = count
+        state.total_direct_hits = sum(state.direct_hits)
+
+    return SweepAxis(
+        f"direct_hits_{column}", values, ("direct_hits", "total_direct_hits"), apply
+    )
+
+
+def state_axis(field: str, values: Sequence[Any]) -> SweepAxis:
+    """
+    Sweeps a plain field of the state, like `total_ball_flips` or `fever_active`.
+    """
+    return SweepAxis(field, values, (field,), lambda state, v: setattr(state, field, v))
+
+
+@dataclass
+class SweepResult:
+    axes: Sequence[SweepAxis]
+    # Low/high end of the damage range for each source, see `DamageFormulaContext.calculate`. Every array
+    # has one dimension per axis, in the order the axes were given in.
+    low: dict[DamageSource, np.ndarray]
+    high: dict[DamageSource, np.ndarray]
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return tuple(len(axis.values) for axis in self.axes)
+
+
+class _CountedAbility:
+    """
+    An ability whose condition only depends on the swept variables through its count (see
+    `WorldFlipperBaseCondition.count_field`). Instead of evaluating it for every point of the sweep, the
+    counts are collected, turned into multipliers all at once, and the effects are run once per distinct
+    multiplier.
+    """
+
+    def __init__(self, ab: WorldFlipperAbility, condition: WorldFlipperBaseCondition):
+        self.ab = ab
+        self.condition = condition
+        self.counts: list[int] = []
+
+    def results(self) -> list[Optional[DamageFormulaContext]]:
+        cap = self.ab.int_field("main_effect_max_multiplier")
+        multipliers = self.condition._calc_multipliers(cap, np.array(self.counts))
+        by_multiplier: dict[int, Optional[DamageFormulaContext]] = {}
+        results = []
+        for multiplier in multipliers.tolist():
+            if multiplier not in by_multiplier:
+                by_multiplier[multiplier] = self.ab.apply_effects(
+                    self.condition, multiplier
+                )
+            results.append(by_multiplier[multiplier])
+        return results
+
+
+def sweep(
+    state: GameState,
+    axes: Sequence[SweepAxis],
+    column: int = 0,
+    charge_level: int = 3,
+    memo: Optional[EvalMemo] = None,
+) -> SweepResult:
+    """
+    Damage dealt by the main unit of `column` from each source for every combination of values of the
+    axes, all else in `state` being equal. PF damage is calculated at `charge_level`.
+
+    Abilities that don't read anything the axes change are only evaluated once, counting conditions
+    (power flips, skill hits, etc.) get their multipliers calculated for the whole sweep at once, and the
+    damage formula runs once per distinct set of ability results. Passing the same `memo` to sweeps of
+    similar states (like the same team with different levels) shares evaluations between them.
+    """
+    if memo is None:
+        memo = EvalMemo()
+    work = state.fork()
+    main = work.party[column * 2]
+    if main is None:
+        raise ValueError(f"No main unit in column {column}")
+    unison = work.party[unison_index(column * 2)]
+    shape = tuple(len(axis.values) for axis in axes)
+    swept: set[str] = set()
+    for axis in axes:
+        swept.update(axis.fields)
+
+    grid = list(itertools.product(*(axis.values for axis in axes)))
+    if len(grid) == 0:
+        empty = {source: np.zeros(shape) for source in DamageSource}
+        return SweepResult(axes, empty, dict(empty))
+    for axis, value in zip(axes, grid[0]):
+        axis.apply(work, value)
+
+    # Every ability in party order, and for each either its result when it doesn't depend on the sweep or
+    # how it's evaluated at every point.
+    party_sig = work.party.signature()
+    base_key = StateKey(work, party_sig)
+    fixed: list[Optional[DamageFormulaContext]] = []
+    counted: list[_CountedAbility] = []
+    swept_abs: list[WorldFlipperAbility] = []
+    order: list[tuple[str, int]] = []
+    for member in work.party:
+        if member is None:
+            continue
+        for effects in member.abilities:
+            for ab in effects:
+                plan = ab.plan()
+                if swept.isdisjoint(plan.reads):
+                    order.append(("fixed", len(fixed)))
+                    fixed.append(memo.lookup(ab, main, work, base_key))
+                    continue
+                counting = _counted_ability(ab, main, work, swept)
+                if counting is not None:
+                    order.append(("counted", len(counted)))
+                    counted.append(counting)
+                else:
+                    order.append(("swept", len(swept_abs)))
+                    swept_abs.append(ab)
+
+    # Results of the swept abilities at every point.
+    swept_results: list[list[Optional[DamageFormulaContext]]] = [
+        [] for _ in swept_abs
+    ]
+    for point_idx, point in enumerate(grid):
+        if point_idx > 0:
+            for axis, value in zip(axes, point):
+                axis.apply(work, value)
+        key = StateKey(work, party_sig)
+        for counting in counted:
+            counting.counts.append(counting.condition.count())
+        for ab, results in zip(swept_abs, swept_results):
+            results.append(memo.lookup(ab, main, work, key))
+    counted_results = [counting.results() for counting in counted]
+
+    # Points that end up with the exact same ability results deal the exact same damage.
+    contexts: list[DamageFormulaContext] = []
+    by_results: dict[tuple, int] = {}
+    point_ctx = np.empty(len(grid), dtype=np.int64)
+    for point_idx in range(len(grid)):
+        results = []
+        for kind, idx in order:
+            if kind == "fixed":
+                results.append(fixed[idx])
+            elif kind == "counted":
+                results.append(counted_results[idx][point_idx])
+            else:
+                results.append(swept_results[idx][point_idx])
+        results_key = tuple(id(r) for r in results)
+        if results_key not in by_results:
+            by_results[results_key] = len(contexts)
+            contexts.append(_combine(main, unison, results))
+        point_ctx[point_idx] = by_results[results_key]
+
+    sources = list(DamageSource)
+    source_contexts = []
+    for source in sources:
+        for ctx in contexts:
+            source_ctx = ctx.copy()
+            setattr(source_ctx, _SOURCE_FLAGS[source], True)
+            if source == DamageSource.POWER_FLIP:
+                source_ctx.charge_level = charge_level
+            source_contexts.append(source_ctx)
+    low, high = DamageFormulaBatch.from_contexts(source_contexts, state).calculate()
+
+    low_by_source = {}
+    high_by_source = {}
+    for source_idx, source in enumerate(sources):
+        offset = source_idx * len(contexts)
+        low_by_source[source] = low[offset + point_ctx].reshape(shape)
+        high_by_source[source] = high[offset + point_ctx].reshape(shape)
+    return SweepResult(axes, low_by_source, high_by_source)
+
+
+def _counted_ability(
+    ab: WorldFlipperAbility,
+    char: WorldFlipperCharacter,
+    state: GameState,
+    swept: set[str],
+) -> Optional[_CountedAbility]:
+    plan = ab.plan()
+    field = plan.condition_cls.count_field
+    if field is None:
+        return None
+    # Anything else that's swept has to be evaluated the long way.
+    other_reads = set(plan.reads)
+    other_reads.discard(field)
+    if not swept.isdisjoint(other_reads):
+        return None
+    condition = ab.condition(char, state)
+    if not condition.should_run() or not condition.eval():
+        # Whether the condition passes doesn't depend on the count, only its multiplier does.
+        return _NeverCounted(ab, condition)
+    return _CountedAbility(ab, condition)
+
+
+class _NeverCounted(_CountedAbility):
+    def results(self) -> list[Optional[DamageFormulaContext]]:
+        return [None] * len(self.counts)
+
+
+def _combine(
+    main: WorldFlipperCharacter,
+    unison: Optional[WorldFlipperCharacter],
+    results: list[Optional[DamageFormulaContext]],
+) -> DamageFormulaContext:
+    ctx = DamageFormulaContext(main, unison)
+    for result in results:
+        if result is not None:
+            ctx.combine(result)
+    return ctx
@@ -0,0 +1,491 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional, Sequence, TYPE_CHECKING
+import heapq
+import multiprocessing
+
+import numpy as np
+
+from .ability.batch import evaluate_party
+from .ability.memo import EvalMemo
+from .dmg_formula import DamageFormulaContext
+from .enum import CharPosition, DamageSource
+from .party import Party
+from .sweep import _SOURCE_FLAGS
+from .wf import WorldFlipperData
+
+if TYPE_CHECKING:
+    from .character import WorldFlipperCharacter
+    from .game_state import GameState
+
+# Order party slots are filled in while searching. Main units matter the most for damage, so deciding on
+# them first makes the bounds of everything below them much tighter.
+_SLOT_ORDER = (0, 2, 4, 1, 3, 5)
+
+# Fields of `DamageFormulaContext` that abilities change, and whether a larger value means more damage.
+_BOUND_FIELDS: dict[str, bool] = {
+    "attack_modifier": True,
+    "total_resist": False,
+    "stat_mod_pinch_slayer": True,
+    "condition_slayer": True,
+    "character_slayer": True,
+    "stat_mod_adversity": True,
+    "attacker_fraction_health_lost": True,
+    "stat_mod_da_damage": True,
+    "stat_mod_additional_da_damage": True,
+    "stat_mod_pf_damage": True,
+    "stat_mod_pf_resist_mult": True,
+    "stat_mod_pf_lv_damage_slayer": True,
+    "stat_mod_sd_damage": True,
+    "stat_mod_sd_resist_mult": True,
+    "skill_multiplier": True,
+    "skill_slayer": True,
+    "current_combos": True,
+    "total_coffin_counts": True,
+    "total_buff_counts": True,
+    "stat_mod_ad_damage": True,
+    "stat_mod_ad_resist_mult": True,
+    "element_damage_cut": False,
+}
+_BOUND_NAMES = tuple(_BOUND_FIELDS.keys())
+_INCREASING = np.array(list(_BOUND_FIELDS.values()))
+_DEFAULTS = np.array([getattr(DamageFormulaContext(), f) for f in _BOUND_NAMES])
+
+
+@dataclass(frozen=True, order=True)
+class TeamResult:
+    score: float
+    # Internal names of the members by party slot.
+    members: tuple[str, ...]
+
+
+@dataclass
+class SearchStats:
+    # Partial teams that were looked at, and how many of them were cut off by their bound.
+    nodes: int = 0
+    pruned: int = 0
+    # Full teams whose damage was calculated.
+    teams: int = 0
+
+
+class TeamSearch:
+    """
+    Finds the teams out of a roster that deal the most damage in a given `GameState`.
+
+    A team's score is the average of the low and high end of `DamageFormulaContext.calculate` for damage
+    from `source`, summed over its three main units. Every member is at `level`, `uncaps`, `ability_lv`
+    for every ability and `skill_lv`.
+
+    Teams are built one slot at a time, and a partial team is dropped as soon as an optimistic bound of
+    its score can't beat the current top `top_k`. The bound assumes:
+      - Every member contributes at most its best-case contribution to the damage context, found by
+        probing its abilities in every slot next to units of every element (see `_potentials`).
+      - Every empty slot gets filled with whoever has the largest contribution, field by field.
+      - Abilities never turn any factor of the damage formula negative, so more of a bonus always means
+        more damage.
+    Teams with exactly the same score as the last of the top teams may be dropped in favor of the ones
+    found first.
+    """
+
+    def __init__(
+        self,
+        roster: Iterable[WorldFlipperCharacter],
+        state: GameState,
+        top_k: int = 10,
+        source: DamageSource = DamageSource.POWER_FLIP,
+        charge_level: int = 3,
+        level: int = 100,
+        uncaps: int = 4,
+        ability_lv: int = 6,
+        skill_lv: int = 1,
+        memo: Optional[EvalMemo] = None,
+        potentials: Optional[tuple[np.ndarray, np.ndarray]] = None,
+        symmetry: bool = True,
+    ):
+        """
+        `potentials` can be taken from another search over the same roster with the same settings, to skip
+        probing every unit again.
+
+        Swapping columns 1 and 2 of a team makes no difference to its damage (other than rounding), unless
+        an ability reads anything in the state that isn't the same for both columns. Unless `symmetry` is
+        disabled, only one of each such pair of teams is searched: the one with the lower roster index
+        for the main unit of column 1.
+        """
+        self.roster = list(roster)
+        if len(self.roster) < 6:
+            raise ValueError("Need at least 6 characters to build a team.")
+        self.state = state
+        self.top_k = top_k
+        self.source = source
+        self.charge_level = charge_level
+        self.level = level
+        self.uncaps = uncaps
+        self.ability_lv = ability_lv
+        self.skill_lv = skill_lv
+        self.memo = memo if memo is not None else EvalMemo()
+        self.stats = SearchStats()
+        # Score that every team has to beat on top of the current top teams, like the worst of the top
+        # teams found by other searches over other parts of the same roster.
+        self.floor = -np.inf
+        self._heap: list[TeamResult] = []
+        self._should_stop: Optional[Callable[[], bool]] = None
+
+        reads: set[str] = set()
+        for char in self.roster:
+            for effects in char.abilities:
+                for ab in effects:
+                    reads.update(ab.plan().reads)
+        self.symmetric = symmetry and state.columns_interchangeable(reads)
+
+        evolved = ability_lv >= 1 and skill_lv >= 1
+        self._atk = np.array(
+            [c.attack(evolved, level, uncaps) for c in self.roster], dtype=float
+        )
+        if potentials is None:
+            potentials = self._potentials()
+        self._potential_hi, self._potential_lo = potentials
+        # Sum of the k best contributions to each field out of the whole roster, for k = 0..6.
+        best = np.where(
+            _INCREASING,
+            -np.sort(-self._potential_hi, axis=0),
+            np.sort(self._potential_lo, axis=0),
+        )
+        self._best_sums = np.vstack(
+            [np.zeros(len(_BOUND_NAMES)), np.cumsum(best[:6], axis=0)]
+        )
+        self._best_atk = float(self._atk.max())
+        # Damage only depends on the main unit itself through its attack (bounded separately), its power
+        # flip type and its skill damage, so the best unit of each power flip type stands in for any main
+        # unit that hasn't been picked yet.
+        reps: dict[str, int] = {}
+        for idx, c in enumerate(self.roster):
+            rep = reps.get(c.pf_type)
+            if rep is None or c.skill_base_dmg > self.roster[rep].skill_base_dmg:
+                reps[c.pf_type] = idx
+        self._main_reps = list(reps.values())
+        # Most promising units first, so that good teams (and with them a high bar to beat) are found early.
+        attack_modifier = self._potential_hi[:, _BOUND_NAMES.index("attack_modifier")]
+        promise = self._atk * (1 + np.maximum(-0.5, attack_modifier))
+        self._order = [int(idx) for idx in np.argsort(-promise, kind="stable")]
+
+    @property
+    def potentials(self) -> tuple[np.ndarray, np.ndarray]:
+        return self._potential_hi, self._potential_lo
+
+    def best(self) -> list[TeamResult]:
+        """
+        The top teams found so far, best first.
+        """
+        return sorted(self._heap, reverse=True)
+
+    def run(
+        self,
+        leaders: Optional[Iterable[WorldFlipperCharacter]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> Iterator[TeamResult]:
+        """
+        Searches every team (or only the ones led by one of `leaders`), yielding each team as it makes it
+        into the top teams. The final result is `best()` once this is exhausted.
+
+        `should_stop` is called for every partial team, and the search ends early as soon as it returns
+        True.
+        """
+        self._should_stop = should_stop
+        if leaders is None:
+            leader_idxs = self._order
+        else:
+            names = {c.internal_name for c in leaders}
+            leader_idxs = [
+                idx for idx in self._order if self.roster[idx].internal_name in names
+            ]
+        members: list[Optional[int]] = [None] * 6
+        sum_hi = np.zeros(len(_BOUND_NAMES))
+        sum_lo = np.zeros(len(_BOUND_NAMES))
+        yield from self._search(0, leader_idxs, members, set(), sum_hi, sum_lo)
+
+    def _search(
+        self,
+        depth: int,
+        candidates: Sequence[int],
+        members: list[Optional[int]],
+        used: set[int],
+        sum_hi: np.ndarray,
+        sum_lo: np.ndarray,
+    ) -> Iterator[TeamResult]:
+        slot = _SLOT_ORDER[depth]
+        for idx in candidates:
+            if idx in used:
+                continue
+            if slot == 4 and self.symmetric and idx < members[2]:
+                continue
+            if self._should_stop is not None and self._should_stop():
+                return
+            members[slot] = idx
+            used.add(idx)
+            next_hi = sum_hi + self._potential_hi[idx]
+            next_lo = sum_lo + self._potential_lo[idx]
+            self.stats.nodes += 1
+            if depth == len(_SLOT_ORDER) - 1:
+                result = self._score_team(members)
+                if self._offer(result):
+                    yield result
+            elif (
+                self._bound(members, depth + 1, next_hi, next_lo)
+                <= self._threshold()
+            ):
+                self.stats.pruned += 1
+            else:
+                yield from self._search(
+                    depth + 1, self._order, members, used, next_hi, next_lo
+                )
+            used.discard(idx)
+            members[slot] = None
+
+    def _threshold(self) -> float:
+        if len(self._heap) < self.top_k:
+            return self.floor
+        return max(self.floor, self._heap[0].score)
+
+    def _offer(self, result: TeamResult) -> bool:
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, result)
+            return True
+        if result.score > self._heap[0].score:
+            heapq.heapreplace(self._heap, result)
+            return True
+        return False
+
+    def _bound(
+        self,
+        members: list[Optional[int]],
+        filled: int,
+        sum_hi: np.ndarray,
+        sum_lo: np.ndarray,
+    ) -> float:
+        empty = len(_SLOT_ORDER) - filled
+        totals = np.where(_INCREASING, sum_hi, sum_lo) + self._best_sums[empty]
+        ctx = DamageFormulaContext()
+        for name, default, total in zip(_BOUND_NAMES, _DEFAULTS, totals.tolist()):
+            setattr(ctx, name, default + total)
+        self._set_source(ctx)
+
+        bound = 0.0
+        for column in range(3):
+            main = members[column * 2]
+            unison = members[column * 2 + 1]
+            atk = self._best_atk if main is None else self._atk[main]
+            atk += 0.25 * (self._best_atk if unison is None else self._atk[unison])
+            best = -np.inf
+            for rep in self._main_reps if main is None else [main]:
+                ctx.char = self.roster[rep]
+                best = max(best, self._score_ctx(ctx, atk))
+            bound += best
+        return bound
+
+    def _set_source(self, ctx: DamageFormulaContext):
+        setattr(ctx, _SOURCE_FLAGS[self.source], True)
+        if self.source == DamageSource.POWER_FLIP:
+            ctx.charge_level = self.charge_level
+
+    @staticmethod
+    def _score_ctx(ctx: DamageFormulaContext, atk: float) -> float:
+        return (ctx._damage(atk, 0, -0.05) + ctx._damage(atk, 2, 0.05)) / 2
+
+    def _score_team(self, members: list[Optional[int]]) -> TeamResult:
+        chars = [self.roster[idx] for idx in members]
+        state = self._build_state(chars)
+        score = 0.0
+        for ctx in evaluate_party(state, self.memo):
+            self._set_source(ctx)
+            low, high = ctx.calculate(state)
+            score += (low + high) / 2
+        self.stats.teams += 1
+        return TeamResult(score, tuple(c.internal_name for c in chars))
+
+    def _build_state(
+        self, chars: Sequence[Optional[WorldFlipperCharacter]]
+    ) -> GameState:
+        state = self.state.fork()
+        state.party = Party()
+        for slot, char in enumerate(chars):
+            if char is None:
+                continue
+            position = CharPosition.MAIN if slot % 2 == 0 else CharPosition.UNISON
+            state.party.set_member(
+                char, position, slot // 2, level=self.level, uncaps=self.uncaps
+            )
+            state.party.ability_lvs[slot] = [self.ability_lv] * 6
+            state.party.skill_lvs[slot] = self.skill_lv
+        return state
+
+    def _potentials(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The largest and smallest amount each unit's abilities add to each of `_BOUND_FIELDS` of a main
+        unit's context. Every unit is tried in every slot of a party filled up with units of a single
+        element, for every element, contributing to each of the main units.
+        """
+        by_element: dict = {}
+        for idx, c in enumerate(self.roster):
+            by_element.setdefault(c.element, []).append(idx)
+
+        count = len(self.roster)
+        potential_hi = np.full((count, len(_BOUND_NAMES)), -np.inf)
+        potential_lo = np.full((count, len(_BOUND_NAMES)), np.inf)
+        for idx, char in enumerate(self.roster):
+            abilities = [ab for effects in char.abilities for ab in effects]
+            for element_idxs in by_element.values():
+                fillers = [self.roster[i] for i in element_idxs if i != idx][:5]
+                for slot in range(6):
+                    chars: list[Optional[WorldFlipperCharacter]] = list(fillers)
+                    chars += [None] * (5 - len(chars))
+                    chars.insert(slot, char)
+                    state = self._build_state(chars)
+                    for main in state.party.main_chars():
+                        if main is None:
+                            continue
+                        ctx = DamageFormulaContext()
+                        for ab in abilities:
+                            result = ab.eval_effect(main, state)
+                            if result is not None:
+                                ctx.combine(result)
+                        contribution = (
+                            np.array([getattr(ctx, f) for f in _BOUND_NAMES])
+                            - _DEFAULTS
+                        )
+                        hi = potential_hi[idx]
+                        lo = potential_lo[idx]
+                        np.maximum(hi, contribution, out=hi)
+                        np.minimum(lo, contribution, out=lo)
+        return potential_hi, potential_lo
+
+
+def search_teams(
+    roster: Iterable[WorldFlipperCharacter], state: GameState, **kwargs
+) -> list[TeamResult]:
+    """
+    The best teams out of `roster`, see `TeamSearch` for the options.
+    """
+    search = TeamSearch(roster, state, **kwargs)
+    for _ in search.run():
+        pass
+    return search.best()
+
+
+# Search of the current worker process, see `search_teams_parallel`.
+_worker_search: Optional[TeamSearch] = None
+_worker_floor = None
+_worker_stop = None
+
+
+def _init_worker(
+    data_dir: str,
+    snapshot_path: Optional[str],
+    names: list[str],
+    state: GameState,
+    kwargs: dict,
+    potentials: tuple[np.ndarray, np.ndarray],
+    floor,
+    stop,
+):
+    global _worker_search, _worker_floor, _worker_stop
+    wf_data = WorldFlipperData(data_dir, snapshot_path=snapshot_path)
+    roster = [wf_data.characters_by_internal_name[name] for name in names]
+    _worker_search = TeamSearch(roster, state, potentials=potentials, **kwargs)
+    _worker_floor = floor
+    _worker_stop = stop
+
+
+def _worker_poll() -> bool:
+    # Pick up better top teams from the other workers while at it, so that every worker prunes as much as
+    # if it was the only one searching.
+    _worker_search.floor = max(_worker_search.floor, _worker_floor.value)
+    return _worker_stop.is_set()
+
+
+def _search_shard(leader: int) -> list[TeamResult]:
+    search = _worker_search
+    found = []
+    for result in search.run([search.roster[leader]], should_stop=_worker_poll):
+        found.append(result)
+        threshold = search._threshold()
+        with _worker_floor.get_lock():
+            if threshold > _worker_floor.value:
+                _worker_floor.value = threshold
+    return found
+
+
+def search_teams_parallel(
+    data_dir: str,
+    state: GameState,
+    roster: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    snapshot_path: Optional[str] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    **kwargs,
+) -> list[TeamResult]:
+    """
+    `search_teams` spread over a pool of `workers` processes (one per core by default), with one task per
+    possible leader out of `roster` (internal names, every character by default).
+
+    Every worker loads the database from the snapshot in `data_dir` (see `WorldFlipperData`) once, and
+    keeps its own top teams across all of its tasks. Workers share the worst score of their top teams, so
+    each one prunes with the best bar any of them has found so far.
+
+    `progress` is called with the number of finished and total tasks whenever a task finishes. Once
+    `should_stop` returns True (it's checked a few times a second) every worker stops, and the best teams
+    found up to that point are returned.
+    """
+    wf_data = WorldFlipperData(data_dir, snapshot_path=snapshot_path)
+    if roster is None:
+        names = list(wf_data.characters_by_internal_name.keys())
+    else:
+        names = list(roster)
+    chars = [wf_data.characters_by_internal_name[name] for name in names]
+    # Potentials only need to be probed once, and the order units are tried in makes for a good order of
+    # tasks too: the most promising leaders get searched first.
+    search = TeamSearch(chars, state, **kwargs)
+    # Only the rest of the state is needed, the workers fill the party with their own characters.
+    worker_state = state.fork()
+    worker_state.party = Party()
+
+    mp_context = multiprocessing.get_context()
+    floor = mp_context.Value("d", -np.inf)
+    stop = mp_context.Event()
+    results: list[TeamResult] = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(
+            data_dir,
+            snapshot_path,
+            names,
+            worker_state,
+            kwargs,
+            search.potentials,
+            floor,
+            stop,
+        ),
+    ) as executor:
+        pending: set[Future] = {
+            executor.submit(_search_shard, leader) for leader in search._order
+        }
+        total = len(pending)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.extend(future.result())
+            if progress is not None and len(done) > 0:
+                progress(total - len(pending), total)
+            if should_stop is not None and should_stop():
+                stop.set()
+                for future in pending:
+                    future.cancel()
+                # Tasks that were already running still return what they found before stopping.
+                for future in wait(pending)[0]:
+                    if not future.cancelled():
+                        results.extend(future.result())
+                break
+    return heapq.nlargest(search.top_k, results)
@@ -1,7 +1,13 @@
 from __future__ import annotations
-from typing import Literal
+from typing import Literal, Optional, TYPE_CHECKING
 from enum import Enum, auto
 
+if TYPE_CHECKING:
+    from wf.status_effect import StatusEffect
+
+# `Event.time_activated` is in ticks of the game's logic, which runs at 60 ticks a second.
+TICKS_PER_SECOND = 60
+
 
 class EventKind(Enum):
     BALL_FLIP = auto()
@@ -39,3 +45,5 @@ class Event:
         self.skill_unit: Literal[-1, 0, 1, 2] = -1
         self.ability: Literal[-1, 0, 1, 2, 3, 4, 5] = -1
         self.count: int = 0
+        # What was gained for `GAINED_BUFF`/`GAINED_DEBUFF`.
+        self.status_effect: Optional[StatusEffect] = None
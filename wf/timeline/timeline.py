@@ -1,20 +1,135 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from bisect import bisect_left
+from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+import heapq
 
 if TYPE_CHECKING:
-    from .events import Event
+    from .events import Event, EventKind
+
+# An event in the queue, along with the order it was added in so that events at the same time come out in
+# the order they were added.
+_Entry = tuple[int, int, "Event"]
 
 
 class WorldFlipperTimeline:
+    """
+    Every event that is yet to happen in a battle, ordered by `Event.time_activated`. Events activated at
+    the same time stay in the order they were added in.
+
+    Events are kept in a heap, which is all that adding events and taking them out in order needs. A
+    sorted copy is built the first time events are looked up by time or kind, and is kept up to date for
+    as long as events are only taken out in order or added after every other event.
+
+    The time of an event must not be changed while it's in the timeline.
+    """
+
     def __init__(self):
-        self._events: list[Event] = []
+        self._heap: list[_Entry] = []
+        self._seq = 0
+        # Sorted copy of the heap, starting at `_index_start`. None when it needs to be rebuilt.
+        self._index: Optional[list[_Entry]] = None
+        self._index_times: list[int] = []
+        self._index_start = 0
+        # Sorted entries and their times for each kind of event, built from `_index` on demand.
+        self._by_kind: dict[EventKind, tuple[list[int], list[Event]]] = {}
 
     def add_event(self, event: Event):
-        added = False
-        for i, e in enumerate(self._events):
-            if event.time_activated < e.time_activated:
-                self._events.insert(i, event)
-                added = True
-                break
-        if not added:
-            self._events.append(event)
+        entry = (event.time_activated, self._seq, event)
+        self._seq += 1
+        heapq.heappush(self._heap, entry)
+        if self._index is not None:
+            last = self._index_times[-1] if len(self._index_times) > 0 else entry[0]
+            if entry[0] >= last:
+                self._index.append(entry)
+                self._index_times.append(entry[0])
+            else:
+                self._index = None
+        self._by_kind.clear()
+
+    def add_events(self, events: Iterable[Event]):
+        entries = []
+        for event in events:
+            entries.append((event.time_activated, self._seq, event))
+            self._seq += 1
+        if len(entries) > len(self._heap):
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        self._index = None
+        self._by_kind.clear()
+
+    def peek(self) -> Optional[Event]:
+        """
+        The next event, without taking it out of the timeline.
+        """
+        if len(self._heap) == 0:
+            return None
+        return self._heap[0][2]
+
+    def pop_next(self) -> Event:
+        """
+        Takes the next event out of the timeline. Raises IndexError when there are no events left.
+        """
+        if len(self._heap) == 0:
+            raise IndexError("No events left in the timeline.")
+        entry = heapq.heappop(self._heap)
+        if self._index is not None:
+            self._index_start += 1
+            # Don't hold on to events that are long gone.
+            if self._index_start > 1024 and self._index_start * 2 > len(self._index):
+                del self._index[: self._index_start]
+                del self._index_times[: self._index_start]
+                self._index_start = 0
+        self._by_kind.clear()
+        return entry[2]
+
+    def between(
+        self, start: int, end: int, kind: Optional[EventKind] = None
+    ) -> list[Event]:
+        """
+        Every event activated from `start` up to (but not including) `end`, in order, optionally only of
+        a single kind.
+        """
+        if kind is None:
+            times, entries = self._sorted()
+            lo = bisect_left(times, start, self._index_start)
+            hi = bisect_left(times, end, self._index_start)
+            return [entry[2] for entry in entries[lo:hi]]
+        times, events = self._sorted_kind(kind)
+        return events[bisect_left(times, start) : bisect_left(times, end)]
+
+    def events(self, kind: Optional[EventKind] = None) -> list[Event]:
+        """
+        Every event in order, optionally only of a single kind.
+        """
+        if kind is None:
+            _, entries = self._sorted()
+            return [entry[2] for entry in entries[self._index_start :]]
+        return list(self._sorted_kind(kind)[1])
+
+    def _sorted(self) -> tuple[list[int], list[_Entry]]:
+        if self._index is None:
+            self._index = sorted(self._heap)
+            self._index_times = [entry[0] for entry in self._index]
+            self._index_start = 0
+        return self._index_times, self._index
+
+    def _sorted_kind(self, kind: EventKind) -> tuple[list[int], list[Event]]:
+        if kind not in self._by_kind:
+            _, entries = self._sorted()
+            times = []
+            events = []
+            for entry in entries[self._index_start :]:
+                if entry[2].kind == kind:
+                    times.append(entry[0])
+                    events.append(entry[2])
+            self._by_kind[kind] = (times, events)
+        return self._by_kind[kind]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self.events())
@@ -1,16 +1,73 @@
+from __future__ import annotations
+from typing import Optional, Sequence, Tuple, TYPE_CHECKING
+import os
+
+import numpy as np
 import ujson
-import weakref
 
+from .ability.index import AbilityIndex
+from .ability.table import AbilityTable
 from .character import WorldFlipperCharacter
-from wf.ability import WorldFlipperAbility
+from .snapshot import (
+    SNAPSHOT_FILE_NAME,
+    build_manifest,
+    load_snapshot,
+    write_snapshot,
+)
+
+if TYPE_CHECKING:
+    from .ability import WorldFlipperAbility
+
+# Every file from the asset dump that goes into building the database. A snapshot is only valid for as
+# long as none of these change.
+_SOURCE_FILES = (
+    "character/character.json",
+    "character/character_text.json",
+    "character/character_status.json",
+    "skill/action_skill.json",
+    "ability/ability.json",
+)
 
 
 class WorldFlipperData:
-    def __init__(self, data_dir):
+    def __init__(
+        self,
+        data_dir,
+        snapshot: bool = True,
+        snapshot_path: Optional[str] = None,
+    ):
+        """
+        Parsing the asset dump is by far the most expensive part of starting up, so by default the fully
+        built database is stored in a snapshot next to the data (or at `snapshot_path`) and loaded from
+        there on later runs. The snapshot is rebuilt automatically whenever any of the source files change.
+        """
         self.characters = {}
         self.characters_by_internal_name = {}
         self.characters_by_name = {}
+        # Raw data for every ability of every character, see `AbilityTable`.
+        self.ability_table = AbilityTable()
+        self.ability_index = AbilityIndex(self.ability_table)
+
+        if not snapshot:
+            self._load_json(data_dir)
+            return
+
+        if snapshot_path is None:
+            snapshot_path = os.path.join(data_dir, SNAPSHOT_FILE_NAME)
+        payload = load_snapshot(snapshot_path, data_dir, _SOURCE_FILES)
+        if payload is not None:
+            self.__dict__.update(payload)
+            return
 
+        # Hash the source files before reading them, so that a dump which changes while we're loading it
+        # produces a snapshot that is considered stale rather than one that is silently wrong.
+        manifest = build_manifest(data_dir, _SOURCE_FILES)
+        self._load_json(data_dir)
+        write_snapshot(
+            snapshot_path, data_dir, _SOURCE_FILES, dict(vars(self)), manifest=manifest
+        )
+
+    def _load_json(self, data_dir):
         # Most of the base data/attributes of any individual character. Stuff like stars, power flip type, element, etc.
         with open(f"{data_dir}/character/character.json", "r", encoding="utf-8") as f:
             character_json = ujson.load(f)
@@ -47,24 +104,68 @@ class WorldFlipperData:
                 char.skill_name_evolve = evolve_skill[0]
                 char.skill_evolve_cost = int(evolve_skill[5])
 
+            ability_idx = 0
             for ability_id in char.ability_ids:
                 if ability_id == "(None)":
                     continue
-                ability_json = abilities_json[ability_id]
-                effects = []
-                for ability_effect_json in ability_json:
-                    # Use a weakref of the character to prevent a cycle. Should always be safe because
-                    # once a character is no longer being referenced we should also no longer be able to
-                    # access/use the ability.
-                    effects.append(
-                        WorldFlipperAbility(ability_effect_json, weakref.proxy(char))
-                    )
-                char.abilities.append(effects)
+                self.ability_table.add(ability_id, abilities_json[ability_id])
+                self.ability_index.add_owner(
+                    ability_id, len(self.characters), char.id, ability_idx
+                )
+                ability_idx += 1
+            char.set_ability_table(self.ability_table)
 
             self.characters[char.id] = char
             self.characters_by_internal_name[char.internal_name] = char
             self.characters_by_name[char.name] = char
 
+        self.ability_index.build()
+
+    def abilities_where(
+        self, field: str, value: str, effect_type: Optional[str] = None
+    ) -> list[Tuple[WorldFlipperCharacter, WorldFlipperAbility]]:
+        """
+        Every ability (and the character it belongs to) whose raw `field` is `value`, optionally limited
+        to a single effect type ("0" for main, "1" for continuous). Only `INDEXED_FIELDS` can be queried.
+        Results are in the same order as walking every character's abilities would produce them.
+        """
+        table = self.ability_table
+        matches = []
+        for row in self.ability_index.rows(field, value, effect_type):
+            start, _ = table.rows_by_id[table.ability_id(row)]
+            for owner in self.ability_index.owners_of(row):
+                matches.append(
+                    (owner.char_order, owner.ability_idx, row - start, owner.char_id)
+                )
+        matches.sort()
+        result = []
+        for _, ability_idx, effect_idx, char_id in matches:
+            char = self.characters[char_id]
+            result.append((char, char.abilities[ability_idx][effect_idx]))
+        return result
+
+    def attack_table(
+        self, chars: Optional[Sequence[WorldFlipperCharacter]] = None
+    ) -> np.ndarray:
+        """
+        `WorldFlipperCharacter.attack_table` of every character (or only of `chars`) stacked in the same
+        order, so that `attack_table()[:, 99, 3, 1]` is the attack of every evolved character at level
+        100 with 3 uncaps.
+        """
+        if chars is None:
+            chars = list(self.characters.values())
+        return np.stack([char.attack_table for char in chars])
+
+    def hp_table(
+        self, chars: Optional[Sequence[WorldFlipperCharacter]] = None
+    ) -> np.ndarray:
+        """
+        `WorldFlipperCharacter.hp_table` of every character (or only of `chars`), see `attack_table`.
+        """
+        if chars is None:
+            chars = list(self.characters.values())
+        return np.stack([char.hp_table for char in chars])
+
     def find(self, key: str):
         if key in self.characters:
             return self.characters[key]